@@ -0,0 +1,177 @@
+"""界面文本基准：对比旧版内置 I18N 字典与按需加载的 locales 文本目录。
+
+旧版把全部语言的文本写在 main.py 的 I18N 字典中（key -> {语言: 文本}），
+导入模块即构建整张表，每次 _t 都查两层字典并调用 str.format。
+这里由 locales/*.json 生成等价的 Python 模块作为对照，在独立子进程中测量：
+
+- 冷启动：导入旧版字典模块 vs 仅加载当前语言的文本目录（.pyc 已缓存）；
+- 内存：上述过程新增的 Python 堆内存（tracemalloc）；
+- 查找：一次“渲染”调用全部键（带占位符的键传入参数），比较旧版 _t、
+  新版 _t（LRU 缓存命中）与新版未命中缓存时的每次调用耗时。
+
+    python3 bench/bench_i18n.py
+    python3 bench/bench_i18n.py --lang en --rounds 200 --json
+"""
+
+import argparse
+import json
+import os
+import py_compile
+import statistics
+import string
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LOCALES_DIR = os.path.join(ROOT, "locales")
+LANGS = ("zh_CN", "zh_TW", "en", "ja", "ko", "ru")
+LEGACY_MODULE = "legacy_i18n"
+
+
+def write_legacy_module(directory: str) -> None:
+    """生成与旧版结构相同的内置字典模块：I18N = {key: {lang: text}}。"""
+    table: Dict[str, Dict[str, str]] = {}
+    for lang in LANGS:
+        with open(os.path.join(LOCALES_DIR, f"{lang}.json"), "r", encoding="utf-8") as f:
+            for key, text in json.load(f).items():
+                table.setdefault(key, {})[lang] = text
+    lines = ["I18N = {"]
+    for key, per_lang in table.items():
+        lines.append(f"    {key!r}: {{")
+        lines.extend(f"        {lang!r}: {text!r}," for lang, text in per_lang.items())
+        lines.append("    },")
+    lines.append("}")
+    path = os.path.join(directory, f"{LEGACY_MODULE}.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    # 与打包后的 .app 一致：导入时读取已编译的 .pyc（即使设置了 PYTHONDONTWRITEBYTECODE）
+    py_compile.compile(path, doraise=True)
+
+
+def calls() -> List[Tuple[str, Dict[str, str]]]:
+    """一次“渲染”：每个键调用一次，占位符均填入参数。"""
+    with open(os.path.join(LOCALES_DIR, "zh_CN.json"), "r", encoding="utf-8") as f:
+        catalog = json.load(f)
+    out = []
+    for key, text in catalog.items():
+        fields = {field for _lit, field, _spec, _conv in string.Formatter().parse(text) if field}
+        out.append((key, {name: "1" for name in sorted(fields)}))
+    return out
+
+
+def legacy_t(table: Dict[str, Dict[str, str]], lang: str):
+    """旧版 _t 的查找逻辑（两层字典，中文兜底，每次 format）。"""
+
+    def _t(key: str, **kwargs) -> str:
+        entry = table.get(key, {})
+        text = entry.get(lang) or entry.get("zh_CN") or key
+        try:
+            return text.format(**kwargs)
+        except Exception:
+            return text
+
+    return _t
+
+
+def per_call_us(fn, workload: List[Tuple[str, Dict[str, str]]], rounds: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for key, kwargs in workload:
+            fn(key, **kwargs)
+    return (time.perf_counter() - t0) * 1e6 / (rounds * len(workload))
+
+
+def child(mode: str, lang: str, legacy_dir: str, rounds: int) -> Dict[str, Any]:
+    """在子进程中测量一种实现：加载耗时、新增内存与每次查找耗时。"""
+    workload = calls()
+    if mode == "legacy":
+        sys.path.insert(0, legacy_dir)
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        mod = __import__(LEGACY_MODULE)
+        load_ms = (time.perf_counter() - t0) * 1000
+        mem = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        fn = legacy_t(mod.I18N, lang)
+        return {"load_ms": load_ms, "memory_bytes": mem, "lookup_us": per_call_us(fn, workload, rounds)}
+
+    import packycode_core as core
+
+    core.set_current_language(lang)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    core._load_catalog(lang)
+    load_ms = (time.perf_counter() - t0) * 1000
+    mem = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    result = {"load_ms": load_ms, "memory_bytes": mem}
+    # 有键缺失时才会额外加载中文目录
+    t0 = time.perf_counter()
+    core._load_catalog("zh_CN")
+    result["zh_fallback_load_ms"] = (time.perf_counter() - t0) * 1000 if lang != "zh_CN" else 0.0
+    uncached = core._t_cached.__wrapped__
+
+    def _t_uncached(key: str, **kwargs) -> str:
+        return uncached(lang, key, tuple(sorted(kwargs.items())))
+
+    result["lookup_us"] = per_call_us(core._t, workload, rounds)
+    result["lookup_uncached_us"] = per_call_us(_t_uncached, workload, rounds)
+    return result
+
+
+def run_child(mode: str, lang: str, legacy_dir: str, rounds: int) -> Dict[str, Any]:
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, "--lang", lang,
+         "--legacy-dir", legacy_dir, "--rounds", str(rounds)],
+        check=True, stdout=subprocess.PIPE, text=True,
+    )
+    return json.loads(out.stdout)
+
+
+def median_of(runs: List[Dict[str, Any]]) -> Dict[str, float]:
+    return {k: statistics.median(r[k] for r in runs) for k in runs[0]}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="界面文本：内置 I18N 字典 vs 按需加载的文本目录")
+    parser.add_argument("--lang", default="en", choices=LANGS, help="当前语言")
+    parser.add_argument("--rounds", type=int, default=100, help="每个子进程中完整渲染的轮数")
+    parser.add_argument("--repeat", type=int, default=5, help="子进程重复次数（取中位数）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    parser.add_argument("--child", choices=("legacy", "catalog"), help=argparse.SUPPRESS)
+    parser.add_argument("--legacy-dir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.child, args.lang, args.legacy_dir, args.rounds)))
+        return 0
+
+    with tempfile.TemporaryDirectory(prefix="packycode-i18n-") as legacy_dir:
+        write_legacy_module(legacy_dir)
+        # 预热一次（文件缓存），只比较冷启动时的实际加载
+        run_child("legacy", args.lang, legacy_dir, 1)
+        run_child("catalog", args.lang, legacy_dir, 1)
+        legacy = median_of([run_child("legacy", args.lang, legacy_dir, args.rounds) for _ in range(args.repeat)])
+        catalog = median_of([run_child("catalog", args.lang, legacy_dir, args.rounds) for _ in range(args.repeat)])
+
+    report = {"lang": args.lang, "keys": len(calls()), "legacy": legacy, "catalog": catalog}
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+    print(f"lang={args.lang} keys={report['keys']} (median of {args.repeat} processes)")
+    print(f"load:    legacy I18N import {legacy['load_ms']:.2f} ms  |  catalog {catalog['load_ms']:.2f} ms"
+          f"  (+{catalog['zh_fallback_load_ms']:.2f} ms if zh_CN fallback is needed)")
+    print(f"memory:  legacy {legacy['memory_bytes'] / 1024:.0f} KiB  |  catalog {catalog['memory_bytes'] / 1024:.0f} KiB")
+    print(f"_t:      legacy {legacy['lookup_us']:.3f} us/call  |  cached {catalog['lookup_us']:.3f} us/call"
+          f"  |  uncached {catalog['lookup_uncached_us']:.3f} us/call")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
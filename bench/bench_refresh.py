@@ -0,0 +1,136 @@
+"""刷新流水线的负载/延迟基准：在本地桩服务上反复执行完整刷新并统计。
+
+输出每次刷新耗时的 p50/p99、每次刷新的请求数与传输字节数（由桩服务计数，
+包含重试与 304 条件请求）。示例：
+
+    python3 bench/bench_refresh.py --refreshes 200 --latency-ms 80 --jitter-ms 30
+    python3 bench/bench_refresh.py --mode cold --error-rate 0.05 --json
+    python3 bench/bench_refresh.py --budget-p99-ms 300   # p99 超出预算时退出码为 1
+
+模式：
+- warm：复用同一条流水线（长连接与 ETag 缓存生效），对应运行中的状态栏；
+- cold：每次刷新新建流水线，对应冷启动后的首次刷新。
+"""
+
+import argparse
+import base64
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_api import MockApiServer, add_state_arguments, state_from_args  # noqa: E402
+from packycode_core import DEFAULT_CONFIG, FetchPipeline  # noqa: E402
+
+
+def fake_jwt(user_id: str = "bench-user", ttl: int = 30 * 86400) -> str:
+    """构造仅用于桩服务的 JWT（签名不校验），使用量统计与周期用量接口生效。"""
+    def enc(obj: Dict[str, Any]) -> str:
+        raw = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    return ".".join([
+        enc({"alg": "HS256", "typ": "JWT"}),
+        enc({"user_id": user_id, "exp": int(time.time()) + ttl}),
+        "c2lnbmF0dXJl",
+    ])
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法百分位；空列表返回 0。"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    server = MockApiServer(state_from_args(args)).start()
+    os.environ["PACKYCODE_API_BASE"] = server.base_url
+    cfg = dict(DEFAULT_CONFIG)
+    cfg.update({
+        "token": fake_jwt(),
+        "account_version": "codex_shared",
+        "http_retries": args.retries,
+        # 熔断会让后续刷新直接失败，默认关闭以测量完整请求路径
+        "breaker_failure_threshold": args.breaker_threshold or 10 ** 9,
+    })
+    pipeline = None if args.mode == "cold" else FetchPipeline(cfg)
+    try:
+        # 预热一次（不计入统计），排除首次连接与 DNS 之外的偶发开销
+        for _ in range(args.warmup):
+            p = pipeline or FetchPipeline(cfg)
+            p.collect(None, force=True)
+            if p is not pipeline:
+                p.close()
+        server.state.reset_counters()
+
+        times_ms: List[float] = []
+        errors = 0
+        for _ in range(args.refreshes):
+            p = pipeline or FetchPipeline(cfg)
+            t0 = time.perf_counter()
+            snap = p.collect(None, force=True)
+            times_ms.append((time.perf_counter() - t0) * 1000.0)
+            if p is not pipeline:
+                p.close()
+            if snap.error is not None:
+                errors += 1
+        counters = server.state.counters()
+        cache = pipeline.http.cache_stats() if pipeline is not None else None
+    finally:
+        if pipeline is not None:
+            pipeline.close()
+        server.stop()
+
+    n = max(1, args.refreshes)
+    return {
+        "mode": args.mode,
+        "refreshes": args.refreshes,
+        "failed_refreshes": errors,
+        "p50_ms": round(percentile(times_ms, 50), 2),
+        "p99_ms": round(percentile(times_ms, 99), 2),
+        "max_ms": round(max(times_ms), 2) if times_ms else 0.0,
+        "requests_per_refresh": round(counters["requests"] / n, 2),
+        "bytes_per_refresh": round(counters["bytes_sent"] / n, 1),
+        "not_modified_ratio": round(counters["not_modified"] / max(1, counters["requests"]), 3),
+        "server": counters,
+        "client_cache": cache,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="PackyCode 刷新流水线负载/延迟基准")
+    parser.add_argument("--refreshes", type=int, default=100, help="计入统计的刷新次数")
+    parser.add_argument("--warmup", type=int, default=2, help="预热刷新次数（不计入统计）")
+    parser.add_argument("--mode", choices=("warm", "cold"), default="warm")
+    parser.add_argument("--retries", type=int, default=DEFAULT_CONFIG["http_retries"], help="HTTP 重试次数")
+    parser.add_argument("--breaker-threshold", type=int, default=0, help="熔断阈值；0 表示关闭熔断")
+    parser.add_argument("--budget-p99-ms", type=float, default=None, help="p99 预算（毫秒），超出时退出码为 1")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    add_state_arguments(parser)
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        print(f"mode={report['mode']} refreshes={report['refreshes']} failed={report['failed_refreshes']}")
+        print(f"refresh time: p50 {report['p50_ms']:.1f} ms, p99 {report['p99_ms']:.1f} ms, max {report['max_ms']:.1f} ms")
+        print(f"requests/refresh: {report['requests_per_refresh']:.2f}  bytes/refresh: {report['bytes_per_refresh']:.0f}"
+              f"  304 ratio: {report['not_modified_ratio']:.1%}")
+        for path, cnt in sorted(report["server"]["by_path"].items()):
+            print(f"  {path}: {cnt}")
+    if args.budget_p99_ms is not None and report["p99_ms"] > args.budget_p99_ms:
+        print(f"p99 over budget ({args.budget_p99_ms:.0f} ms)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
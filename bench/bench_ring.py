@@ -0,0 +1,157 @@
+"""圆环图标绘制基准：对比 ring_raster（NumPy / 纯 Python）与 AppKit 绘制路径。
+
+遍历 0..100 全部百分比与各配色/反转组合，输出每个状态的平均绘制耗时
+（含 PNG 编码）；在 macOS 上同时测量 AppKit 路径并报告两者的像素差异。
+另输出 HiDPI（默认 1x/2x/3x）每个状态的渲染耗时与缓存占用（解码后位图字节数）。
+
+    python3 bench/bench_ring.py
+    python3 bench/bench_ring.py --size 40 --json
+    python3 bench/bench_ring.py --scales 1,2
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import ring_raster  # noqa: E402
+
+MODES = ("colorful", "green", "blue", "gradient")
+
+
+def states() -> List[Tuple[int, bool, str, bool]]:
+    out = []
+    for reverse in (False, True):
+        out.extend((p, False, "colorful", reverse) for p in range(101))
+        for mode in MODES:
+            out.extend((p, True, mode, reverse) for p in range(101))
+    return out
+
+
+def bench_raster(all_states: List[Tuple[int, bool, str, bool]], size: int, use_numpy: bool) -> float:
+    stroke = 2.0 * size / 20
+    t0 = time.perf_counter()
+    for p, colored, mode, reverse in all_states:
+        rgba = ring_raster.render_ring_rgba(p, colored, mode, reverse, size, stroke, use_numpy=use_numpy)
+        ring_raster.encode_png(size, size, rgba)
+    return (time.perf_counter() - t0) * 1000.0 / len(all_states)
+
+
+def _rep_to_rgba(rep: Any, size: int) -> bytes:
+    """读取 NSBitmapImageRep 像素并反预乘为与 ring_raster 相同的 RGBA 排列。"""
+    stride = int(rep.bytesPerRow())
+    raw = bytes(rep.bitmapData()[: stride * size])
+    out = bytearray(size * size * 4)
+    for row in range(size):
+        for col in range(size):
+            i = row * stride + col * 4
+            r, g, b, a = raw[i:i + 4]
+            j = (row * size + col) * 4
+            if a:
+                out[j] = min(255, round(r * 255 / a))
+                out[j + 1] = min(255, round(g * 255 / a))
+                out[j + 2] = min(255, round(b * 255 / a))
+            out[j + 3] = a
+    return bytes(out)
+
+
+def bench_appkit(all_states: List[Tuple[int, bool, str, bool]], size: int) -> Optional[Dict[str, float]]:
+    try:
+        from AppKit import NSBitmapImageFileTypePNG
+        from main import draw_ring_rep
+    except Exception:
+        return None
+    t0 = time.perf_counter()
+    for p, colored, mode, reverse in all_states:
+        rep = draw_ring_rep(p, "", colored, mode, reverse, size)
+        if rep is None:
+            return None
+        rep.representationUsingType_properties_(NSBitmapImageFileTypePNG, None)
+    per_state = (time.perf_counter() - t0) * 1000.0 / len(all_states)
+
+    worst, total = 0, 0.0
+    stroke = 2.0 * size / 20
+    for p, colored, mode, reverse in all_states:
+        ours = ring_raster.render_ring_rgba(p, colored, mode, reverse, size, stroke)
+        theirs = _rep_to_rgba(draw_ring_rep(p, "", colored, mode, reverse, size), size)
+        mx, mean = ring_raster.pixel_diff(ours, theirs)
+        worst = max(worst, mx)
+        total += mean
+    return {"ms_per_state": round(per_state, 4), "max_channel_diff": worst, "mean_channel_diff": round(total / len(all_states), 3)}
+
+
+def bench_hidpi(all_states: List[Tuple[int, bool, str, bool]], scales: List[int]) -> Dict[str, Any]:
+    """每个状态渲染全部倍率的耗时，以及缓存一个状态所占的位图/PNG 字节数。"""
+    out: Dict[str, Any] = {"scales": scales}
+    t0 = time.perf_counter()
+    png_bytes = 0
+    for p, colored, mode, reverse in all_states:
+        for scale in scales:
+            png_bytes += len(ring_raster.render_ring_png(p, colored, mode, reverse, 20 * scale, 2.0 * scale))
+    out["raster_ms_per_state"] = round((time.perf_counter() - t0) * 1000.0 / len(all_states), 4)
+    out["bitmap_bytes_per_state"] = sum((20 * scale) ** 2 * 4 for scale in scales)
+    out["png_bytes_per_state"] = round(png_bytes / len(all_states), 1)
+    try:
+        from main import RING_IMAGE_CACHE_MAX, draw_ring_rep
+    except Exception:
+        return out
+    t0 = time.perf_counter()
+    bitmap = 0
+    for p, colored, mode, reverse in all_states:
+        for scale in scales:
+            rep = draw_ring_rep(p, f"{p}%", colored, mode, reverse, 20 * scale)
+            if rep is None:
+                return out
+            bitmap += int(rep.bytesPerRow()) * int(rep.pixelsHigh())
+    out["appkit_ms_per_state"] = round((time.perf_counter() - t0) * 1000.0 / len(all_states), 4)
+    out["appkit_bitmap_bytes_per_state"] = bitmap // len(all_states)
+    out["cache_max_states"] = RING_IMAGE_CACHE_MAX
+    return out
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="圆环图标绘制基准")
+    parser.add_argument("--size", type=int, default=20, help="画布边长（像素）")
+    parser.add_argument("--scales", default="1,2,3", help="HiDPI 倍率列表（逗号分隔）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    args = parser.parse_args()
+    scales = [int(x) for x in args.scales.split(",") if x.strip()]
+
+    all_states = states()
+    report: Dict[str, Any] = {"size": args.size, "states": len(all_states)}
+    if ring_raster.has_numpy():
+        report["raster_numpy_ms_per_state"] = round(bench_raster(all_states, args.size, True), 4)
+    report["raster_python_ms_per_state"] = round(bench_raster(all_states, args.size, False), 4)
+    report["appkit"] = bench_appkit(all_states, args.size)
+    report["hidpi"] = bench_hidpi(all_states, scales)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+    print(f"size={report['size']}px states={report['states']}")
+    if "raster_numpy_ms_per_state" in report:
+        print(f"raster (numpy):  {report['raster_numpy_ms_per_state']:.3f} ms/state")
+    print(f"raster (python): {report['raster_python_ms_per_state']:.3f} ms/state")
+    ak = report["appkit"]
+    if ak is None:
+        print("appkit: unavailable")
+    else:
+        print(f"appkit:          {ak['ms_per_state']:.3f} ms/state")
+        print(f"pixel diff vs appkit: max {ak['max_channel_diff']}, mean {ak['mean_channel_diff']:.3f}")
+    hd = report["hidpi"]
+    print(f"hidpi scales={','.join(str(x) for x in hd['scales'])}:")
+    print(f"  raster: {hd['raster_ms_per_state']:.3f} ms/state, png {hd['png_bytes_per_state']:.0f} B/state,"
+          f" bitmap {hd['bitmap_bytes_per_state']} B/state")
+    if "appkit_ms_per_state" in hd:
+        total = hd["appkit_bitmap_bytes_per_state"] * hd["cache_max_states"]
+        print(f"  appkit: {hd['appkit_ms_per_state']:.3f} ms/state, bitmap {hd['appkit_bitmap_bytes_per_state']} B/state"
+              f" (cache full: {total / 1024 / 1024:.1f} MiB for {hd['cache_max_states']} states)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
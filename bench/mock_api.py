@@ -0,0 +1,265 @@
+"""本地 PackyCode API 桩服务，用于在不访问线上环境的情况下测量刷新耗时。
+
+实现状态栏用到的三个接口：
+- /api/backend/users/info
+- /api/backend/users/{user_id}/usage-stats
+- /api/backend/subscriptions
+
+可配置响应延迟、错误率（返回 503）、负载大小与数据变化概率；支持 ETag 条件请求。
+单独运行：
+
+    python3 bench/mock_api.py --port 8787 --latency-ms 80 --error-rate 0.05
+    python3 packycode_core.py --base-url http://127.0.0.1:8787 --token <JWT>
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+USAGE_STATS_RE = re.compile(r"^/api/backend/users/([^/]+)/usage-stats$")
+
+
+class MockState:
+    """桩服务的可变状态与计数器（多线程共享，需持锁访问）。"""
+
+    def __init__(
+        self,
+        latency_ms: float = 50.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        payload_kb: float = 0.0,
+        mutate_rate: float = 0.2,
+        etag: bool = True,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.jitter_ms = max(0.0, float(jitter_ms))
+        self.error_rate = min(1.0, max(0.0, float(error_rate)))
+        self.payload_kb = max(0.0, float(payload_kb))
+        self.mutate_rate = min(1.0, max(0.0, float(mutate_rate)))
+        self.etag = bool(etag)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.daily_spent = 12.5
+        self.api_calls = 100
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.by_path: Dict[str, int] = {}
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.requests = 0
+            self.errors = 0
+            self.not_modified = 0
+            self.bytes_sent = 0
+            self.by_path = {}
+
+    def counters(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "not_modified": self.not_modified,
+                "bytes_sent": self.bytes_sent,
+                "by_path": dict(self.by_path),
+            }
+
+    def begin(self, path: str) -> Tuple[float, bool]:
+        """登记一次请求，返回 (本次延迟秒数, 是否模拟错误)；按概率推进用量数据。"""
+        with self._lock:
+            self.requests += 1
+            self.by_path[path] = self.by_path.get(path, 0) + 1
+            delay = self.latency_ms + (self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0)
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            elif self._rng.random() < self.mutate_rate:
+                self.daily_spent = round(self.daily_spent + 0.25, 2)
+                self.api_calls += 1
+        return max(0.0, delay) / 1000.0, fail
+
+    def sent(self, nbytes: int, not_modified: bool = False) -> None:
+        with self._lock:
+            self.bytes_sent += nbytes
+            if not_modified:
+                self.not_modified += 1
+
+    def _padding(self) -> str:
+        # 以固定字符填充至目标大小，模拟更大的响应体
+        return "x" * int(self.payload_kb * 1024)
+
+    def user_info(self) -> Dict[str, Any]:
+        with self._lock:
+            spent, pad = self.daily_spent, self._padding()
+        return {
+            "success": True,
+            "data": {
+                "daily_budget_usd": "50.00",
+                "daily_spent_usd": f"{spent:.2f}",
+                "monthly_budget_usd": "500.00",
+                "monthly_spent_usd": f"{spent * 10:.2f}",
+                "balance_usd": "88.80",
+                "plan_expires_at": (datetime.date.today() + datetime.timedelta(days=20)).isoformat() + "T00:00:00Z",
+                "padding": pad,
+            },
+        }
+
+    def usage_stats(self) -> Dict[str, Any]:
+        today = datetime.date.today()
+        with self._lock:
+            calls, pad = self.api_calls, self._padding()
+        return {
+            "today_usage": {"date": today.isoformat(), "api_calls": calls},
+            "daily_trend": [
+                {"date": (today - datetime.timedelta(days=i)).isoformat(), "api_calls": calls + i * 7}
+                for i in range(7)
+            ],
+            "padding": pad,
+        }
+
+    def subscriptions(self) -> Dict[str, Any]:
+        today = datetime.date.today()
+        with self._lock:
+            spent, pad = self.daily_spent, self._padding()
+        return {
+            "data": [
+                {
+                    "status": "active",
+                    "current_period_start": (today - datetime.timedelta(days=10)).isoformat() + "T00:00:00Z",
+                    "current_period_end": (today + datetime.timedelta(days=20)).isoformat() + "T00:00:00Z",
+                    "current_period_spent_usd": round(spent * 8, 2),
+                    "current_period_budget_usd": 400,
+                }
+            ],
+            "padding": pad,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "MockApiServer"
+    protocol_version = "HTTP/1.1"  # 支持 keep-alive，与真实服务的连接复用行为一致
+    # 响应头与正文分两次写出；复用连接时 Nagle + 延迟 ACK 会让每个响应多等数十毫秒
+    disable_nagle_algorithm = True
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        state = self.server.state
+        path = self.path.split("?", 1)[0]
+        if path == "/api/backend/users/info":
+            key, build = "users/info", state.user_info
+        elif USAGE_STATS_RE.match(path):
+            key, build = "usage-stats", state.usage_stats
+        elif path == "/api/backend/subscriptions":
+            key, build = "subscriptions", state.subscriptions
+        else:
+            self._send(404, b'{"error":"not found"}')
+            return
+        if not (self.headers.get("Authorization") or "").startswith("Bearer "):
+            self._send(401, b'{"error":"unauthorized"}')
+            return
+        delay, fail = state.begin(key)
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self._send(503, b'{"error":"unavailable"}', {"Retry-After": "1"})
+            return
+        body = json.dumps(build(), separators=(",", ":")).encode("utf-8")
+        headers = {}
+        if state.etag:
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                self._send(304, b"", headers)
+                return
+        self._send(200, body, headers)
+
+    def _send(self, code: int, body: bytes, headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(code)
+        out = {"Content-Type": "application/json", "Content-Length": str(len(body))}
+        out.update(headers or {})
+        for k, v in out.items():
+            self.send_header(k, v)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        # 计入状态行与响应头的大致字节数，便于比较条件请求的收益
+        head = len(f"HTTP/1.1 {code}\r\n") + sum(len(k) + len(v) + 4 for k, v in out.items()) + 2
+        self.server.state.sent(head + len(body), not_modified=(code == 304))
+
+
+class MockApiServer(ThreadingHTTPServer):
+    """在后台线程运行的桩服务；port=0 时自动选择空闲端口。"""
+
+    daemon_threads = True
+
+    def __init__(self, state: Optional[MockState] = None, host: str = "127.0.0.1", port: int = 0):
+        self.state = state or MockState()
+        super().__init__((host, port), _Handler)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockApiServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="mock-api", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+def add_state_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="每个响应的基础延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="延迟的随机抖动幅度（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 503 的概率（0..1）")
+    parser.add_argument("--payload-kb", type=float, default=0.0, help="每个响应额外填充的大小（KB）")
+    parser.add_argument("--mutate-rate", type=float, default=0.2, help="每次请求后用量数据变化的概率（0..1）")
+    parser.add_argument("--no-etag", action="store_true", help="不返回 ETag（禁用条件请求）")
+    parser.add_argument("--seed", type=int, default=None, help="随机种子，便于复现")
+
+
+def state_from_args(args: argparse.Namespace) -> MockState:
+    return MockState(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        payload_kb=args.payload_kb,
+        mutate_rate=args.mutate_rate,
+        etag=not args.no_etag,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地 PackyCode API 桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    add_state_arguments(parser)
+    args = parser.parse_args()
+    server = MockApiServer(state_from_args(args), args.host, args.port)
+    print(f"mock PackyCode API listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
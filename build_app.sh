@@ -100,6 +100,14 @@ if [[ -d "${APP_PATH}" ]]; then
   if [[ -f "${APP_PATH}/Contents/Resources/icon.png" ]]; then
     echo "[ok] Icon bundled: Contents/Resources/icon.png"
   fi
+  # 界面文本目录缺失时 .app 只能显示兜底中文与 key 名，视为构建失败
+  for f in locales/*.json; do
+    if [[ ! -f "${APP_PATH}/Contents/Resources/${f}" ]]; then
+      echo "[error] Missing in bundle: Contents/Resources/${f}" >&2
+      exit 1
+    fi
+  done
+  echo "[ok] Locales bundled: Contents/Resources/locales"
   if [[ ${OPEN_APP} -eq 1 ]]; then
     echo "[open] Launching app ..."
     open "${APP_PATH}"
@@ -1,1056 +1,71 @@
+import time
+
+# 启动计时起点：PACKYCODE_PROFILE_STARTUP=1 时用于统计导入耗时
+_STARTUP_T0 = time.perf_counter()
+
 import datetime
-import calendar
-import base64
-import math
-import re
 import json
 import os
+import re
+import sys
 import threading
-import time
-import webbrowser
-import tempfile
-import zipfile
-import shutil
-import subprocess
-import plistlib
-import hashlib
-from typing import Any, Dict, Optional, Tuple
-
-import requests
+from collections import OrderedDict
+# 仅在线更新/打开网页时使用的模块（webbrowser、zipfile、tempfile、subprocess、
+# plistlib、shutil 与 packycode_update）在使用处按需导入，缩短冷启动时间
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
+
 import rumps
+
+# 界面无关的核心逻辑（配置、本地化、拉取流水线、文本格式化）
+from packycode_core import (
+    CONFIG_DIR,
+    DEFAULT_CONFIG,
+    DEFAULT_UPDATE_REPO,
+    LANG_EN,
+    LANG_JA,
+    LANG_KO,
+    LANG_RU,
+    LANG_ZH_CN,
+    LANG_ZH_TW,
+    RING_ATLAS_DIR,
+    AccountGroup,
+    AdaptivePollController,
+    ConfigStore,
+    FetchSnapshot,
+    MenuView,
+    UsageHistoryStore,
+    UsageSnapshot,
+    _resource_path_candidate,
+    _snapshot_to_sample,
+    _t,
+    account_section_title,
+    account_specs,
+    build_error_view,
+    build_menu_view,
+    compute_ring_text,
+    ensure_config_dir,
+    get_app_version,
+    get_base_and_dashboard,
+    load_config,
+    load_last_snapshot,
+    make_accounts_title,
+    parse_float,
+    now_str,
+    save_last_snapshot,
+    set_current_language,
+    token_status,
+)
+if TYPE_CHECKING:
+    # 在线更新模块（zipfile/hashlib 等）仅在检查或下载更新时按需导入
+    from packycode_update import ReleaseChecker, ReleaseInfo
 try:
     from AppKit import NSAlert
 except Exception:
     NSAlert = None  # 运行在无 GUI/无 pyobjc 环境时兜底
-
-
-# ---------------------------
-# 语言与本地化
-# ---------------------------
-
-# 支持的语言代码
-LANG_ZH_CN = "zh_CN"
-LANG_EN = "en"
-LANG_ZH_TW = "zh_TW"
-LANG_JA = "ja"
-LANG_KO = "ko"
-LANG_RU = "ru"
-
-_current_language = LANG_ZH_CN
-
-
-class LocalizedError(Exception):
-    def __init__(self, key: str, **kwargs):
-        self.key = key
-        self.kwargs = kwargs
-        super().__init__(key)
-
-    def message(self) -> str:
-        try:
-            return _t(self.key, **self.kwargs)
-        except Exception:
-            return self.key
-
-    def __str__(self) -> str:
-        return self.message()
-
-
-def set_current_language(lang: str) -> None:
-    global _current_language
-    if lang in {LANG_ZH_CN, LANG_EN, LANG_ZH_TW, LANG_JA, LANG_KO, LANG_RU}:
-        _current_language = lang
-    else:
-        _current_language = LANG_ZH_CN
-
-
-# 文本字典
-I18N = {
-    # 占位符/片段
-    "version_prefix": {
-        LANG_ZH_CN: "版本：",
-        LANG_EN: "Version: ",
-        LANG_ZH_TW: "版本：",
-        LANG_JA: "バージョン：",
-        LANG_KO: "버전: ",
-        LANG_RU: "Версия: ",
-    },
-    "title_req_label": {
-        LANG_ZH_CN: "调用",
-        LANG_EN: "Req",
-        LANG_ZH_TW: "調用",
-        LANG_JA: "リクエスト",
-        LANG_KO: "요청",
-        LANG_RU: "Запрос",
-    },
-
-    # 顶部信息区（占位）
-    "status_uninitialized": {
-        LANG_ZH_CN: "状态：未初始化",
-        LANG_EN: "Status: Not initialized",
-        LANG_ZH_TW: "狀態：未初始化",
-        LANG_JA: "状態：未初期化",
-        LANG_KO: "상태: 초기화되지 않음",
-        LANG_RU: "Статус: не инициализировано",
-    },
-    "status_ok": {
-        LANG_ZH_CN: "状态：正常",
-        LANG_EN: "Status: OK",
-        LANG_ZH_TW: "狀態：正常",
-        LANG_JA: "状態：正常",
-        LANG_KO: "상태: 정상",
-        LANG_RU: "Статус: ОК",
-    },
-    "daily_placeholder": {
-        LANG_ZH_CN: "每日：-/- (剩余 -)",
-        LANG_EN: "Daily: -/- (left -)",
-        LANG_ZH_TW: "每日：-/- (剩餘 -)",
-        LANG_JA: "日次：-/- (残り -)",
-        LANG_KO: "일일: -/- (잔여 -)",
-        LANG_RU: "День: -/- (осталось -)",
-    },
-    "requests_placeholder": {
-        LANG_ZH_CN: "调用次数：-",
-        LANG_EN: "Requests: -",
-        LANG_ZH_TW: "調用次數：-",
-        LANG_JA: "リクエスト数：-",
-        LANG_KO: "요청 수: -",
-        LANG_RU: "Запросов: -",
-    },
-    "usage_span_placeholder": {
-        LANG_ZH_CN: "7日日均：-",
-        LANG_EN: "Last 7 days: -",
-        LANG_ZH_TW: "7日日均：-",
-        LANG_JA: "直近7日：-",
-        LANG_KO: "최근 7일: -",
-        LANG_RU: "За 7 дней: -",
-    },
-    "monthly_placeholder": {
-        LANG_ZH_CN: "本周期：-/- (剩余 -)",
-        LANG_EN: "Cycle: -/- (left -)",
-        LANG_ZH_TW: "本週期：-/- (剩餘 -)",
-        LANG_JA: "サイクル：-/- (残り -)",
-        LANG_KO: "주기: -/- (잔여 -)",
-        LANG_RU: "Цикл: -/- (осталось -)",
-    },
-    "cycle_placeholder": {
-        LANG_ZH_CN: "周期：-",
-        LANG_EN: "Cycle: -",
-        LANG_ZH_TW: "週期：-",
-        LANG_JA: "サイクル：-",
-        LANG_KO: "주기: -",
-        LANG_RU: "Цикл: -",
-    },
-    "renew_placeholder": {
-        LANG_ZH_CN: "续费提醒：-",
-        LANG_EN: "Renewal: -",
-        LANG_ZH_TW: "續費提醒：-",
-        LANG_JA: "更新通知：-",
-        LANG_KO: "갱신 알림: -",
-        LANG_RU: "Продление: -",
-    },
-    "balance_placeholder": {
-        LANG_ZH_CN: "余额：-",
-        LANG_EN: "Balance: -",
-        LANG_ZH_TW: "餘額：-",
-        LANG_JA: "残高：-",
-        LANG_KO: "잔액: -",
-        LANG_RU: "Баланс: -",
-    },
-    "last_update_placeholder": {
-        LANG_ZH_CN: "上次更新：-",
-        LANG_EN: "Last Update: -",
-        LANG_ZH_TW: "上次更新：-",
-        LANG_JA: "最終更新：-",
-        LANG_KO: "마지막 업데이트: -",
-        LANG_RU: "Последнее обновление: -",
-    },
-    "token_placeholder": {
-        LANG_ZH_CN: "Token：-",
-        LANG_EN: "Token: -",
-        LANG_ZH_TW: "Token：-",
-        LANG_JA: "トークン：-",
-        LANG_KO: "토큰: -",
-        LANG_RU: "Токен: -",
-    },
-
-    # 菜单分组/项
-    "menu_refresh": {
-        LANG_ZH_CN: "刷新",
-        LANG_EN: "Refresh",
-        LANG_ZH_TW: "刷新",
-        LANG_JA: "更新",
-        LANG_KO: "새로고침",
-        LANG_RU: "Обновить",
-    },
-    "menu_account": {
-        LANG_ZH_CN: "账号类型",
-        LANG_EN: "Account",
-        LANG_ZH_TW: "帳號類型",
-        LANG_JA: "アカウント種別",
-        LANG_KO: "계정 유형",
-        LANG_RU: "Аккаунт",
-    },
-    "menu_title_format": {
-        LANG_ZH_CN: "标题格式",
-        LANG_EN: "Title Format",
-        LANG_ZH_TW: "標題格式",
-        LANG_JA: "タイトル形式",
-        LANG_KO: "제목 형식",
-        LANG_RU: "Формат заголовка",
-    },
-    "menu_set_token": {
-        LANG_ZH_CN: "设置 Token...",
-        LANG_EN: "Set Token...",
-        LANG_ZH_TW: "設定 Token...",
-        LANG_JA: "トークンを設定...",
-        LANG_KO: "토큰 설정...",
-        LANG_RU: "Указать токен...",
-    },
-    "menu_toggle_hidden": {
-        LANG_ZH_CN: "隐藏/展示",
-        LANG_EN: "Hide/Show",
-        LANG_ZH_TW: "隱藏/顯示",
-        LANG_JA: "非表示/表示",
-        LANG_KO: "숨김/표시",
-        LANG_RU: "Скрыть/Показать",
-    },
-    "menu_open_dashboard": {
-        LANG_ZH_CN: "打开控制台",
-        LANG_EN: "Open Dashboard",
-        LANG_ZH_TW: "打開控制台",
-        LANG_JA: "ダッシュボードを開く",
-        LANG_KO: "대시보드 열기",
-        LANG_RU: "Открыть панель",
-    },
-    "menu_latency_monitor": {
-        LANG_ZH_CN: "延迟监控",
-        LANG_EN: "Latency Monitor",
-        LANG_ZH_TW: "延遲監控",
-        LANG_JA: "レイテンシ監視",
-        LANG_KO: "지연 모니터",
-        LANG_RU: "Мониторинг задержки",
-    },
-    "menu_check_update": {
-        LANG_ZH_CN: "检查更新",
-        LANG_EN: "Check Updates",
-        LANG_ZH_TW: "檢查更新",
-        LANG_JA: "更新を確認",
-        LANG_KO: "업데이트 확인",
-        LANG_RU: "Проверить обновления",
-    },
-    # 进度圆环菜单
-    "menu_ring": {
-        LANG_ZH_CN: "进度圆环",
-        LANG_EN: "Ring",
-        LANG_ZH_TW: "進度環",
-        LANG_JA: "進捗リング",
-        LANG_KO: "링",
-        LANG_RU: "Кольцо",
-    },
-    "ring_enable": {
-        LANG_ZH_CN: "在图标显示进度圆环",
-        LANG_EN: "Show ring in icon",
-        LANG_ZH_TW: "在圖示顯示進度環",
-        LANG_JA: "アイコンにリングを表示",
-        LANG_KO: "아이콘에 링 표시",
-        LANG_RU: "Показывать кольцо в иконке",
-    },
-    "ring_source": {
-        LANG_ZH_CN: "圆环来源",
-        LANG_EN: "Ring Source",
-        LANG_ZH_TW: "環來源",
-        LANG_JA: "リングのソース",
-        LANG_KO: "링 소스",
-        LANG_RU: "Источник кольца",
-    },
-    "ring_colored": {
-        LANG_ZH_CN: "使用彩色圆环",
-        LANG_EN: "Use colored ring",
-        LANG_ZH_TW: "使用彩色環",
-        LANG_JA: "カラー リングを使用",
-        LANG_KO: "컬러 링 사용",
-        LANG_RU: "Цветное кольцо",
-    },
-    "ring_reverse": {
-        LANG_ZH_CN: "反转模式（高亮未使用）",
-        LANG_EN: "Reverse mode (highlight unused)",
-        LANG_ZH_TW: "反轉模式（高亮未使用）",
-        LANG_JA: "反転表示（未使用を強調）",
-        LANG_KO: "반전 모드(미사용 강조)",
-        LANG_RU: "Режим инверсии (выделять остаток)",
-    },
-    "ring_text_enable": {
-        LANG_ZH_CN: "在圆环内显示百分比",
-        LANG_EN: "Show percentage in ring",
-        LANG_ZH_TW: "在圓環內顯示百分比",
-        LANG_JA: "リング内に割合を表示",
-        LANG_KO: "링 내부에 백분율 표시",
-        LANG_RU: "Показывать % в кольце",
-    },
-    "ring_text_mode": {
-        LANG_ZH_CN: "圆环文字",
-        LANG_EN: "Ring Text",
-        LANG_ZH_TW: "圓環文字",
-        LANG_JA: "リング文字",
-        LANG_KO: "링 텍스트",
-        LANG_RU: "Текст кольца",
-    },
-    "ring_text_mode_percent": {
-        LANG_ZH_CN: "百分比",
-        LANG_EN: "Percent",
-        LANG_ZH_TW: "百分比",
-        LANG_JA: "パーセント",
-        LANG_KO: "퍼센트",
-        LANG_RU: "Проценты",
-    },
-    "ring_text_mode_calls": {
-        LANG_ZH_CN: "调用次数",
-        LANG_EN: "Calls",
-        LANG_ZH_TW: "調用次數",
-        LANG_JA: "呼び出し回数",
-        LANG_KO: "호출 수",
-        LANG_RU: "Вызовы",
-    },
-    "ring_text_mode_spent": {
-        LANG_ZH_CN: "使用金额",
-        LANG_EN: "Spent",
-        LANG_ZH_TW: "使用金額",
-        LANG_JA: "使用金額",
-        LANG_KO: "사용 금액",
-        LANG_RU: "Потрачено",
-    },
-    "ring_text_show_percent": {
-        LANG_ZH_CN: "文本显示百分号",
-        LANG_EN: "Show % sign",
-        LANG_ZH_TW: "文字顯示百分號",
-        LANG_JA: "% 記号を表示",
-        LANG_KO: "% 기호 표시",
-        LANG_RU: "Показывать знак %",
-    },
-    "ring_text_show_label": {
-        LANG_ZH_CN: "文本显示来源标签 (D/M)",
-        LANG_EN: "Show source label (D/M)",
-        LANG_ZH_TW: "文字顯示來源標籤 (D/M)",
-        LANG_JA: "ソースラベルを表示 (D/M)",
-        LANG_KO: "원본 라벨 표시 (D/M)",
-        LANG_RU: "Показывать метку (D/M)",
-    },
-    "ring_color_mode": {
-        LANG_ZH_CN: "圆环颜色",
-        LANG_EN: "Ring Color",
-        LANG_ZH_TW: "圓環顏色",
-        LANG_JA: "リング色",
-        LANG_KO: "링 색상",
-        LANG_RU: "Цвет кольца",
-    },
-    "ring_color_colorful": {
-        LANG_ZH_CN: "彩色",
-        LANG_EN: "Colorful",
-        LANG_ZH_TW: "彩色",
-        LANG_JA: "カラフル",
-        LANG_KO: "컬러풀",
-        LANG_RU: "Разноцветный",
-    },
-    "ring_color_green": {
-        LANG_ZH_CN: "绿色",
-        LANG_EN: "Green",
-        LANG_ZH_TW: "綠色",
-        LANG_JA: "緑",
-        LANG_KO: "초록",
-        LANG_RU: "Зелёный",
-    },
-    "ring_color_blue": {
-        LANG_ZH_CN: "蓝色",
-        LANG_EN: "Blue",
-        LANG_ZH_TW: "藍色",
-        LANG_JA: "青",
-        LANG_KO: "파랑",
-        LANG_RU: "Синий",
-    },
-    "ring_color_gradient": {
-        LANG_ZH_CN: "渐变彩色",
-        LANG_EN: "Gradient",
-        LANG_ZH_TW: "漸變彩色",
-        LANG_JA: "グラデーション",
-        LANG_KO: "그라데이션",
-        LANG_RU: "Градиент",
-    },
-    "ring_source_daily": {
-        LANG_ZH_CN: "每日进度",
-        LANG_EN: "Daily",
-        LANG_ZH_TW: "每日進度",
-        LANG_JA: "日次",
-        LANG_KO: "일일",
-        LANG_RU: "День",
-    },
-    "ring_source_monthly": {
-        LANG_ZH_CN: "周期进度",
-        LANG_EN: "Cycle",
-        LANG_ZH_TW: "週期進度",
-        LANG_JA: "サイクル",
-        LANG_KO: "주기",
-        LANG_RU: "Цикл",
-    },
-    "menu_affiliates": {
-        LANG_ZH_CN: "推广",
-        LANG_EN: "Affiliates",
-        LANG_ZH_TW: "推廣",
-        LANG_JA: "アフィリエイト",
-        LANG_KO: "추천",
-        LANG_RU: "Партнёры",
-    },
-    "menu_quit": {
-        LANG_ZH_CN: "退出",
-        LANG_EN: "Quit",
-        LANG_ZH_TW: "退出",
-        LANG_JA: "終了",
-        LANG_KO: "종료",
-        LANG_RU: "Выход",
-    },
-    "menu_language": {
-        LANG_ZH_CN: "语言",
-        LANG_EN: "Language",
-        LANG_ZH_TW: "語言",
-        LANG_JA: "言語",
-        LANG_KO: "언어",
-        LANG_RU: "Язык",
-    },
-    "account_shared": {
-        LANG_ZH_CN: "共享（公交车）",
-        LANG_EN: "Shared (Bus)",
-        LANG_ZH_TW: "共享（公車）",
-        LANG_JA: "共有（バス）",
-        LANG_KO: "공유(버스)",
-        LANG_RU: "Общий (Bus)",
-    },
-    "account_private": {
-        LANG_ZH_CN: "滴滴车（私有）",
-        LANG_EN: "Private",
-        LANG_ZH_TW: "滴滴車（私有）",
-        LANG_JA: "DiDi（プライベート）",
-        LANG_KO: "DiDi(개인)",
-        LANG_RU: "Частный",
-    },
-    "account_codex": {
-        LANG_ZH_CN: "Codex 公交车",
-        LANG_EN: "Codex Shared",
-        LANG_ZH_TW: "Codex 公車",
-        LANG_JA: "Codex 共有",
-        LANG_KO: "Codex 공유",
-        LANG_RU: "Codex общий",
-    },
-    "titlefmt_percent": {
-        LANG_ZH_CN: "百分比",
-        LANG_EN: "Percent",
-        LANG_ZH_TW: "百分比",
-        LANG_JA: "パーセント",
-        LANG_KO: "퍼센트",
-        LANG_RU: "Проценты",
-    },
-    "titlefmt_custom": {
-        LANG_ZH_CN: "自定义...",
-        LANG_EN: "Custom...",
-        LANG_ZH_TW: "自訂...",
-        LANG_JA: "カスタム...",
-        LANG_KO: "사용자 지정...",
-        LANG_RU: "Пользовательский...",
-    },
-    "titlefmt_show_requests": {
-        LANG_ZH_CN: "显示调用次数",
-        LANG_EN: "Show Requests",
-        LANG_ZH_TW: "顯示調用次數",
-        LANG_JA: "リクエスト数を表示",
-        LANG_KO: "요청 수 표시",
-        LANG_RU: "Показывать запросы",
-    },
-
-    # 动态信息模板
-    "status_no_data": {
-        LANG_ZH_CN: "状态：无数据",
-        LANG_EN: "Status: No data",
-        LANG_ZH_TW: "狀態：無資料",
-        LANG_JA: "状態：データなし",
-        LANG_KO: "상태: 데이터 없음",
-        LANG_RU: "Статус: нет данных",
-    },
-    "title_no_data": {
-        LANG_ZH_CN: "无数据",
-        LANG_EN: "No data",
-        LANG_ZH_TW: "無資料",
-        LANG_JA: "データなし",
-        LANG_KO: "데이터 없음",
-        LANG_RU: "Нет данных",
-    },
-    "status_error_prefix": {
-        LANG_ZH_CN: "状态：错误 - {err}",
-        LANG_EN: "Status: Error - {err}",
-        LANG_ZH_TW: "狀態：錯誤 - {err}",
-        LANG_JA: "状態：エラー - {err}",
-        LANG_KO: "상태: 오류 - {err}",
-        LANG_RU: "Статус: ошибка - {err}",
-    },
-    "title_error": {
-        LANG_ZH_CN: "错误",
-        LANG_EN: "Error",
-        LANG_ZH_TW: "錯誤",
-        LANG_JA: "エラー",
-        LANG_KO: "오류",
-        LANG_RU: "Ошибка",
-    },
-    "last_update_prefix": {
-        LANG_ZH_CN: "上次更新：{time}",
-        LANG_EN: "Last Update: {time}",
-        LANG_ZH_TW: "上次更新：{time}",
-        LANG_JA: "最終更新：{time}",
-        LANG_KO: "마지막 업데이트: {time}",
-        LANG_RU: "Последнее обновление: {time}",
-    },
-    "requests_prefix": {
-        LANG_ZH_CN: "调用次数：{val}",
-        LANG_EN: "Requests: {val}",
-        LANG_ZH_TW: "調用次數：{val}",
-        LANG_JA: "リクエスト数：{val}",
-        LANG_KO: "요청 수: {val}",
-        LANG_RU: "Запросов: {val}",
-    },
-    "usage_span_prefix": {
-        LANG_ZH_CN: "7日日均：{val}",
-        LANG_EN: "Last 7 days: {val}",
-        LANG_ZH_TW: "7日日均：{val}",
-        LANG_JA: "直近7日：{val}",
-        LANG_KO: "최근 7일: {val}",
-        LANG_RU: "За 7 дней: {val}",
-    },
-    "usage_span_desc": {
-        LANG_ZH_CN: "总 {total}，日均 {avg}",
-        LANG_EN: "Total {total}, Avg {avg}",
-        LANG_ZH_TW: "總 {total}，日均 {avg}",
-        LANG_JA: "合計 {total}、日平均 {avg}",
-        LANG_KO: "총 {total}, 일평균 {avg}",
-        LANG_RU: "Всего {total}, в день {avg}",
-    },
-    "daily_full": {
-        LANG_ZH_CN: "每日：{spent}/{limit} (剩余 {remain})",
-        LANG_EN: "Daily: {spent}/{limit} (left {remain})",
-        LANG_ZH_TW: "每日：{spent}/{limit} (剩餘 {remain})",
-        LANG_JA: "日次：{spent}/{limit} (残り {remain})",
-        LANG_KO: "일일: {spent}/{limit} (잔여 {remain})",
-        LANG_RU: "День: {spent}/{limit} (ост. {remain})",
-    },
-    "daily_no_limit": {
-        LANG_ZH_CN: "每日：{spent}/- (剩余 -)",
-        LANG_EN: "Daily: {spent}/- (left -)",
-        LANG_ZH_TW: "每日：{spent}/- (剩餘 -)",
-        LANG_JA: "日次：{spent}/- (残り -)",
-        LANG_KO: "일일: {spent}/- (잔여 -)",
-        LANG_RU: "День: {spent}/- (ост. -)",
-    },
-    "monthly_full": {
-        LANG_ZH_CN: "本周期：{spent}/{limit} (剩余 {remain})",
-        LANG_EN: "Cycle: {spent}/{limit} (left {remain})",
-        LANG_ZH_TW: "本週期：{spent}/{limit} (剩餘 {remain})",
-        LANG_JA: "サイクル：{spent}/{limit} (残り {remain})",
-        LANG_KO: "주기: {spent}/{limit} (잔여 {remain})",
-        LANG_RU: "Цикл: {spent}/{limit} (ост. {remain})",
-    },
-    "monthly_no_limit": {
-        LANG_ZH_CN: "本周期：{spent}/- (剩余 -)",
-        LANG_EN: "Cycle: {spent}/- (left -)",
-        LANG_ZH_TW: "本週期：{spent}/- (剩餘 -)",
-        LANG_JA: "サイクル：{spent}/- (残り -)",
-        LANG_KO: "주기: {spent}/- (잔여 -)",
-        LANG_RU: "Цикл: {spent}/- (ост. -)",
-    },
-    "cycle_expired": {
-        LANG_ZH_CN: "周期：{start}-{end}（已到期）",
-        LANG_EN: "Cycle: {start}-{end} (expired)",
-        LANG_ZH_TW: "週期：{start}-{end}（已到期）",
-        LANG_JA: "サイクル：{start}-{end}（期限切れ）",
-        LANG_KO: "주기: {start}-{end} (만료)",
-        LANG_RU: "Цикл: {start}-{end} (истёк)",
-    },
-    "cycle_remaining": {
-        LANG_ZH_CN: "周期：{start}-{end}（剩余{days}天）",
-        LANG_EN: "Cycle: {start}-{end} (left {days} days)",
-        LANG_ZH_TW: "週期：{start}-{end}（剩餘{days}天）",
-        LANG_JA: "サイクル：{start}-{end}（残り{days}日）",
-        LANG_KO: "주기: {start}-{end} (잔여 {days}일)",
-        LANG_RU: "Цикл: {start}-{end} (ост. {days} дн.)",
-    },
-    "renew_expired": {
-        LANG_ZH_CN: "⚠️ 已到期，请尽快续费",
-        LANG_EN: "⚠️ Expired, please renew",
-        LANG_ZH_TW: "⚠️ 已到期，請儘快續費",
-        LANG_JA: "⚠️ 期限切れ、早めの更新を",
-        LANG_KO: "⚠️ 만료됨, 갱신 필요",
-        LANG_RU: "⚠️ Срок истёк, продлите",
-    },
-    "renew_soon": {
-        LANG_ZH_CN: "⚠️ 即将到期（剩余{days}天），建议提前续费",
-        LANG_EN: "⚠️ Expiring soon (left {days} days), renew early",
-        LANG_ZH_TW: "⚠️ 即將到期（剩餘{days}天），建議提前續費",
-        LANG_JA: "⚠️ まもなく期限（残り{days}日）、早めの更新を",
-        LANG_KO: "⚠️ 곧 만료(잔여 {days}일), 미리 갱신 권장",
-        LANG_RU: "⚠️ Скоро истекает (ост. {days} дн.), продлите заранее",
-    },
-    "renew_prefix": {
-        LANG_ZH_CN: "续费提醒：{text}",
-        LANG_EN: "Renewal: {text}",
-        LANG_ZH_TW: "續費提醒：{text}",
-        LANG_JA: "更新通知：{text}",
-        LANG_KO: "갱신 알림: {text}",
-        LANG_RU: "Продление: {text}",
-    },
-    "balance_prefix": {
-        LANG_ZH_CN: "余额：{val}",
-        LANG_EN: "Balance: {val}",
-        LANG_ZH_TW: "餘額：{val}",
-        LANG_JA: "残高：{val}",
-        LANG_KO: "잔액: {val}",
-        LANG_RU: "Баланс: {val}",
-    },
-
-    # Token 展示与提醒
-    "token_expired_label": {
-        LANG_ZH_CN: "Token：已过期（{date}）",
-        LANG_EN: "Token: expired ({date})",
-        LANG_ZH_TW: "Token：已過期（{date}）",
-        LANG_JA: "トークン：期限切れ（{date}）",
-        LANG_KO: "토큰: 만료됨 ({date})",
-        LANG_RU: "Токен: истёк ({date})",
-    },
-    "token_valid_until": {
-        LANG_ZH_CN: "Token：{date}（{remain}）",
-        LANG_EN: "Token: {date} ({remain})",
-        LANG_ZH_TW: "Token：{date}（{remain}）",
-        LANG_JA: "トークン：{date}（{remain}）",
-        LANG_KO: "토큰: {date} ({remain})",
-        LANG_RU: "Токен: {date} ({remain})",
-    },
-    "notify_token_expired_subtitle": {
-        LANG_ZH_CN: "Token 已过期",
-        LANG_EN: "Token expired",
-        LANG_ZH_TW: "Token 已過期",
-        LANG_JA: "トークンの有効期限切れ",
-        LANG_KO: "토큰 만료",
-        LANG_RU: "Токен истёк",
-    },
-    "notify_token_expired_message": {
-        LANG_ZH_CN: "请在“设置 Token...”中更换 JWT",
-        LANG_EN: "Please replace JWT in 'Set Token...'",
-        LANG_ZH_TW: "請在「設定 Token...」中更換 JWT",
-        LANG_JA: "『トークンを設定...』で JWT を更新してください",
-        LANG_KO: "'토큰 설정...'에서 JWT를 교체하세요",
-        LANG_RU: "Замените JWT в 'Указать токен...'",
-    },
-
-    # 自定义标题
-    "custom_title_window": {
-        LANG_ZH_CN: "自定义标题格式",
-        LANG_EN: "Custom Title Format",
-        LANG_ZH_TW: "自訂標題格式",
-        LANG_JA: "カスタムタイトル形式",
-        LANG_KO: "사용자 지정 제목 형식",
-        LANG_RU: "Пользовательский формат заголовка",
-    },
-    "custom_title_help": {
-        LANG_ZH_CN: "自定义标题模板，支持占位符：\n{d_pct} {m_pct} {d_spent} {d_limit} {m_spent} {m_limit} {bal} {d_req}\n例如: D {d_pct}% | M {m_pct}% 或 $ {bal}",
-        LANG_EN: "Custom title template with placeholders:\n{d_pct} {m_pct} {d_spent} {d_limit} {m_spent} {m_limit} {bal} {d_req}\nExample: D {d_pct}% | M {m_pct}% or $ {bal}",
-        LANG_ZH_TW: "自訂標題模板，支援占位符：\n{d_pct} {m_pct} {d_spent} {d_limit} {m_spent} {m_limit} {bal} {d_req}\n例如: D {d_pct}% | M {m_pct}% 或 $ {bal}",
-        LANG_JA: "タイトルテンプレート（プレースホルダー）：\n{d_pct} {m_pct} {d_spent} {d_limit} {m_spent} {m_limit} {bal} {d_req}\n例: D {d_pct}% | M {m_pct}% または $ {bal}",
-        LANG_KO: "제목 템플릿, 자리표시자:\n{d_pct} {m_pct} {d_spent} {d_limit} {m_spent} {m_limit} {bal} {d_req}\n예: D {d_pct}% | M {m_pct}% 또는 $ {bal}",
-        LANG_RU: "Шаблон заголовка с плейсхолдерами:\n{d_pct} {m_pct} {d_spent} {d_limit} {m_spent} {m_limit} {bal} {d_req}\nПример: D {d_pct}% | M {m_pct}% или $ {bal}",
-    },
-    "btn_save": {
-        LANG_ZH_CN: "保存",
-        LANG_EN: "Save",
-        LANG_ZH_TW: "保存",
-        LANG_JA: "保存",
-        LANG_KO: "저장",
-        LANG_RU: "Сохранить",
-    },
-    "btn_cancel": {
-        LANG_ZH_CN: "取消",
-        LANG_EN: "Cancel",
-        LANG_ZH_TW: "取消",
-        LANG_JA: "キャンセル",
-        LANG_KO: "취소",
-        LANG_RU: "Отмена",
-    },
-
-    # Token 设置窗口
-    "set_token_title": {
-        LANG_ZH_CN: "设置 Token (JWT 或 API Key)",
-        LANG_EN: "Set Token (JWT or API Key)",
-        LANG_ZH_TW: "設定 Token (JWT 或 API Key)",
-        LANG_JA: "トークン設定 (JWT または API Key)",
-        LANG_KO: "토큰 설정 (JWT 또는 API Key)",
-        LANG_RU: "Указать токен (JWT или API Key)",
-    },
-    "set_token_message": {
-        LANG_ZH_CN: "粘贴从 PackyCode 获取的 JWT 或 API Key (将以 Bearer 形式发送)",
-        LANG_EN: "Paste JWT or API Key from PackyCode (sent as Bearer)",
-        LANG_ZH_TW: "貼上從 PackyCode 取得的 JWT 或 API Key（以 Bearer 方式發送）",
-        LANG_JA: "PackyCode から取得した JWT または API Key を貼り付け（Bearer で送信）",
-        LANG_KO: "PackyCode에서 받은 JWT 또는 API Key를 붙여넣으세요 (Bearer로 전송)",
-        LANG_RU: "Вставьте JWT или API Key из PackyCode (отправляется как Bearer)",
-    },
-
-    # 更新检查
-    "update_found_title": {
-        LANG_ZH_CN: "发现新版本",
-        LANG_EN: "New Version Found",
-        LANG_ZH_TW: "發現新版本",
-        LANG_JA: "新しいバージョンを検出",
-        LANG_KO: "새 버전 발견",
-        LANG_RU: "Найдена новая версия",
-    },
-    "update_found_message": {
-        LANG_ZH_CN: "发现新版本：{tag}\n当前版本：{cur}\n是否前往发布页下载？",
-        LANG_EN: "New version: {tag}\nCurrent: {cur}\nOpen releases page?",
-        LANG_ZH_TW: "發現新版本：{tag}\n目前版本：{cur}\n是否前往發布頁下載？",
-        LANG_JA: "新バージョン：{tag}\n現在：{cur}\nリリースページを開きますか？",
-        LANG_KO: "새 버전: {tag}\n현재: {cur}\n릴리스 페이지를 여시겠습니까?",
-        LANG_RU: "Новая версия: {tag}\nТекущая: {cur}\nОткрыть страницу релизов?",
-    },
-    "btn_go": {
-        LANG_ZH_CN: "前往",
-        LANG_EN: "Open",
-        LANG_ZH_TW: "前往",
-        LANG_JA: "開く",
-        LANG_KO: "열기",
-        LANG_RU: "Открыть",
-    },
-    "btn_ok": {
-        LANG_ZH_CN: "确定",
-        LANG_EN: "OK",
-        LANG_ZH_TW: "確定",
-        LANG_JA: "OK",
-        LANG_KO: "확인",
-        LANG_RU: "ОК",
-    },
-    # 不再提供在线更新按钮
-    "update_changelog_prefix": {
-        LANG_ZH_CN: "更新内容：\n{notes}",
-        LANG_EN: "Release Notes:\n{notes}",
-        LANG_ZH_TW: "更新內容：\n{notes}",
-        LANG_JA: "更新内容:\n{notes}",
-        LANG_KO: "업데이트 내용:\n{notes}",
-        LANG_RU: "Изменения:\n{notes}",
-    },
-    "update_check_title": {
-        LANG_ZH_CN: "检查更新",
-        LANG_EN: "Check Updates",
-        LANG_ZH_TW: "檢查更新",
-        LANG_JA: "更新を確認",
-        LANG_KO: "업데이트 확인",
-        LANG_RU: "Проверка обновлений",
-    },
-    "update_latest_message": {
-        LANG_ZH_CN: "当前已是最新版本。",
-        LANG_EN: "You are up to date.",
-        LANG_ZH_TW: "目前已是最新版本。",
-        LANG_JA: "最新バージョンです。",
-        LANG_KO: "이미 최신 버전입니다.",
-        LANG_RU: "У вас последняя версия.",
-    },
-    "update_check_failed": {
-        LANG_ZH_CN: "检查更新失败",
-        LANG_EN: "Update Check Failed",
-        LANG_ZH_TW: "檢查更新失敗",
-        LANG_JA: "更新確認に失敗",
-        LANG_KO: "업데이트 확인 실패",
-        LANG_RU: "Сбой проверки обновления",
-    },
-
-    # 在线更新
-    "online_update": {
-        LANG_ZH_CN: "在线更新",
-        LANG_EN: "Online Update",
-        LANG_ZH_TW: "線上更新",
-        LANG_JA: "オンライン更新",
-        LANG_KO: "온라인 업데이트",
-        LANG_RU: "Онлайн-обновление",
-    },
-    "online_update_not_found": {
-        LANG_ZH_CN: "未找到可下载的发行包，请前往发布页手动下载。",
-        LANG_EN: "No downloadable asset found. Please download from releases page.",
-        LANG_ZH_TW: "未找到可下載的發行包，請前往發布頁手動下載。",
-        LANG_JA: "ダウンロード可能なアセットがありません。リリースページから入手してください。",
-        LANG_KO: "다운로드 가능한 자산을 찾지 못했습니다. 릴리스 페이지에서 내려받으세요.",
-        LANG_RU: "Не найден загружаемый пакет. Скачайте на странице релизов.",
-    },
-    "online_update_latest_confirm": {
-        LANG_ZH_CN: "当前已是最新版本（{cur}）。是否仍然重新安装？",
-        LANG_EN: "Already latest ({cur}). Reinstall anyway?",
-        LANG_ZH_TW: "目前已是最新版本（{cur}）。是否仍要重新安裝？",
-        LANG_JA: "既に最新（{cur}）。再インストールしますか？",
-        LANG_KO: "이미 최신({cur}). 그래도 재설치할까요?",
-        LANG_RU: "Уже последняя ({cur}). Переустановить?",
-    },
-    "btn_continue": {
-        LANG_ZH_CN: "继续",
-        LANG_EN: "Continue",
-        LANG_ZH_TW: "繼續",
-        LANG_JA: "続行",
-        LANG_KO: "계속",
-        LANG_RU: "Продолжить",
-    },
-    "online_update_checksum_failed": {
-        LANG_ZH_CN: "校验失败或无法获取校验文件：{err}",
-        LANG_EN: "Checksum failed or missing checksum file: {err}",
-        LANG_ZH_TW: "校驗失敗或無法取得校驗檔：{err}",
-        LANG_JA: "検証失敗または検証ファイル取得不可：{err}",
-        LANG_KO: "검증 실패 또는 체크섬 파일 없음: {err}",
-        LANG_RU: "Сбой проверки или нет файла контрольной суммы: {err}",
-    },
-    "online_update_zip_missing": {
-        LANG_ZH_CN: ".zip 内未找到 .app 文件。",
-        LANG_EN: "No .app found inside the zip.",
-        LANG_ZH_TW: ".zip 內未找到 .app 檔案。",
-        LANG_JA: "ZIP 内に .app が見つかりません。",
-        LANG_KO: "ZIP 안에 .app 파일이 없습니다.",
-        LANG_RU: "В ZIP не найдено .app.",
-    },
-    "online_update_download_done": {
-        LANG_ZH_CN: "下载完成",
-        LANG_EN: "Download Completed",
-        LANG_ZH_TW: "下載完成",
-        LANG_JA: "ダウンロード完了",
-        LANG_KO: "다운로드 완료",
-        LANG_RU: "Загрузка завершена",
-    },
-    "online_update_manual_replace": {
-        LANG_ZH_CN: "已在 Finder 打开，请手动替换应用。",
-        LANG_EN: "Opened in Finder. Replace the app manually.",
-        LANG_ZH_TW: "已在 Finder 開啟，請手動替換應用程式。",
-        LANG_JA: "Finder で開きました。手動で置き換えてください。",
-        LANG_KO: "Finder에서 열렸습니다. 앱을 수동으로 교체하세요.",
-        LANG_RU: "Открыто в Finder. Замените приложение вручную.",
-    },
-    "online_update_bundle_mismatch": {
-        LANG_ZH_CN: "包标识不一致：当前 {cur}，新包 {new}。已终止。",
-        LANG_EN: "Bundle ID mismatch: current {cur}, new {new}. Aborted.",
-        LANG_ZH_TW: "套件識別不一致：目前 {cur}，新包 {new}。已終止。",
-        LANG_JA: "バンドルID不一致：現在 {cur}、新 {new}。中止。",
-        LANG_KO: "번들 ID 불일치: 현재 {cur}, 새 {new}. 중단.",
-        LANG_RU: "Несовпадение Bundle ID: текущий {cur}, новый {new}. Операция прервана.",
-    },
-    "online_update_codesign_failed": {
-        LANG_ZH_CN: "签名校验失败（TeamIdentifier/CodeSign 不匹配）。已终止。",
-        LANG_EN: "Code signature verification failed (TeamIdentifier/CodeSign). Aborted.",
-        LANG_ZH_TW: "簽名驗證失敗（TeamIdentifier/CodeSign 不匹配）。已終止。",
-        LANG_JA: "署名検証に失敗（TeamIdentifier/CodeSign 不一致）。中止。",
-        LANG_KO: "서명 검증 실패(TeamIdentifier/CodeSign). 중단.",
-        LANG_RU: "Сбой проверки подписи (TeamIdentifier/CodeSign). Операция прервана.",
-    },
-    "online_update_unverified_prompt": {
-        LANG_ZH_CN: "签名未通过或未公证，可能不安全。是否继续安装？",
-        LANG_EN: "Signature unverifed or not notarized. Continue anyway?",
-        LANG_ZH_TW: "簽名未通過或未公證，可能不安全。是否繼續安裝？",
-        LANG_JA: "署名未検証または未ノータライズ。続行しますか？",
-        LANG_KO: "서명이 검증되지 않았거나 공증되지 않았습니다. 계속하시겠습니까?",
-        LANG_RU: "Подпись не проверена или нет нотариата. Продолжить?",
-    },
-    "online_update_replace_now": {
-        LANG_ZH_CN: "更新包已下载，是否立即替换并重启？",
-        LANG_EN: "Package downloaded. Replace and restart now?",
-        LANG_ZH_TW: "更新包已下載，是否立即替換並重新啟動？",
-        LANG_JA: "パッケージをダウンロードしました。今すぐ置換して再起動しますか？",
-        LANG_KO: "패키지 다운로드 완료. 지금 교체 후 재시작할까요?",
-        LANG_RU: "Пакет скачан. Заменить и перезапустить сейчас?",
-    },
-    "btn_replace_and_restart": {
-        LANG_ZH_CN: "替换并重启",
-        LANG_EN: "Replace & Restart",
-        LANG_ZH_TW: "替換並重新啟動",
-        LANG_JA: "置換して再起動",
-        LANG_KO: "교체 및 재시작",
-        LANG_RU: "Заменить и перезапустить",
-    },
-    "btn_later": {
-        LANG_ZH_CN: "稍后",
-        LANG_EN: "Later",
-        LANG_ZH_TW: "稍後",
-        LANG_JA: "後で",
-        LANG_KO: "나중에",
-        LANG_RU: "Позже",
-    },
-    "online_update_failed": {
-        LANG_ZH_CN: "在线更新失败",
-        LANG_EN: "Online Update Failed",
-        LANG_ZH_TW: "線上更新失敗",
-        LANG_JA: "オンライン更新に失敗",
-        LANG_KO: "온라인 업데이트 실패",
-        LANG_RU: "Сбой онлайн-обновления",
-    },
-
-    # 错误
-    "error_no_token": {
-        LANG_ZH_CN: "未设置 Token，请通过“设置 Token...”配置",
-        LANG_EN: "Token not set. Use 'Set Token...'",
-        LANG_ZH_TW: "未設定 Token，請透過「設定 Token...」配置",
-        LANG_JA: "トークン未設定。『トークンを設定...』から設定",
-        LANG_KO: "토큰이 설정되지 않았습니다. '토큰 설정...' 사용",
-        LANG_RU: "Токен не задан. Используйте 'Указать токен...'",
-    },
-    "error_http": {
-        LANG_ZH_CN: "调用失败: HTTP {code}",
-        LANG_EN: "Request failed: HTTP {code}",
-        LANG_ZH_TW: "調用失敗: HTTP {code}",
-        LANG_JA: "リクエスト失敗: HTTP {code}",
-        LANG_KO: "요청 실패: HTTP {code}",
-        LANG_RU: "Ошибка запроса: HTTP {code}",
-    },
-
-    # _fmt_remaining
-    "rem_expired": {
-        LANG_ZH_CN: "已过期",
-        LANG_EN: "expired",
-        LANG_ZH_TW: "已過期",
-        LANG_JA: "期限切れ",
-        LANG_KO: "만료됨",
-        LANG_RU: "истёк",
-    },
-    "rem_days_hours": {
-        LANG_ZH_CN: "剩余{days}天{hours}小时",
-        LANG_EN: "{days}d {hours}h left",
-        LANG_ZH_TW: "剩餘{days}天{hours}小時",
-        LANG_JA: "残り{days}日{hours}時間",
-        LANG_KO: "{days}일 {hours}시간 남음",
-        LANG_RU: "ост. {days}д {hours}ч",
-    },
-    "rem_hours_minutes": {
-        LANG_ZH_CN: "剩余{hours}小时{minutes}分钟",
-        LANG_EN: "{hours}h {minutes}m left",
-        LANG_ZH_TW: "剩餘{hours}小時{minutes}分鐘",
-        LANG_JA: "残り{hours}時間{minutes}分",
-        LANG_KO: "{hours}시간 {minutes}분 남음",
-        LANG_RU: "ост. {hours}ч {minutes}м",
-    },
-    "rem_minutes": {
-        LANG_ZH_CN: "剩余{minutes}分钟",
-        LANG_EN: "{minutes}m left",
-        LANG_ZH_TW: "剩餘{minutes}分鐘",
-        LANG_JA: "残り{minutes}分",
-        LANG_KO: "{minutes}분 남음",
-        LANG_RU: "ост. {minutes}м",
-    },
-}
-
-
-def _t(key: str, **kwargs) -> str:
-    # 防御：若打包的旧版本缺失 I18N，避免 NameError
-    lang = _current_language
-    table = globals().get('I18N', {}).get(key, {})
-    text = table.get(lang) or table.get(LANG_ZH_CN)
-    if not text:
-        text = _fallback_text(key)
-    if not text:
-        text = key
-    try:
-        return text.format(**kwargs)
-    except Exception:
-        return text
-
-
-def _fallback_text(key: str) -> Optional[str]:
-    """在缺少 I18N 表时提供最小中文兜底，避免界面显示 key 名。"""
-    zh = {
-        # 顶部信息
-        "status_uninitialized": "状态：未初始化",
-        "daily_placeholder": "每日：-/- (剩余 -)",
-        "requests_placeholder": "调用次数：-",
-        "usage_span_placeholder": "7日日均：-",
-        "monthly_placeholder": "本周期：-/- (剩余 -)",
-        "cycle_placeholder": "周期：-",
-        "renew_placeholder": "续费提醒：-",
-        "balance_placeholder": "余额：-",
-        "last_update_placeholder": "上次更新：-",
-        "token_placeholder": "Token：-",
-        "version_prefix": "版本：",
-        "status_ok": "状态：正常",
-        "status_no_data": "状态：无数据",
-        "title_no_data": "无数据",
-        "title_error": "错误",
-
-        # 菜单
-        "menu_refresh": "刷新",
-        "menu_account": "账号类型",
-        "menu_title_format": "标题格式",
-        "menu_language": "语言",
-        "menu_set_token": "设置 Token...",
-        "menu_toggle_hidden": "隐藏/展示",
-        "menu_open_dashboard": "打开控制台",
-        "menu_latency_monitor": "延迟监控",
-        "menu_check_update": "检查更新",
-        "menu_ring": "进度圆环",
-        "menu_affiliates": "推广",
-        "menu_quit": "退出",
-
-        # 子菜单项
-        "account_shared": "共享（公交车）",
-        "account_private": "滴滴车（私有）",
-        "account_codex": "Codex 公交车",
-        "titlefmt_percent": "百分比",
-        "titlefmt_custom": "自定义...",
-        "titlefmt_show_requests": "显示调用次数",
-        "ring_enable": "在图标显示进度圆环",
-        "ring_source": "圆环来源",
-        "ring_source_daily": "每日进度",
-        "ring_source_monthly": "周期进度",
-        "ring_colored": "使用彩色圆环",
-        "ring_reverse": "反转模式（高亮未使用）",
-        "ring_text_enable": "在圆环内显示百分比",
-        "ring_text_show_percent": "文本显示百分号",
-        "ring_text_show_label": "文本显示来源标签 (D/M)",
-        "ring_color_mode": "圆环颜色",
-        "ring_color_colorful": "彩色",
-        "ring_color_green": "绿色",
-        "ring_color_blue": "蓝色",
-        "ring_color_gradient": "渐变彩色",
-
-        # 顶部动态模板与前缀
-        "last_update_prefix": "上次更新：{time}",
-        "requests_prefix": "调用次数：{val}",
-        "usage_span_prefix": "7日日均：{val}",
-        "balance_prefix": "余额：{val}",
-        "daily_full": "每日：{spent}/{limit} (剩余 {remain})",
-        "daily_no_limit": "每日：{spent}/- (剩余 -)",
-        "monthly_full": "本周期：{spent}/{limit} (剩余 {remain})",
-        "monthly_no_limit": "本周期：{spent}/- (剩余 -)",
-        "cycle_expired": "周期：{start}-{end}（已到期）",
-        "cycle_remaining": "周期：{start}-{end}（剩余{days}天）",
-        "renew_expired": "⚠️ 已到期，请尽快续费",
-        "renew_soon": "⚠️ 即将到期（剩余{days}天），建议提前续费",
-        "renew_prefix": "续费提醒：{text}",
-        "title_req_label": "调用",
-
-        # 错误与 Token 提示
-        "status_error_prefix": "状态：错误 - {err}",
-        "token_expired_label": "Token：已过期（{date}）",
-        "token_valid_until": "Token：{date}（{remain}）",
-        "notify_token_expired_subtitle": "Token 已过期",
-        "notify_token_expired_message": "请在“设置 Token...”中更换 JWT",
-        "error_no_token": "未设置 Token，请通过“设置 Token...”配置",
-        "error_http": "调用失败: HTTP {code}",
-        # 颜色预设无需手动输入
-
-        # 剩余时间
-        "rem_expired": "已过期",
-        "rem_days_hours": "剩余{days}天{hours}小时",
-        "rem_hours_minutes": "剩余{hours}小时{minutes}分钟",
-        "rem_minutes": "剩余{minutes}分钟",
-    }
-    return zh.get(key)
-
-
-def _format_error(err: Exception | str) -> str:
-    if isinstance(err, LocalizedError):
-        return err.message()
-    if isinstance(err, Exception):
-        return str(err)
-    return str(err)
+try:
+    from PyObjCTools import AppHelper
+except Exception:
+    AppHelper = None
 
 
 def _alert_buttons(title: str, message: str, buttons: list[str]) -> int:
@@ -1082,188 +97,196 @@ def _alert_buttons(title: str, message: str, buttons: list[str]) -> int:
         return 0
 
 
-# ---------------------------
-# 配置与常量
-# ---------------------------
-
-CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".packycode")
-CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
-DEFAULT_UPDATE_REPO = "jacksonon/packycode-macos-statusbar"
-
-DEFAULT_CONFIG = {
-    "account_version": "shared",  # shared | private | codex_shared
-    "token": "",
-    "hidden": False,
-    "poll_interval": 180,  # seconds
-    # 标题显示模式：percent | custom
-    "title_mode": "percent",
-    "title_include_requests": False,
-    # 自定义模板占位符：{d_pct} {m_pct} {d_spent} {d_limit} {m_spent} {m_limit} {bal} {d_req}
-    "title_custom": "D {d_pct}% | M {m_pct}%",
-    # 状态栏进度圆环
-    "ring_enabled": False,
-    # daily | monthly
-    "ring_source": "daily",
-    # 是否使用彩色圆环（默认系统单色模板）
-    "ring_colored": False,
-    # 反转模式：高亮未使用（默认高亮已使用）
-    "ring_reverse": False,
-    # 颜色模式：colorful | green | blue | gradient
-    "ring_color_mode": "colorful",
-    # 在圆环内显示百分比文字
-    "ring_text_enabled": False,
-    # 文本是否显示百分号
-    "ring_text_percent_sign": True,
-    # 文本是否显示来源标签（D/M）
-    "ring_text_show_label": False,
-    # 圆环文字内容：percent | calls | spent
-    "ring_text_mode": "percent",
-    # 期望的 Apple TeamIdentifier（可选，用于强校验签名）
-    "update_expected_team_id": "",
-    # 界面语言
-    "language": LANG_ZH_CN,
-}
-
-# 参考 packycode-cost/api/config.ts
-ACCOUNT_ENV = {
-    "shared": {
-        "base": "https://www.packycode.com",
-        "dashboard": "https://www.packycode.com/dashboard",
-        "pricing": "https://www.packycode.com/pricing",
-    },
-    "private": {
-        "base": "https://share.packycode.com",
-        "dashboard": "https://share.packycode.com/dashboard",
-        "pricing": "https://share.packycode.com/pricing",
-    },
-    "codex_shared": {
-        "base": "https://codex.packycode.com",
-        "dashboard": "https://codex.packycode.com/dashboard",
-        "pricing": "https://codex.packycode.com/pricing",
-    },
-}
-
-USER_INFO_PATH = "/api/backend/users/info"
-USAGE_STATS_PATH_TMPL = "/api/backend/users/{user_id}/usage-stats?days=7"
-SUBSCRIPTIONS_PATH = "/api/backend/subscriptions?page=1&per_page=5"
-
 # 候选图标
-def _resource_path_candidate(filename: str) -> Optional[str]:
-    rp = os.environ.get("RESOURCEPATH")
-    if rp:
-        p = os.path.join(rp, filename)
-        if os.path.exists(p):
-            return p
-    return None
-
-
 ICON_CANDIDATES = list(filter(None, [
     _resource_path_candidate("icon.png"),  # 优先使用打包在 .app Resources 的图标
     os.path.join(os.path.dirname(__file__), "assets", "icon.png"),  # 仓库内置图标
 ]))
 
+# 圆环图标边长（点）、渲染倍率与内存缓存上限；绘制逻辑变化时递增 RING_ATLAS_VERSION 使磁盘图集失效
+RING_ICON_SIZE = 20
+RING_SCALES = (1, 2, 3)
+RING_IMAGE_CACHE_MAX = 256
+RING_ATLAS_VERSION = 2
+# 圆环图标以 NSImage 直接设置时 rumps 的 _icon 标记（不对应任何文件）
+RING_ICON_MARKER = "packycode:ring-icon"
 
-# ---------------------------
-# 工具函数
-# ---------------------------
+# 菜单操作读取发布缓存后，缓存早于该秒数时在后台重新验证
+UPDATE_RECHECK_MIN = 300
+# 后台发布检查的唤醒间隔（秒）：仅比较缓存时间，到期才发请求
+UPDATE_CHECK_TICK = 120
 
 
-def ensure_config_dir() -> None:
-    if not os.path.exists(CONFIG_DIR):
-        os.makedirs(CONFIG_DIR, exist_ok=True)
+def call_on_main_thread(fn: Callable[..., Any], *args: Any) -> None:
+    """将回调投递到 AppKit 主线程执行；无 PyObjC 环境时直接调用。"""
+    if AppHelper is not None:
+        try:
+            AppHelper.callAfter(fn, *args)
+            return
+        except Exception:
+            pass
+    fn(*args)
 
 
-def load_config() -> Dict[str, Any]:
-    ensure_config_dir()
-    if not os.path.exists(CONFIG_FILE):
-        return DEFAULT_CONFIG.copy()
-    try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        # 合并默认值
-        merged = DEFAULT_CONFIG.copy()
-        merged.update({k: v for k, v in data.items() if k in DEFAULT_CONFIG})
-        return merged
-    except Exception:
-        return DEFAULT_CONFIG.copy()
+def open_url(url: str) -> None:
+    import webbrowser
 
+    webbrowser.open(url)
 
-def save_config(cfg: Dict[str, Any]) -> None:
-    ensure_config_dir()
-    safe_cfg = DEFAULT_CONFIG.copy()
-    safe_cfg.update({k: v for k, v in cfg.items() if k in DEFAULT_CONFIG})
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(safe_cfg, f, ensure_ascii=False, indent=2)
 
+class MenuRenderer:
+    """菜单/状态栏文本的差量写入层。
 
-def parse_float(value: Any) -> float:
-    try:
-        return float(value)
-    except Exception:
-        return 0.0
+    每次 MenuItem.title 赋值都会跨越 PyObjC 桥并可能触发菜单重新布局；
+    这里按对象记住上次写入的标题与隐藏状态，相同则跳过，并统计写入/跳过次数。
+    所有信息行与状态栏标题都必须经由本类写入，否则缓存会与界面不一致。
+    """
 
+    def __init__(self):
+        self._titles: Dict[int, str] = {}
+        self._hidden: Dict[int, bool] = {}
+        self.writes = 0
+        self.skipped = 0
+
+    def set_title(self, item: Any, text: str) -> bool:
+        """写入 item.title（MenuItem 或 rumps.App）；未变化时跳过并返回 False。"""
+        key = id(item)
+        if self._titles.get(key) == text:
+            self.skipped += 1
+            return False
+        item.title = text
+        self._titles[key] = text
+        self.writes += 1
+        return True
 
-def round_half_up(value: float) -> int:
-    if value >= 0:
-        return int(math.floor(value + 0.5))
-    return int(math.ceil(value - 0.5))
+    def set_hidden(self, item: rumps.MenuItem, hidden: bool) -> bool:
+        """隐藏/显示菜单项（不重建菜单）；未变化时跳过并返回 False。"""
+        key = id(item)
+        if self._hidden.get(key) == hidden:
+            self.skipped += 1
+            return False
+        toggle = getattr(item, "hide" if hidden else "show", None)
+        if toggle is not None:
+            toggle()
+        else:
+            item._menuitem.setHidden_(hidden)
+        self._hidden[key] = hidden
+        self.writes += 1
+        return True
 
+    def is_hidden(self, item: rumps.MenuItem) -> bool:
+        return self._hidden.get(id(item), False)
 
-def fmt_money(value: Optional[float]) -> str:
-    if value is None:
-        return "-"
-    try:
-        return f"${value:.2f}"
-    except Exception:
-        return str(value)
+    def forget(self, item: Any) -> None:
+        """丢弃已移除菜单项的缓存（对象 id 可能被新对象复用）。"""
+        self._titles.pop(id(item), None)
+        self._hidden.pop(id(item), None)
 
+    def stats(self) -> Dict[str, int]:
+        return {"writes": self.writes, "skipped": self.skipped}
 
-def now_str() -> str:
-    return datetime.datetime.now().strftime("%H:%M:%S")
 
+class AccountSection:
+    """附加账号的菜单分组：标题行为账号摘要，子菜单为该账号的用量明细。"""
 
-def get_app_version() -> str:
-    # 1) 打包环境：从 Info.plist 读取 CFBundleShortVersionString/CFBundleVersion
-    try:
-        rp = os.environ.get("RESOURCEPATH")
-        if rp:
-            plist_path = os.path.join(os.path.dirname(rp), "Info.plist")
-            if os.path.exists(plist_path):
-                with open(plist_path, "rb") as f:
-                    pl = plistlib.load(f)
-                v = pl.get("CFBundleShortVersionString") or pl.get("CFBundleVersion")
-                if isinstance(v, (str, int, float)):
-                    return str(v)
-    except Exception:
-        pass
-    # 2) 源码环境：从 VERSION 文件读取
-    try:
-        vf = os.path.join(os.path.dirname(__file__), "VERSION")
-        if os.path.exists(vf):
-            with open(vf, "r", encoding="utf-8") as f:
-                return f.read().strip()
-    except Exception:
-        pass
-    # 3) 兜底：尝试从 setup.py 正则提取
-    try:
-        sp = os.path.join(os.path.dirname(__file__), "setup.py")
-        if os.path.exists(sp):
-            with open(sp, "r", encoding="utf-8") as f:
-                s = f.read()
-            m = re.search(r"version\s*=\s*['\"]([^'\"]+)['\"]", s)
-            if m:
-                return m.group(1)
-    except Exception:
-        pass
-    return "0.0.0"
+    ROWS = ("status", "daily", "requests", "monthly", "cycle", "balance", "token", "last")
+    PLACEHOLDERS = {
+        "status": "status_uninitialized",
+        "daily": "daily_placeholder",
+        "requests": "requests_placeholder",
+        "monthly": "monthly_placeholder",
+        "cycle": "cycle_placeholder",
+        "balance": "balance_placeholder",
+        "token": "token_placeholder",
+        "last": "last_update_placeholder",
+    }
+
+    def __init__(self, name: str, on_dashboard: Callable[[str], None]):
+        self.name = name
+        self.header = rumps.MenuItem(name)
+        self.rows: Dict[str, rumps.MenuItem] = {}
+        for key in self.ROWS:
+            item = rumps.MenuItem(_t(self.PLACEHOLDERS[key]))
+            item.set_callback(None)
+            self.rows[key] = item
+        self._on_dashboard = on_dashboard
+
+    def build(self) -> rumps.MenuItem:
+        """（重新）组装子菜单；“打开控制台”每次新建，避免跨菜单复用。"""
+        try:
+            self.header.clear()
+        except Exception:
+            pass
+        self.header.update([
+            *(self.rows[key] for key in self.ROWS),
+            None,
+            rumps.MenuItem(_t("menu_open_dashboard"), callback=lambda _=None: self._on_dashboard(self.name)),
+        ])
+        return self.header
+
+    def items(self) -> list:
+        return [self.header, *self.rows.values()]
+
+
+class StartupProfiler:
+    """启动阶段计时（PACKYCODE_PROFILE_STARTUP=1 启用）。
+
+    依次记录 imports / config_load / menu_build / first_render / first_fetch，
+    首次拉取完成后输出到 stderr 与 ~/.packycode/startup_profile.json。
+    设置 PACKYCODE_STARTUP_BUDGET_MS 时作为启动基准：输出后退出，
+    首帧耗时（imports 至 first_render）超出预算则退出码为 1。
+    """
+
+    PHASES = ("imports", "config_load", "menu_build", "first_render", "first_fetch")
 
+    def __init__(self, t0: float):
+        budget = os.environ.get("PACKYCODE_STARTUP_BUDGET_MS", "").strip()
+        self.budget_ms: Optional[float] = float(budget) if budget else None
+        self.enabled = self.budget_ms is not None or os.environ.get("PACKYCODE_PROFILE_STARTUP") == "1"
+        self.phases: Dict[str, float] = {}
+        self._last = t0
+        # 报告只输出一次；之后每次刷新调用 mark/finish 均不做任何事
+        self._finished = False
+
+    def mark(self, phase: str) -> None:
+        if not self.enabled or self._finished or phase in self.phases:
+            return
+        now = time.perf_counter()
+        self.phases[phase] = (now - self._last) * 1000.0
+        self._last = now
+
+    def first_title_ms(self) -> float:
+        return sum(self.phases.get(p, 0.0) for p in self.PHASES[:4])
+
+    def finish(self, extra: Optional[Dict[str, Any]] = None) -> None:
+        """首次拉取完成后调用：输出报告；启动基准模式下按预算退出。"""
+        if not self.enabled or self._finished or "first_fetch" not in self.phases:
+            return
+        self._finished = True
+        report = {
+            "phases_ms": {p: round(self.phases[p], 2) for p in self.PHASES if p in self.phases},
+            "first_title_ms": round(self.first_title_ms(), 2),
+            "budget_ms": self.budget_ms,
+        }
+        report.update(extra or {})
+        for p, ms in report["phases_ms"].items():
+            print(f"[startup] {p}: {ms:.1f} ms", file=sys.stderr)
+        print(f"[startup] first title: {report['first_title_ms']:.1f} ms", file=sys.stderr)
+        try:
+            ensure_config_dir()
+            with open(os.path.join(CONFIG_DIR, "startup_profile.json"), "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        except Exception:
+            pass
+        if self.budget_ms is not None:
+            over = self.first_title_ms() > self.budget_ms
+            if over:
+                print(f"[startup] over budget ({self.budget_ms:.0f} ms)", file=sys.stderr)
+            sys.stderr.flush()
+            os._exit(1 if over else 0)
 
-def _sha256_file(path: str) -> str:
-    h = hashlib.sha256()
-    with open(path, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b''):
-            h.update(chunk)
-    return h.hexdigest()
+
+STARTUP = StartupProfiler(_STARTUP_T0)
 
 
 def find_icon() -> Optional[str]:
@@ -1281,11 +304,24 @@ def find_icon() -> Optional[str]:
 
 
 class PackycodeStatusApp(rumps.App):
+    # 外部修改配置时按键分组增量生效
+    TITLE_KEYS = frozenset(["hidden", "title_mode", "title_custom", "title_include_requests", "accounts_title"])
+    RING_KEYS = frozenset([
+        "ring_enabled", "ring_source", "ring_colored", "ring_reverse", "ring_color_mode",
+        "ring_text_enabled", "ring_text_percent_sign", "ring_text_show_label", "ring_text_mode",
+    ])
+    POLL_KEYS = frozenset(["poll_interval", "adaptive_polling", "poll_interval_min", "poll_interval_max"])
+    TTL_KEYS = frozenset(["ttl_user_info", "ttl_usage_stats", "ttl_subscriptions"])
+
     def __init__(self):
+        STARTUP.mark("imports")
         icon = find_icon()
         super().__init__("PackyCode", icon=icon, title="")
 
         self._cfg = load_config()
+        # 配置写回队列：菜单连续切换时合并为一次原子写入
+        self._config_store = ConfigStore()
+        STARTUP.mark("config_load")
         # 应用语言设置
         set_current_language(self._cfg.get("language", LANG_ZH_CN))
         # 使用自定义的本地化“退出”按钮（避免默认 Quit 文案不可本地化）
@@ -1294,19 +330,41 @@ class PackycodeStatusApp(rumps.App):
         except Exception:
             pass
         self._lock = threading.RLock()
-        self._last_data: Dict[str, Any] = {}
+        # 界面无关的拉取调度（所有账号共享 HTTP 客户端、并发池与限速器），见 packycode_core
+        self._accounts = AccountGroup(self._cfg)
+        # 附加账号：名称 -> 菜单分组 / 最近一次快照与解析结果（仅主线程访问）
+        self._account_sections: "OrderedDict[str, AccountSection]" = OrderedDict()
+        self._extra_snaps: Dict[str, FetchSnapshot] = {}
+        self._extra_usage: Dict[str, Optional[UsageSnapshot]] = {}
+        # 启动时恢复的缓存快照时间；首次实时刷新提交后清空
+        self._stale_since: Optional[float] = None
+        # 后台刷新状态：同一时刻仅一个刷新在途，期间的强制刷新合并为一次补刷
+        self._refresh_inflight = False
+        self._refresh_pending = False
+        self._last_snapshot: Optional[FetchSnapshot] = None
+        # 自适应轮询控制器
+        self._poll = AdaptivePollController(
+            base=self._cfg.get("poll_interval", DEFAULT_CONFIG["poll_interval"]),
+            min_interval=self._cfg.get("poll_interval_min", DEFAULT_CONFIG["poll_interval_min"]),
+            max_interval=self._cfg.get("poll_interval_max", DEFAULT_CONFIG["poll_interval_max"]),
+        )
+        # 本地用量历史（后台线程写入）
+        self._history = UsageHistoryStore()
+        # 最近一次成功刷新解析出的用量（标题、菜单与圆环共用）
+        self._usage: Optional[UsageSnapshot] = None
         self._last_error: Optional[Exception] = None
-        self._last_usage: Optional[Dict[str, Any]] = None
-        self._last_sub_period: Optional[Tuple[datetime.date, datetime.date]] = None
-        # 周期用量覆盖（若订阅接口提供当前周期用量/限额，则覆盖“每月”展示）
-        self._last_cycle_spent: Optional[float] = None
-        self._last_cycle_limit: Optional[float] = None
+        # 主账号的标题文本（多账号时与附加账号合成为状态栏标题）
+        self._primary_title = ""
         self._jwt_expired_notified: bool = False
+        # 差量渲染：跳过与上次相同的标题写入
+        self._render = MenuRenderer()
         self._base_icon_path: Optional[str] = icon
         self._ring_icon_path: Optional[str] = os.path.join(CONFIG_DIR, "ring_icon.png")
         self._last_ring_val: Optional[int] = None  # 0..100 整数缓存，避免频繁重绘
         # 圆环图标上次渲染状态签名（包含百分比、配色与文字内容等），用于决定是否需要重绘
         self._last_ring_key: Optional[str] = None
+        # 已渲染的圆环图标：签名 -> NSImage（LRU）
+        self._ring_images: "OrderedDict[str, Any]" = OrderedDict()
 
         # 信息区（只读）
         self.info_title = rumps.MenuItem(_t("status_uninitialized"))
@@ -1332,7 +390,6 @@ class PackycodeStatusApp(rumps.App):
 
         self.info_renew = rumps.MenuItem(_t("renew_placeholder"))
         self.info_renew.set_callback(None)
-        self._renew_shown = False
 
         self.info_balance = rumps.MenuItem(_t("balance_placeholder"))
         self.info_balance.set_callback(None)
@@ -1340,10 +397,22 @@ class PackycodeStatusApp(rumps.App):
         self.info_last = rumps.MenuItem(_t("last_update_placeholder"))
         self.info_last.set_callback(None)
 
+        # 当前轮询间隔（自适应轮询时随消费速度变化）
+        self.info_poll = rumps.MenuItem("")
+        self.info_poll.set_callback(None)
+
         # Token 到期信息
         self.info_token_exp = rumps.MenuItem(_t("token_placeholder"))
         self.info_token_exp.set_callback(None)
 
+        # 更新下载进度（仅下载期间显示）
+        self.info_update = rumps.MenuItem(_t("online_update"))
+        self.info_update.set_callback(None)
+        self._update_inflight = False
+        # 最新发布信息（本地缓存，后台定时以条件请求刷新）；首次使用时创建
+        self._releases: Optional["ReleaseChecker"] = None
+        self._release_check_inflight = False
+
         # 版本信息（底部显示）
         self._version = get_app_version()
         self.info_version = rumps.MenuItem(f"{_t('version_prefix')}{self._version}")
@@ -1376,8 +445,11 @@ class PackycodeStatusApp(rumps.App):
         self.item_lang_ko = rumps.MenuItem("한국어", callback=lambda _=None: self._set_language(LANG_KO))
         self.item_lang_ru = rumps.MenuItem("Русский", callback=lambda _=None: self._set_language(LANG_RU))
 
-        # 完整菜单
-        self._rebuild_menu(False)
+        # 完整菜单（续费提醒行默认隐藏，到期前再显示）
+        self._sync_account_sections()
+        self._rebuild_menu()
+        self._render.set_hidden(self.info_renew, True)
+        self._render.set_hidden(self.info_update, True)
 
         # 初始选中账号类型
         self._update_account_checkmarks()
@@ -1386,21 +458,32 @@ class PackycodeStatusApp(rumps.App):
         self._update_language_checkmarks()
         # 如果配置为隐藏，应用标题置空
         if self._cfg.get("hidden"):
-            self.title = ""
+            self._render.set_title(self, "")
 
-        # 定时刷新
-        self._timer = rumps.Timer(self._on_tick, interval=self._cfg.get("poll_interval", 180))
+        # 定时刷新（间隔由自适应控制器给出；关闭自适应时固定为 poll_interval）
+        self._timer = rumps.Timer(self._on_tick, interval=self._target_poll_interval())
         self._timer.start()
-
-        # 立即刷新一次，避免首次启动状态栏为空
+        # 配置文件外部修改检测（每次仅一次 stat）
+        self._config_timer: Optional[rumps.Timer] = None
+        self._start_config_watch()
+        # 后台检查新版本（间隔 update_check_interval，0 为关闭）
+        self._update_check_timer: Optional[rumps.Timer] = None
+        self._start_update_checker()
+
+        STARTUP.mark("menu_build")
+        # 先渲染上次保存的快照（标记为缓存），再在后台拉取最新数据
+        self._restore_last_snapshot()
+        STARTUP.mark("first_render")
         try:
             self._refresh(force=True)
         except Exception:
             pass
 
-    def _rebuild_menu(self, show_renew: bool):
+    def _rebuild_menu(self):
+        """完整重建菜单（仅在启动与切换语言时调用）；续费提醒行通过隐藏/显示切换。"""
         # 更新版本标签的语言前缀
-        self.info_version.title = f"{_t('version_prefix')}{self._version}"
+        self._render.set_title(self.info_version, f"{_t('version_prefix')}{self._version}")
+        self._update_poll_interval_label()
 
         items = [
             self.info_title,
@@ -1409,15 +492,20 @@ class PackycodeStatusApp(rumps.App):
             self.info_usage_span,
             self.info_monthly,
             self.info_cycle,
+            self.info_renew,
         ]
-        if show_renew:
-            items.append(self.info_renew)
         # 子菜单分组（每次重建时创建全新子项，避免跨菜单重复插入）
-
         items.extend([
             self.info_balance,
             self.info_token_exp,
             self.info_last,
+            self.info_poll,
+        ])
+        # 附加账号分组（每个账号一个子菜单）
+        if self._account_sections:
+            items.append(None)
+            items.extend(sec.build() for sec in self._account_sections.values())
+        items.extend([
             None,
             rumps.MenuItem(_t("menu_refresh"), callback=self.refresh_now),
             {_t("menu_account"): self._build_account_menu_items()},
@@ -1434,6 +522,7 @@ class PackycodeStatusApp(rumps.App):
             None,
             rumps.MenuItem(_t("menu_quit"), callback=self.quit_app),
             None,
+            self.info_update,
             self.info_version,
         ])
         # 先清空旧菜单，避免重复绑定 MenuItem
@@ -1442,7 +531,6 @@ class PackycodeStatusApp(rumps.App):
         except Exception:
             pass
         self.menu.update(items)
-        self._renew_shown = show_renew
         # 确保勾选状态与配置同步
         try:
             self._update_account_checkmarks()
@@ -1538,10 +626,10 @@ class PackycodeStatusApp(rumps.App):
     def _set_language(self, lang: str):
         with self._lock:
             self._cfg["language"] = lang
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             set_current_language(lang)
         # 重建菜单并按新语言更新文案
-        self._rebuild_menu(getattr(self, "_renew_shown", False))
+        self._rebuild_menu()
         self._update_account_checkmarks()
         self._update_title_format_checkmarks()
         self._update_language_checkmarks()
@@ -1553,19 +641,41 @@ class PackycodeStatusApp(rumps.App):
             if self._last_error is not None:
                 self._update_ui_error(self._last_error)
             else:
-                self._update_ui_from_info(
-                    self._last_data or None,
-                    self._last_usage,
-                    self._last_sub_period,
-                )
+                self._update_ui_from_info(self._usage)
+                if self._stale_since is not None and self._usage is not None:
+                    # 启动缓存：标注数据时间，等待实时刷新
+                    stamp = datetime.datetime.fromtimestamp(self._stale_since).strftime("%m-%d %H:%M")
+                    self._render.set_title(self.info_title, _t("status_stale", time=stamp))
+                    self._render.set_title(self.info_last, _t("last_update_prefix", time=stamp))
+            for name in self._account_sections:
+                self._apply_account_section(name)
         except Exception:
             pass
 
+    def _restore_last_snapshot(self) -> None:
+        """启动时在任何网络请求之前渲染上次成功的快照。"""
+        token = (self._cfg.get("token") or "").strip()
+        if not token:
+            return
+        snap = load_last_snapshot(self._cfg.get("account_version", "shared"), token)
+        if snap is None:
+            return
+        self._last_snapshot = snap
+        self._usage = UsageSnapshot.from_fetch(snap)
+        self._stale_since = snap.fetched_at
+        self._render_cached_state()
+
     # ------------- 菜单回调 -------------
     def refresh_now(self, _: Optional[rumps.MenuItem] = None):
         self._refresh(force=True)
 
     def quit_app(self, _: Optional[rumps.MenuItem] = None):
+        try:
+            self._config_store.flush()
+            self._accounts.close()
+            self._history.close()
+        except Exception:
+            pass
         try:
             rumps.quit_application()
         except Exception:
@@ -1575,9 +685,9 @@ class PackycodeStatusApp(rumps.App):
         with self._lock:
             hidden = not bool(self._cfg.get("hidden"))
             self._cfg["hidden"] = hidden
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             if hidden:
-                self.title = ""
+                self._render.set_title(self, "")
             else:
                 # 立即刷新一个周期，更新标题
                 self._refresh(force=True)
@@ -1595,9 +705,10 @@ class PackycodeStatusApp(rumps.App):
             token = (res.text or "").strip()
             with self._lock:
                 self._cfg["token"] = token
-                save_config(self._cfg)
+                self._config_store.save(self._cfg)
                 # 重置过期提醒
                 self._jwt_expired_notified = False
+            self._sync_accounts()
             self._refresh(force=True)
 
     def _set_shared(self, _: Optional[rumps.MenuItem] = None):
@@ -1612,22 +723,29 @@ class PackycodeStatusApp(rumps.App):
     def _set_account(self, account: str):
         with self._lock:
             self._cfg["account_version"] = account
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._update_account_checkmarks()
+        self._sync_accounts()
         self._refresh(force=True)
 
     def open_dashboard(self, _: Optional[rumps.MenuItem] = None):
-        base, dashboard = self._get_base_and_dashboard()
-        webbrowser.open(dashboard or base)
+        base, dashboard = get_base_and_dashboard(self._cfg)
+        open_url(dashboard or base)
+
+    def _open_account_dashboard(self, name: str) -> None:
+        pipe = self._accounts.extras.get(name)
+        if pipe is not None:
+            base, dashboard = get_base_and_dashboard(pipe.cfg)
+            open_url(dashboard or base)
 
     def open_latency_monitor(self, _: Optional[rumps.MenuItem] = None):
-        webbrowser.open("https://status.packyapi.com/")
+        open_url("https://status.packyapi.com/")
 
     def open_affiliate_packycode(self, _: Optional[rumps.MenuItem] = None):
-        webbrowser.open("https://www.packycode.com/?aff=prr4jxm7")
+        open_url("https://www.packycode.com/?aff=prr4jxm7")
 
     def open_affiliate_codex(self, _: Optional[rumps.MenuItem] = None):
-        webbrowser.open("https://codex.packycode.com/?aff=prr4jxm7")
+        open_url("https://codex.packycode.com/?aff=prr4jxm7")
 
     # ------------- 更新检测 -------------
     def _parse_version_tuple(self, v: str) -> Tuple[int, int, int]:
@@ -1648,96 +766,110 @@ class PackycodeStatusApp(rumps.App):
         return (ta > tb) - (ta < tb)
 
     def check_update_now(self, _: Optional[rumps.MenuItem] = None):
-        repo = DEFAULT_UPDATE_REPO
-        api = f"https://api.github.com/repos/{repo}/releases/latest"
-        try:
-            headers = {
-                "Accept": "application/vnd.github+json",
-                "User-Agent": "PackyCode-StatusBar/1.0",
-            }
-            resp = requests.get(api, headers=headers, timeout=10)
-            if resp.status_code >= 400:
-                raise RuntimeError(f"HTTP {resp.status_code}")
-            data = resp.json()
-            tag = (data.get("tag_name") or "").strip()
-            html_url = (data.get("html_url") or f"https://github.com/{repo}/releases").strip()
-            notes = (data.get("body") or "").strip()
-            if not tag:
-                raise RuntimeError("响应缺少 tag_name")
-
-            cmp = self._compare_versions(tag, self._version)
-            if cmp > 0:
-                # 构造更新信息（截断备注）
-                excerpt = notes
-                if len(excerpt) > 1000:
-                    excerpt = excerpt[:1000] + "\n..."
-                msg = _t("update_found_message", tag=tag, cur=self._version)
-                if excerpt:
-                    msg = msg + "\n\n" + _t("update_changelog_prefix", notes=excerpt)
-                # 仅提供“前往 / 取消”
-                choice = _alert_buttons(
-                    _t("update_found_title"),
-                    msg,
-                    [_t("btn_go"), _t("btn_cancel")],
-                )
-                if choice == 0:
-                    webbrowser.open(html_url)
-            else:
-                _alert_buttons(_t("update_check_title"), _t("update_latest_message"), [_t("btn_ok")])
-        except Exception as e:
-            _alert_buttons(_t("update_check_failed"), str(e), [_t("btn_ok")])
-
-    # ------------- 在线更新（下载并替换 .app） -------------
-    def _latest_release_asset(self, repo: str) -> Optional[Tuple[str, str, str, Optional[str]]]:
-        """返回 (tag, html_url, asset_zip_url, sha256_url|None)"""
-        api = f"https://api.github.com/repos/{repo}/releases/latest"
-        headers = {
-            "Accept": "application/vnd.github+json",
-            "User-Agent": "PackyCode-StatusBar/1.0",
-        }
-        resp = requests.get(api, headers=headers, timeout=10)
-        if resp.status_code >= 400:
-            return None
-        data = resp.json()
-        tag = (data.get("tag_name") or "").strip()
-        html_url = (data.get("html_url") or f"https://github.com/{repo}/releases").strip()
-        assets = data.get("assets") or []
-        if not tag or not isinstance(assets, list):
-            return None
-        cand = None
-        sha = None
-        for a in assets:
+        self._with_release(self._show_update_check, _t("update_check_failed"))
+
+    def _show_update_check(self, info: "ReleaseInfo") -> None:
+        if self._compare_versions(info.tag, self._version) > 0:
+            # 构造更新信息（截断备注）
+            excerpt = info.notes
+            if len(excerpt) > 1000:
+                excerpt = excerpt[:1000] + "\n..."
+            msg = _t("update_found_message", tag=info.tag, cur=self._version)
+            if excerpt:
+                msg = msg + "\n\n" + _t("update_changelog_prefix", notes=excerpt)
+            # 仅提供“前往 / 取消”
+            choice = _alert_buttons(
+                _t("update_found_title"),
+                msg,
+                [_t("btn_go"), _t("btn_cancel")],
+            )
+            if choice == 0:
+                open_url(info.html_url)
+        else:
+            _alert_buttons(_t("update_check_title"), _t("update_latest_message"), [_t("btn_ok")])
+
+    # ------------- 后台发布检查（ETag 条件请求，结果缓存在本地） -------------
+    def _release_checker(self) -> "ReleaseChecker":
+        if self._releases is None:
+            from packycode_update import ReleaseChecker
+
+            self._releases = ReleaseChecker(DEFAULT_UPDATE_REPO)
+        return self._releases
+
+    def _with_release(self, then: Callable[["ReleaseInfo"], None], failed_title: str) -> None:
+        """以缓存的最新发布信息立即调用 then；尚无缓存时在后台查询，完成后回到主线程再调用。"""
+        info = self._release_checker().latest
+        if info is not None:
+            then(info)
+            # 缓存较旧时顺带在后台重新验证（304 时几乎无开销），发现新版本会发通知
+            self._check_release_async(UPDATE_RECHECK_MIN)
+            return
+
+        def work() -> None:
             try:
-                name = (a.get("name") or "").lower()
-                url = a.get("browser_download_url")
-                if name.endswith(".zip") and ("mac" in name or "macos" in name or "osx" in name):
-                    cand = url
-                    break
+                fresh = self._release_checker().check()
+            except Exception as e:
+                call_on_main_thread(_alert_buttons, failed_title, str(e), [_t("btn_ok")])
+                return
+            call_on_main_thread(then, fresh)
+
+        threading.Thread(target=work, name="packycode-release-check", daemon=True).start()
+
+    def _update_check_interval(self) -> float:
+        return parse_float(self._cfg.get("update_check_interval", DEFAULT_CONFIG["update_check_interval"]))
+
+    def _start_update_checker(self) -> None:
+        if self._update_check_timer is not None:
+            try:
+                self._update_check_timer.stop()
             except Exception:
                 pass
-        if not cand:
-            for a in assets:
-                try:
-                    name = (a.get("name") or "").lower()
-                    url = a.get("browser_download_url")
-                    if name.endswith(".zip"):
-                        cand = url
-                        break
-                except Exception:
-                    pass
-        # 寻找 sha256 文件
-        for a in assets:
+            self._update_check_timer = None
+        interval = self._update_check_interval()
+        if interval > 0:
+            # 定时器只负责唤醒，是否到期按缓存中的上次检查时间判断（跨重启有效）；
+            # 首次检查在第一次唤醒时进行，更新模块不进入冷启动路径
+            tick = max(60, int(min(interval, UPDATE_CHECK_TICK)))
+            self._update_check_timer = rumps.Timer(self._on_update_check_tick, interval=tick)
+            self._update_check_timer.start()
+
+    def _on_update_check_tick(self, _timer: rumps.Timer):
+        interval = self._update_check_interval()
+        if interval > 0:
+            self._check_release_async(interval)
+
+    def _check_release_async(self, max_age: float) -> None:
+        """缓存超过 max_age 秒时在后台线程查询一次；失败静默，等待下次定时。"""
+        if self._release_check_inflight or not self._release_checker().is_due(max_age):
+            return
+        self._release_check_inflight = True
+
+        def work() -> None:
+            info = None
             try:
-                name = (a.get("name") or "").lower()
-                url = a.get("browser_download_url")
-                if name.endswith(".sha256") or name.endswith(".sha256sum") or name.endswith("sha256.txt"):
-                    sha = url
-                    break
+                info = self._release_checker().check(max_age)
             except Exception:
                 pass
-        if not cand:
-            return None
-        return (tag, html_url, cand, sha)
+            call_on_main_thread(self._on_release_checked, info)
+
+        threading.Thread(target=work, name="packycode-release-check", daemon=True).start()
+
+    def _on_release_checked(self, info: Optional["ReleaseInfo"]) -> None:
+        self._release_check_inflight = False
+        if info is None or self._compare_versions(info.tag, self._version) <= 0:
+            return
+        # 每个新版本只通知一次（跨重启）
+        if self._release_checker().notified_tag == info.tag:
+            return
+        self._release_checker().mark_notified(info.tag)
+        try:
+            rumps.notification(
+                title=_t("update_found_title"),
+                subtitle=info.tag,
+                message=_t("update_found_message", tag=info.tag, cur=self._version),
+            )
+        except Exception:
+            pass
 
     def _current_app_bundle(self) -> Optional[str]:
         rp = os.environ.get("RESOURCEPATH")
@@ -1749,71 +881,104 @@ class PackycodeStatusApp(rumps.App):
         return None
 
     def update_online_now(self, _: Optional[rumps.MenuItem] = None):
-        repo = DEFAULT_UPDATE_REPO
-        try:
-            latest = self._latest_release_asset(repo)
-            if not latest:
-                _alert_buttons(_t("online_update"), _t("online_update_not_found"), [_t("btn_ok")])
+        if self._update_inflight:
+            _alert_buttons(_t("online_update"), _t("online_update_busy"), [_t("btn_ok")])
+            return
+        self._with_release(self._confirm_online_update, _t("online_update_failed"))
+
+    def _confirm_online_update(self, info: "ReleaseInfo") -> None:
+        if self._update_inflight:
+            return
+        if not info.zip_url:
+            _alert_buttons(_t("online_update"), _t("online_update_not_found"), [_t("btn_ok")])
+            return
+        if self._compare_versions(info.tag, self._version) <= 0:
+            choice = _alert_buttons(
+                _t("online_update"),
+                _t("online_update_latest_confirm", cur=self._version),
+                [_t("btn_continue"), _t("btn_cancel")],
+            )
+            if choice != 0:
                 return
-            tag, html_url, download_url, sha_url = latest
-            cmp = self._compare_versions(tag, self._version)
-            if cmp <= 0:
-                choice = _alert_buttons(
-                    _t("online_update"),
-                    _t("online_update_latest_confirm", cur=self._version),
-                    [_t("btn_continue"), _t("btn_cancel")],
-                )
-                if choice != 0:
-                    return
-            tmp_dir = tempfile.mkdtemp(prefix="packycode-update-")
-            zip_path = os.path.join(tmp_dir, "update.zip")
-            with requests.get(download_url, stream=True, timeout=30) as r:
-                if r.status_code >= 400:
-                    raise RuntimeError(_t("error_http", code=r.status_code))
-                with open(zip_path, "wb") as f:
-                    for chunk in r.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-            # SHA256 校验（若提供校验文件）
+        # 下载、解压与签名检查在后台线程进行，进度显示在菜单中
+        self._update_inflight = True
+        self._set_update_progress(0, None)
+        t = threading.Thread(
+            target=self._update_worker,
+            args=(info.tag, info.zip_url, info.sha256_url, info.manifest_url),
+            name="packycode-update",
+            daemon=True,
+        )
+        t.start()
+
+    def _update_worker(self, tag: str, download_url: str, sha_url: Optional[str], manifest_url: Optional[str]) -> None:
+        """后台线程：优先按清单增量组装新版本，否则下载完整更新包（可续传、分段并行、边下载边校验 SHA256）
+        并解压；随后做签名检查。
+
+        不触碰界面对象；结果与提示经 call_on_main_thread 回到主线程。
+        """
+        import plistlib
+        import subprocess
+        import tempfile
+        import zipfile
+
+        from packycode_update import UPDATE_CACHE_DIR, ChecksumMismatch, download, fetch_expected_sha256, prune_downloads
+
+        def fail(message: str, title: Optional[str] = None) -> None:
+            call_on_main_thread(self._update_finished, title or _t("online_update"), message)
+
+        try:
+            # 先取校验值：下载完成时即得到校验结果，无需再读一遍文件
+            expected = None
             if sha_url:
                 try:
-                    resp = requests.get(sha_url, timeout=10)
-                    if resp.status_code < 400:
-                        text = resp.text.strip()
-                        # 提取 64 位 hex
-                        m = re.search(r"([a-fA-F0-9]{64})", text)
-                        if m:
-                            expected = m.group(1).lower()
-                            actual = _sha256_file(zip_path)
-                            if expected != actual:
-                                raise RuntimeError("校验失败：SHA256 不匹配")
+                    expected = fetch_expected_sha256(sha_url)
                 except Exception as e:
-                    _alert_buttons(_t("online_update"), _t("online_update_checksum_failed", err=str(e)), [_t("btn_ok")])
+                    fail(_t("online_update_checksum_failed", err=str(e)))
                     return
-            extract_dir = os.path.join(tmp_dir, "unzipped")
-            os.makedirs(extract_dir, exist_ok=True)
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                zf.extractall(extract_dir)
+            os.makedirs(UPDATE_CACHE_DIR, exist_ok=True)
+            # 同一版本的下载中断后再次更新时续传
+            zip_path = os.path.join(UPDATE_CACHE_DIR, f"PackyCode-{re.sub(r'[^0-9A-Za-z._-]', '_', tag)}.zip")
+            prune_downloads(zip_path)
+            segments = int(self._cfg.get("update_download_segments", DEFAULT_CONFIG["update_download_segments"]))
+            target_app = self._current_app_bundle()
+            tmp_dir = tempfile.mkdtemp(prefix="packycode-update-")
             new_app = None
-            for root, dirs, files in os.walk(extract_dir):
-                for d in dirs:
-                    if d.endswith('.app'):
-                        new_app = os.path.join(root, d)
+            extract_dir = ""
+            if target_app and manifest_url and self._cfg.get("update_delta", DEFAULT_CONFIG["update_delta"]):
+                # 增量更新：只取回与已安装版本不同的文件；不可用或校验失败时回退到完整下载
+                extract_dir = zip_path + ".staged"
+                new_app = self._apply_delta_update(manifest_url, download_url, expected, target_app, extract_dir, segments)
+            if new_app is None:
+                try:
+                    download(
+                        download_url,
+                        zip_path,
+                        expected_sha256=expected,
+                        segments=segments,
+                        progress=lambda done, total: call_on_main_thread(self._set_update_progress, done, total),
+                    )
+                except ChecksumMismatch as e:
+                    fail(_t("online_update_checksum_failed", err=str(e)))
+                    return
+                extract_dir = os.path.join(tmp_dir, "unzipped")
+                os.makedirs(extract_dir, exist_ok=True)
+                with zipfile.ZipFile(zip_path, 'r') as zf:
+                    zf.extractall(extract_dir)
+                for root, dirs, files in os.walk(extract_dir):
+                    for d in dirs:
+                        if d.endswith('.app'):
+                            new_app = os.path.join(root, d)
+                            break
+                    if new_app:
                         break
-                if new_app:
-                    break
             if not new_app:
-                _alert_buttons(_t("online_update"), _t("online_update_zip_missing"), [_t("btn_ok")])
+                fail(_t("online_update_zip_missing"))
                 return
 
-            target_app = self._current_app_bundle()
             if not target_app:
                 # 源码运行，打开解压目录供手动替换
-                try:
-                    rumps.notification(title=_t("online_update"), subtitle=_t("online_update_download_done"), message=_t("online_update_manual_replace"))
-                except Exception:
-                    pass
-                subprocess.Popen(["open", extract_dir])
+                call_on_main_thread(self._update_manual, extract_dir)
                 return
 
             # 读取 bundle id 并校验与当前一致
@@ -1832,7 +997,7 @@ class PackycodeStatusApp(rumps.App):
             cur_bid = _bundle_id(target_app)
             new_bid = _bundle_id(new_app)
             if cur_bid and new_bid and cur_bid != new_bid:
-                _alert_buttons(_t("online_update"), _t("online_update_bundle_mismatch", cur=cur_bid, new=new_bid), [_t("btn_ok")])
+                fail(_t("online_update_bundle_mismatch", cur=cur_bid, new=new_bid))
                 return
 
             # 签名校验：codesign/spctl 与 TeamIdentifier（如配置）
@@ -1859,16 +1024,11 @@ class PackycodeStatusApp(rumps.App):
                         tid = m.group(1)
                 team_ok = (tid == expected_team)
 
-            if expected_team:
-                if not team_ok or rc1 != 0:
-                    _alert_buttons(_t("online_update"), _t("online_update_codesign_failed"), [_t("btn_ok")])
-                    return
-            else:
-                # 无强制 team，若校验失败，给出确认提示
-                if rc1 != 0 or rc2 != 0:
-                    idx = _alert_buttons(_t("online_update"), _t("online_update_unverified_prompt"), [_t("btn_continue"), _t("btn_cancel")])
-                    if idx != 0:
-                        return
+            if expected_team and (not team_ok or rc1 != 0):
+                fail(_t("online_update_codesign_failed"))
+                return
+            # 无强制 team 时，校验失败交由用户确认
+            verified = bool(expected_team) or (rc1 == 0 and rc2 == 0)
 
             script_path = os.path.join(tmp_dir, "install.sh")
             script = f"""#!/bin/bash
@@ -1882,7 +1042,8 @@ for i in {{1..60}}; do
   sleep 1
 done
 rm -rf \"$TARGET_APP\"
-ditto \"$NEW_APP\" \"$TARGET_APP\"
+# 同一卷上直接改名（增量组装的新版本与旧版本共享未变化文件的数据）；跨卷时复制
+mv \"$NEW_APP\" \"$TARGET_APP\" 2>/dev/null || ditto \"$NEW_APP\" \"$TARGET_APP\"
 /usr/bin/xattr -dr com.apple.quarantine \"$TARGET_APP\" || true
 chmod +x "$TARGET_APP/Contents/MacOS/*" || true
 open "$TARGET_APP"
@@ -1890,16 +1051,90 @@ open "$TARGET_APP"
             with open(script_path, "w", encoding="utf-8") as f:
                 f.write(script)
             os.chmod(script_path, 0o755)
+            call_on_main_thread(self._update_ready, script_path, extract_dir, verified)
+        except Exception as e:
+            fail(str(e), _t("online_update_failed"))
+
+    def _apply_delta_update(
+        self,
+        manifest_url: str,
+        zip_url: str,
+        expected_sha256: Optional[str],
+        installed_app: str,
+        stage_dir: str,
+        segments: int,
+    ) -> Optional[str]:
+        """后台线程：按发布清单在 stage_dir 下组装新版本，返回其 .app 路径；失败时返回 None（回退到完整下载）。"""
+        import shutil
+
+        from packycode_update import DeltaError, apply_delta, fetch_manifest
+
+        try:
+            call_on_main_thread(self._set_update_status, _t("online_update_delta_scan"))
+            manifest = fetch_manifest(manifest_url)
+            # 清单须与本次发布的更新包对应（.sha256 可用时核对）
+            if expected_sha256 and manifest.get("zip_sha256") != expected_sha256:
+                raise DeltaError("manifest does not match release checksum")
+            app_name = os.path.basename(str(manifest.get("app") or "")) or os.path.basename(installed_app)
+            res = apply_delta(
+                manifest,
+                zip_url,
+                installed_app,
+                os.path.join(stage_dir, app_name),
+                segments=segments,
+                progress=lambda done, total: call_on_main_thread(self._set_update_progress, done, total),
+            )
+            return res.path
+        except Exception:
+            # 清单缺失/不匹配、不支持 Range 或校验失败：丢弃半成品，由调用方改为完整下载
+            shutil.rmtree(stage_dir, ignore_errors=True)
+            return None
+
+    def _set_update_status(self, text: str) -> None:
+        self._render.set_title(self.info_update, text)
+        self._render.set_hidden(self.info_update, False)
+
+    def _set_update_progress(self, done: int, total: Optional[int]) -> None:
+        mb = 1024 * 1024
+        if total:
+            text = _t("online_update_progress", pct=int(done * 100 / total), done=f"{done / mb:.1f}", total=f"{total / mb:.1f}")
+        else:
+            text = _t("online_update_progress_unknown", done=f"{done / mb:.1f}")
+        self._set_update_status(text)
 
-            idx = _alert_buttons(_t("online_update"), _t("online_update_replace_now"), [_t("btn_replace_and_restart"), _t("btn_later")])
+    def _end_update(self) -> None:
+        self._update_inflight = False
+        self._render.set_hidden(self.info_update, True)
+
+    def _update_finished(self, title: str, message: str) -> None:
+        self._end_update()
+        _alert_buttons(title, message, [_t("btn_ok")])
+
+    def _update_manual(self, extract_dir: str) -> None:
+        import subprocess
+
+        self._end_update()
+        try:
+            rumps.notification(title=_t("online_update"), subtitle=_t("online_update_download_done"), message=_t("online_update_manual_replace"))
+        except Exception:
+            pass
+        subprocess.Popen(["open", extract_dir])
+
+    def _update_ready(self, script_path: str, extract_dir: str, verified: bool) -> None:
+        import subprocess
+
+        self._end_update()
+        if not verified:
+            idx = _alert_buttons(_t("online_update"), _t("online_update_unverified_prompt"), [_t("btn_continue"), _t("btn_cancel")])
             if idx != 0:
-                subprocess.Popen(["open", extract_dir])
                 return
-
-            subprocess.Popen(["bash", script_path])
-            rumps.quit_application()
-        except Exception as e:
-            _alert_buttons(_t("online_update_failed"), str(e), [_t("btn_ok")])
+        idx = _alert_buttons(_t("online_update"), _t("online_update_replace_now"), [_t("btn_replace_and_restart"), _t("btn_later")])
+        if idx != 0:
+            subprocess.Popen(["open", extract_dir])
+            return
+        self._config_store.flush()
+        subprocess.Popen(["bash", script_path])
+        rumps.quit_application()
 
     # ------------- 标题格式相关 -------------
     def _update_title_format_checkmarks(self):
@@ -1945,7 +1180,7 @@ open "$TARGET_APP"
             # 如果自定义模板为空，给个默认
             if not self._cfg.get("title_custom"):
                 self._cfg["title_custom"] = DEFAULT_CONFIG["title_custom"]
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
         self._update_title_format_checkmarks()
         self._refresh(force=True)
 
@@ -1965,7 +1200,7 @@ open "$TARGET_APP"
                 with self._lock:
                     self._cfg["title_mode"] = "custom"
                     self._cfg["title_custom"] = tpl
-                    save_config(self._cfg)
+                    self._config_store.save(self._cfg)
                 self._update_title_format_checkmarks()
                 self._refresh(force=True)
 
@@ -1973,7 +1208,7 @@ open "$TARGET_APP"
         with self._lock:
             include = not bool(self._cfg.get("title_include_requests"))
             self._cfg["title_include_requests"] = include
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
         self._update_title_format_checkmarks()
         self._refresh(force=True)
 
@@ -1982,7 +1217,7 @@ open "$TARGET_APP"
         with self._lock:
             cur = bool(self._cfg.get("ring_enabled", False))
             self._cfg["ring_enabled"] = not cur
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
         self._update_ring_menu_checkmarks()
         # 立即渲染
         self._render_cached_state()
@@ -1990,14 +1225,14 @@ open "$TARGET_APP"
     def _set_ring_daily(self, _: Optional[rumps.MenuItem] = None):
         with self._lock:
             self._cfg["ring_source"] = "daily"
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
         self._update_ring_menu_checkmarks()
         self._render_cached_state()
 
     def _set_ring_monthly(self, _: Optional[rumps.MenuItem] = None):
         with self._lock:
             self._cfg["ring_source"] = "monthly"
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
         self._update_ring_menu_checkmarks()
         self._render_cached_state()
 
@@ -2005,7 +1240,7 @@ open "$TARGET_APP"
         with self._lock:
             cur = bool(self._cfg.get("ring_colored", False))
             self._cfg["ring_colored"] = not cur
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             # 强制下次重绘
             self._last_ring_val = None
             self._last_ring_key = None
@@ -2016,7 +1251,7 @@ open "$TARGET_APP"
         with self._lock:
             cur = bool(self._cfg.get("ring_reverse", False))
             self._cfg["ring_reverse"] = not cur
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2026,7 +1261,7 @@ open "$TARGET_APP"
         with self._lock:
             cur = bool(self._cfg.get("ring_text_enabled", False))
             self._cfg["ring_text_enabled"] = not cur
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2036,7 +1271,7 @@ open "$TARGET_APP"
         with self._lock:
             cur = bool(self._cfg.get("ring_text_percent_sign", True))
             self._cfg["ring_text_percent_sign"] = not cur
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2046,7 +1281,7 @@ open "$TARGET_APP"
         with self._lock:
             cur = bool(self._cfg.get("ring_text_show_label", False))
             self._cfg["ring_text_show_label"] = not cur
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2055,7 +1290,7 @@ open "$TARGET_APP"
     def _set_ring_text_mode_percent(self, _: Optional[rumps.MenuItem] = None):
         with self._lock:
             self._cfg["ring_text_mode"] = "percent"
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2064,7 +1299,7 @@ open "$TARGET_APP"
     def _set_ring_text_mode_calls(self, _: Optional[rumps.MenuItem] = None):
         with self._lock:
             self._cfg["ring_text_mode"] = "calls"
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2073,7 +1308,7 @@ open "$TARGET_APP"
     def _set_ring_text_mode_spent(self, _: Optional[rumps.MenuItem] = None):
         with self._lock:
             self._cfg["ring_text_mode"] = "spent"
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2082,7 +1317,7 @@ open "$TARGET_APP"
     def _set_ring_color_mode_colorful(self, _: Optional[rumps.MenuItem] = None):
         with self._lock:
             self._cfg["ring_color_mode"] = "colorful"
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2091,7 +1326,7 @@ open "$TARGET_APP"
     def _set_ring_color_mode_green(self, _: Optional[rumps.MenuItem] = None):
         with self._lock:
             self._cfg["ring_color_mode"] = "green"
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2100,7 +1335,7 @@ open "$TARGET_APP"
     def _set_ring_color_mode_blue(self, _: Optional[rumps.MenuItem] = None):
         with self._lock:
             self._cfg["ring_color_mode"] = "blue"
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2109,7 +1344,7 @@ open "$TARGET_APP"
     def _set_ring_color_mode_gradient(self, _: Optional[rumps.MenuItem] = None):
         with self._lock:
             self._cfg["ring_color_mode"] = "gradient"
-            save_config(self._cfg)
+            self._config_store.save(self._cfg)
             self._last_ring_val = None
             self._last_ring_key = None
         self._update_ring_menu_checkmarks()
@@ -2119,6 +1354,104 @@ open "$TARGET_APP"
     def _on_tick(self, _timer: rumps.Timer):
         self._refresh(force=False)
 
+    def _target_poll_interval(self) -> float:
+        if bool(self._cfg.get("adaptive_polling", True)):
+            return self._poll.interval
+        return self._cfg.get("poll_interval", DEFAULT_CONFIG["poll_interval"])
+
+    def _start_config_watch(self) -> None:
+        if self._config_timer is not None:
+            try:
+                self._config_timer.stop()
+            except Exception:
+                pass
+            self._config_timer = None
+        interval = parse_float(self._cfg.get("config_watch_interval", DEFAULT_CONFIG["config_watch_interval"]))
+        if interval > 0:
+            self._config_timer = rumps.Timer(self._on_config_tick, interval=max(1, int(interval)))
+            self._config_timer.start()
+
+    def _on_config_tick(self, _timer: rumps.Timer):
+        try:
+            changed = self._config_store.poll_external()
+            if changed:
+                self._apply_config_changes(changed)
+        except Exception:
+            pass
+
+    def _apply_config_changes(self, changed: Dict[str, Any]) -> None:
+        """增量应用外部修改的配置：只更新受影响的部分，不做无关的重建。"""
+        keys = set(changed)
+        with self._lock:
+            self._cfg.update(changed)
+        if "language" in keys:
+            # 语言变化需重建菜单；随后的整体渲染也覆盖标题相关的修改
+            set_current_language(self._cfg.get("language", LANG_ZH_CN))
+            self._rebuild_menu()
+            self._render_cached_state()
+        elif keys & self.TITLE_KEYS:
+            self._update_title_format_checkmarks()
+            self._render_cached_state()
+        if keys & self.RING_KEYS:
+            # 仅重绘图标
+            usage = self._usage if self._last_error is None else None
+            self._apply_ring_icon(
+                usage.d_pct if usage is not None else None,
+                usage.m_pct if usage is not None else None,
+            )
+            self._update_ring_menu_checkmarks()
+        if keys & self.POLL_KEYS:
+            self._poll = AdaptivePollController(
+                base=self._cfg.get("poll_interval", DEFAULT_CONFIG["poll_interval"]),
+                min_interval=self._cfg.get("poll_interval_min", DEFAULT_CONFIG["poll_interval_min"]),
+                max_interval=self._cfg.get("poll_interval_max", DEFAULT_CONFIG["poll_interval_max"]),
+            )
+            self._reschedule_timer(self._target_poll_interval())
+        if keys & self.TTL_KEYS:
+            self._accounts.set_ttls({
+                src: self._cfg.get(f"ttl_{src}", DEFAULT_CONFIG[f"ttl_{src}"])
+                for src in ("user_info", "usage_stats", "subscriptions")
+            })
+        if "config_watch_interval" in keys:
+            self._start_config_watch()
+        if "update_check_interval" in keys:
+            self._start_update_checker()
+        if keys & {"account_rate_per_min", "account_rate_burst"}:
+            self._accounts.limiter.set_rate(
+                self._cfg.get("account_rate_per_min", DEFAULT_CONFIG["account_rate_per_min"]),
+                self._cfg.get("account_rate_burst", DEFAULT_CONFIG["account_rate_burst"]),
+            )
+        if keys & {"token", "account_version", "accounts"}:
+            self._update_account_checkmarks()
+            self._jwt_expired_notified = False
+            self._sync_accounts()
+            self._refresh(force=True)
+
+    def _adapt_poll_interval(self, usage: Optional[UsageSnapshot]) -> None:
+        """按最新日消费更新自适应轮询间隔，变化时重新调度定时器。"""
+        if not bool(self._cfg.get("adaptive_polling", True)) or usage is None:
+            return
+        interval = self._poll.observe(usage.daily_spent, usage.daily_limit)
+        self._reschedule_timer(interval)
+
+    def _reschedule_timer(self, interval: float) -> None:
+        """以新间隔重建定时器（需在主线程调用）；间隔未变化时不做任何事。"""
+        if int(interval) != int(self._timer.interval):
+            try:
+                self._timer.stop()
+            except Exception:
+                pass
+            self._timer = rumps.Timer(self._on_tick, interval=int(interval))
+            self._timer.start()
+        self._update_poll_interval_label()
+
+    def _update_poll_interval_label(self) -> None:
+        try:
+            self._render.set_title(self.info_poll, _t("poll_interval_prefix", sec=int(self._timer.interval)))
+        except Exception:
+            # 定时器尚未创建（菜单首次构建时）
+            self._render.set_title(self.info_poll, _t("poll_interval_prefix", sec=int(self._poll.interval)))
+
     # ------------- 内部逻辑 -------------
     def _update_account_checkmarks(self):
         current = self._cfg.get("account_version", "shared")
@@ -2126,577 +1459,245 @@ open "$TARGET_APP"
         self.item_account_private.state = 1 if current == "private" else 0
         self.item_account_codex.state = 1 if current == "codex_shared" else 0
 
-    def _get_base_and_dashboard(self) -> Tuple[str, str]:
-        account = self._cfg.get("account_version", "shared")
-        env = ACCOUNT_ENV.get(account, ACCOUNT_ENV["shared"])  # type: ignore
-        return env["base"], env["dashboard"]
-
     def _update_token_status(self) -> None:
         """更新菜单中的 Token 到期信息，并在过期后提醒一次。"""
-        try:
-            token = (self._cfg.get("token") or "").strip()
-            if not token or not _is_probable_jwt(token):
-                self.info_token_exp.title = _t("token_placeholder")
-                return
-            exp = _extract_exp_from_jwt(token)
-            if not exp:
-                self.info_token_exp.title = _t("token_placeholder")
-                return
-            # 本地时间展示
-            dt_local = datetime.datetime.fromtimestamp(exp)
-            remaining = int(exp - time.time())
-            remain_text = _fmt_remaining(remaining)
-            if remaining <= 0:
-                self.info_token_exp.title = _t("token_expired_label", date=dt_local.strftime('%Y-%m-%d %H:%M'))
-                if not self._jwt_expired_notified:
-                    try:
-                        rumps.notification(
-                            title="PackyCode",
-                            subtitle=_t("notify_token_expired_subtitle"),
-                            message=_t("notify_token_expired_message"),
-                        )
-                    except Exception:
-                        pass
-                    self._jwt_expired_notified = True
-            else:
-                self.info_token_exp.title = _t(
-                    "token_valid_until",
-                    date=dt_local.strftime('%Y-%m-%d %H:%M'),
-                    remain=remain_text,
+        text, expired = token_status(self._cfg.get("token") or "")
+        self._render.set_title(self.info_token_exp, text)
+        if not expired:
+            # 未过期时允许再次提醒（比如用户换新 Token 后）
+            self._jwt_expired_notified = False
+            return
+        if not self._jwt_expired_notified:
+            try:
+                rumps.notification(
+                    title="PackyCode",
+                    subtitle=_t("notify_token_expired_subtitle"),
+                    message=_t("notify_token_expired_message"),
                 )
-                # 未过期时允许再次提醒（比如用户换新 Token 后）
-                self._jwt_expired_notified = False
-        except Exception:
-            self.info_token_exp.title = _t("token_placeholder")
+            except Exception:
+                pass
+            self._jwt_expired_notified = True
 
     def _refresh(self, force: bool = False):
-        # 避免过于频繁的刷新
-        if not force:
-            # 允许最短 2 秒间隔
-            if getattr(self, "_last_refresh_ts", 0) and time.time() - self._last_refresh_ts < 2:
+        """在后台线程拉取数据，完成后回到主线程提交快照；本方法不阻塞 UI。"""
+        with self._lock:
+            if self._refresh_inflight:
+                # 已有刷新在途：强制刷新（如切换账号/Token）在其完成后补刷一次
+                if force:
+                    self._refresh_pending = True
                 return
+            # 避免过于频繁的刷新
+            if not force:
+                # 允许最短 2 秒间隔
+                if getattr(self, "_last_refresh_ts", 0) and time.time() - self._last_refresh_ts < 2:
+                    return
+                # 所有数据源均未过期，无需请求
+                if not self._accounts.any_due():
+                    return
+            self._last_refresh_ts = time.time()
+            self._refresh_inflight = True
+        # 上次快照在主线程取副本交给后台线程；_commit_snapshot 与账号增删会在主线程改写 _extra_snaps
+        prev, prev_extras = self._last_snapshot, dict(self._extra_snaps)
+        t = threading.Thread(
+            target=self._refresh_worker, args=(prev, prev_extras, force), name="packycode-refresh", daemon=True
+        )
+        t.start()
 
-        self._last_refresh_ts = time.time()
+    def _refresh_worker(
+        self, prev: Optional[FetchSnapshot], prev_extras: Dict[str, FetchSnapshot], force: bool
+    ) -> None:
         try:
-            info = self._fetch_user_info()
-            self._last_data = info or {}
-            # 若为 JWT，尝试拉取使用次数统计
-            try:
-                usage = self._maybe_fetch_usage_stats()
-            except Exception:
-                usage = None
-            self._last_usage = usage
-            # 尝试拉取订阅周期
-            try:
-                sub_period = self._maybe_fetch_subscription_period()
-            except Exception:
-                sub_period = None
-            self._last_sub_period = sub_period
-            # 尝试拉取周期用量（若接口提供，覆盖“每月”统计的已用/上限）
+            snap, extra_snaps = self._collect_snapshot(prev, prev_extras, force)
+        except Exception as e:
+            snap, extra_snaps = FetchSnapshot(None, None, None, None, None, e, time.time()), {}
+        extras: Dict[str, Tuple[FetchSnapshot, Optional[UsageSnapshot]]] = {}
+        for name, s in extra_snaps.items():
             try:
-                cycle_amt = self._maybe_fetch_cycle_amount()
-                if cycle_amt is not None:
-                    spent, limit = cycle_amt
-                    self._last_cycle_spent = spent
-                    self._last_cycle_limit = limit
-                else:
-                    self._last_cycle_spent = None
-                    self._last_cycle_limit = None
-            except Exception:
-                self._last_cycle_spent = None
-                self._last_cycle_limit = None
-            self._last_error = None
-            self._update_ui_from_info(info, usage, sub_period)
+                extras[name] = (s, UsageSnapshot.from_fetch(s))
+            except Exception as e:
+                extras[name] = (s._replace(error=e), None)
+        # 每次刷新只解析一次原始接口数据（在后台线程完成）
+        try:
+            usage = UsageSnapshot.from_fetch(snap)
         except Exception as e:
-            self._last_error = e
-            self._last_sub_period = None
-            self._last_cycle_spent = None
-            self._last_cycle_limit = None
-            self._update_ui_error(e)
-
-    def _fetch_user_info(self) -> Optional[Dict[str, Any]]:
-        token = (self._cfg.get("token") or "").strip()
-        if not token:
-            raise LocalizedError("error_no_token")
-
-        base, _dashboard = self._get_base_and_dashboard()
-        url = f"{base}{USER_INFO_PATH}"
-
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/json",
-            "User-Agent": "PackyCode-StatusBar/1.0",
-        }
-
-        resp = requests.get(url, headers=headers, timeout=10)
-        if resp.status_code >= 400:
-            raise LocalizedError("error_http", code=resp.status_code)
-
-        data = resp.json()
-        # 兼容 { success, data } 或直接数据
-        if isinstance(data, dict) and "data" in data and isinstance(data["data"], dict):
-            return data["data"]
-        return data
+            snap, usage = snap._replace(error=e), None
+        if usage is not None:
+            account = self._cfg.get("account_version", "shared")
+            if bool(self._cfg.get("history_enabled", True)):
+                try:
+                    self._history.append(_snapshot_to_sample(usage, account))
+                except Exception:
+                    pass
+            if not snap.same_data(prev):
+                try:
+                    save_last_snapshot(snap, account, self._cfg.get("token") or "")
+                except Exception:
+                    pass
+        call_on_main_thread(self._commit_snapshot, snap, usage, force, extras)
 
-    def _maybe_fetch_usage_stats(self) -> Optional[Dict[str, Any]]:
-        """Token 为 JWT 时，调用 codex 接口获取使用次数统计。
+    def _collect_snapshot(
+        self,
+        prev: Optional[FetchSnapshot],
+        prev_extras: Dict[str, FetchSnapshot],
+        force: bool = False,
+    ) -> Tuple[FetchSnapshot, Dict[str, FetchSnapshot]]:
+        """后台线程：经由核心调度批量拉取主账号与到期的附加账号，不触碰任何界面对象。
 
-        返回示例：
-        {
-          "today_usage": {"date": "YYYY-MM-DD", "api_calls": N},
-          "daily_trend": [{"date": "YYYY-MM-DD", "api_calls": M}, ...]
-        }
-        失败或不可用时返回 None。
+        prev/prev_extras 为主线程在发起刷新时取得的快照副本，后台线程不读取实例上的可变状态。
         """
-        token = (self._cfg.get("token") or "").strip()
-        if not _is_probable_jwt(token):
-            return None
-
-        user_id = _extract_user_id_from_jwt(token)
-        if not user_id:
-            return None
-
-        # 统一使用 codex 域（接口示例提供于该域）
-        env = ACCOUNT_ENV.get("codex_shared", ACCOUNT_ENV["shared"])  # type: ignore
-        url = f"{env['base']}{USAGE_STATS_PATH_TMPL.format(user_id=user_id)}"
-
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/json",
-            "User-Agent": "PackyCode-StatusBar/1.0",
-        }
-        resp = requests.get(url, headers=headers, timeout=10)
-        if resp.status_code >= 400:
-            return None
-        try:
-            return resp.json()
-        except Exception:
-            return None
-
-    def _maybe_fetch_cycle_amount(self) -> Optional[Tuple[Optional[float], Optional[float]]]:
-        """调用订阅接口，尝试获取当前周期的已用金额与限额。
-
-        返回 (spent_usd, limit_usd)。若接口无相关字段则返回 None。
+        return self._accounts.collect(prev, prev_extras, force)
+
+    def _commit_snapshot(
+        self,
+        snap: FetchSnapshot,
+        usage: Optional[UsageSnapshot],
+        force: bool = False,
+        extras: Optional[Dict[str, Tuple[FetchSnapshot, Optional[UsageSnapshot]]]] = None,
+    ) -> None:
+        """主线程：将快照写入状态并仅更新发生变化的界面部分。
+
+        强制刷新（通常伴随配置变更）总是完整重绘。
         """
-        token = (self._cfg.get("token") or "").strip()
-        if not token or not _is_probable_jwt(token):
-            return None
-
-        # 仅 codex_shared/私有等存在订阅；沿用 codex 环境以获取周期信息
-        env = ACCOUNT_ENV.get("codex_shared", ACCOUNT_ENV["shared"])  # type: ignore
-        base = env["base"]
-        url = f"{base}{SUBSCRIPTIONS_PATH}"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/json",
-            "User-Agent": "PackyCode-StatusBar/1.0",
-        }
-        try:
-            resp = requests.get(url, headers=headers, timeout=10)
-            if resp.status_code >= 400:
-                return None
-            payload = resp.json()
-        except Exception:
-            return None
-
-        items = payload.get("data") if isinstance(payload, dict) else None
-        if not isinstance(items, list) or not items:
-            return None
-
-        selected = None
-        for it in items:
-            if isinstance(it, dict) and it.get("status") == "active":
-                selected = it
-                break
-        if selected is None:
-            selected = items[0] if isinstance(items[0], dict) else None
-        if not isinstance(selected, dict):
-            return None
-
-        def _get_float(d: Dict[str, Any], keys: list[str]) -> Optional[float]:
-            for k in keys:
-                if k in d and d[k] is not None:
-                    try:
-                        return float(d[k])
-                    except Exception:
-                        pass
-            return None
-
-        # 常见字段名猜测：尽量只取“当前周期”的字段
-        spent = _get_float(selected, [
-            "current_period_spent_usd",
-            "current_period_spent",
-            "period_spent_usd",
-            "period_spent",
-        ])
-        limit = _get_float(selected, [
-            "current_period_budget_usd",
-            "current_period_limit_usd",
-            "period_budget_usd",
-            "period_limit_usd",
-        ])
-        if spent is None and limit is None:
-            return None
-        return (spent, limit)
-
-    def _maybe_fetch_subscription_period(self) -> Optional[Tuple[datetime.date, datetime.date]]:
-        """调用订阅接口，返回 (current_period_start_date, current_period_end_date)。
-
-        - 优先选取 status == 'active' 的订阅；若无则取第一条。
-        - 失败或无数据返回 None。
-        """
-        token = (self._cfg.get("token") or "").strip()
-        if not token:
-            return None
-
-        base, _ = self._get_base_and_dashboard()
-        url = f"{base}{SUBSCRIPTIONS_PATH}"
-
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/json",
-            "User-Agent": "PackyCode-StatusBar/1.0",
-        }
-
-        resp = requests.get(url, headers=headers, timeout=10)
-        if resp.status_code >= 400:
-            return None
-        try:
-            payload = resp.json()
-        except Exception:
-            return None
-
-        items = payload.get("data") if isinstance(payload, dict) else None
-        if not isinstance(items, list) or not items:
-            return None
-
-        selected = None
-        for it in items:
-            if isinstance(it, dict) and it.get("status") == "active":
-                selected = it
-                break
-        if selected is None:
-            selected = items[0] if isinstance(items[0], dict) else None
-        if not isinstance(selected, dict):
-            return None
-
-        try:
-            start_s = (selected.get("current_period_start") or "").replace("Z", "+00:00")
-            end_s = (selected.get("current_period_end") or "").replace("Z", "+00:00")
-            if not start_s or not end_s:
-                return None
-            ds = datetime.datetime.fromisoformat(start_s).date()
-            de = datetime.datetime.fromisoformat(end_s).date()
-            return (ds, de)
-        except Exception:
-            return None
-
-    def _update_ui_from_info(self, info: Optional[Dict[str, Any]], usage: Optional[Dict[str, Any]], sub_period: Optional[Tuple[datetime.date, datetime.date]]):
-        if not info:
-            self.info_title.title = _t("status_no_data")
-            self.title = "" if self._cfg.get("hidden") else _t("title_no_data")
-            self.info_last.title = _t("last_update_prefix", time=now_str())
-            self.info_requests.title = _t("requests_prefix", val="-")
-            self.info_usage_span.title = _t("usage_span_prefix", val="-")
-            self.info_cycle.title = _t("cycle_placeholder")
-            self.info_renew.title = _t("renew_placeholder")
-            self._update_token_status()
-            # 隐藏续费提醒
-            if getattr(self, "_renew_shown", False):
-                self._rebuild_menu(False)
-            # 复位图标
-            self._apply_ring_icon(None, None)
-            return
-
-        # 解析字段（参考 packycode-cost UserApiResponse 与转换逻辑）
-        daily_limit = parse_float(info.get("daily_budget_usd"))
-        daily_spent = parse_float(info.get("daily_spent_usd"))
-        monthly_limit = parse_float(info.get("monthly_budget_usd"))
-        monthly_spent = parse_float(info.get("monthly_spent_usd"))
-        # 周期覆盖：若订阅接口返回周期用量/限额，则应用到“月度/周期”展示
-        try:
-            if getattr(self, "_last_cycle_spent", None) is not None:
-                monthly_spent = float(self._last_cycle_spent)  # type: ignore[arg-type]
-            if getattr(self, "_last_cycle_limit", None) is not None:
-                monthly_limit = float(self._last_cycle_limit)  # type: ignore[arg-type]
-        except Exception:
-            pass
-        # 若订阅接口提供了当前周期用量/限额，则覆盖“每月”统计
+        for name, (s, u) in (extras or {}).items():
+            # 拉取期间被移除的账号直接丢弃
+            if name in self._account_sections:
+                self._extra_snaps[name] = s
+                self._extra_usage[name] = u
+                self._apply_account_section(name)
+        prev = self._last_snapshot
+        self._stale_since = None
+        with self._lock:
+            self._last_snapshot = snap
+            self._refresh_inflight = False
+            pending = self._refresh_pending
+            self._refresh_pending = False
         try:
-            if getattr(self, "_last_cycle_spent", None) is not None:
-                monthly_spent = float(self._last_cycle_spent)  # type: ignore[arg-type]
-            if getattr(self, "_last_cycle_limit", None) is not None:
-                monthly_limit = float(self._last_cycle_limit)  # type: ignore[arg-type]
+            if snap.error is not None:
+                self._last_error = snap.error
+                self._update_ui_error(snap.error)
+            elif not force and snap.same_data(prev) and self._last_error is None:
+                # 数据未变化：仅刷新时间戳与 Token 状态
+                self._render.set_title(self.info_last, _t("last_update_prefix", time=now_str()))
+                self._update_token_status()
+            else:
+                self._usage = usage
+                self._last_error = None
+                self._update_ui_from_info(usage)
+            # 只用真正重新拉取的日消费喂给自适应轮询；沿用缓存的数据不代表“无变化”
+            if snap.error is None and not force and snap.info_fetched:
+                self._adapt_poll_interval(usage)
         except Exception:
             pass
-        balance_str = info.get("balance_usd")
-        balance = parse_float(balance_str) if balance_str is not None else None
-
-        # 使用次数接口（若为 JWT）
-        today_calls: Optional[int] = None
-        span_desc: Optional[str] = None
-        if usage and isinstance(usage, dict):
-            try:
-                tu = usage.get("today_usage") or {}
-                if tu and tu.get("api_calls") is not None:
-                    today_calls = int(tu.get("api_calls"))
-            except Exception:
-                today_calls = None
-            try:
-                trend = usage.get("daily_trend") or []
-                if isinstance(trend, list) and trend:
-                    # 使用最近 7 天的数据计算调用总数与日均
-                    normalized = []
-                    for it in trend:
-                        if not isinstance(it, dict):
-                            continue
-                        try:
-                            calls = int(it.get("api_calls", 0))
-                        except Exception:
-                            continue
-                        normalized.append({
-                            "date": str(it.get("date") or ""),
-                            "api_calls": calls,
-                        })
-                    # 按日期倒序取最近 7 条（接口可能返回超过 7 天的历史）
-                    normalized.sort(key=lambda x: x["date"], reverse=True)
-                    recent = normalized[:7]
-                    total = sum(it["api_calls"] for it in recent)
-                    cnt = len(recent)
-                    if cnt > 0:
-                        span_desc = _t("usage_span_desc", total=total, avg=round_half_up(total / cnt))
-            except Exception:
-                span_desc = None
+        if extras:
+            self._update_status_title()
+        STARTUP.mark("first_fetch")
+        STARTUP.finish({"menu_writes": self._render.stats()})
+        if pending:
+            self._refresh(force=True)
 
-        daily_remaining = max(0.0, daily_limit - daily_spent) if daily_limit else 0.0
-        monthly_remaining = max(0.0, monthly_limit - monthly_spent) if monthly_limit else 0.0
+    def _update_ui_from_info(self, usage: Optional[UsageSnapshot]):
+        self._apply_view(build_menu_view(self._cfg, usage))
 
-        # 更新菜单详情
-        self.info_title.title = _t("status_ok")
-        self.info_daily.title = (
-            _t("daily_full", spent=f"{daily_spent:.2f}", limit=f"{daily_limit:.2f}", remain=f"{daily_remaining:.2f}")
-            if daily_limit > 0
-            else _t("daily_no_limit", spent=f"{daily_spent:.2f}")
-        )
-        if today_calls is not None:
-            self.info_requests.title = _t("requests_prefix", val=today_calls)
-        else:
-            self.info_requests.title = _t("requests_prefix", val="-")
-
-        self.info_usage_span.title = _t("usage_span_prefix", val=span_desc) if span_desc else _t("usage_span_placeholder")
-        self.info_monthly.title = (
-            _t("monthly_full", spent=f"{monthly_spent:.2f}", limit=f"{monthly_limit:.2f}", remain=f"{monthly_remaining:.2f}")
-            if monthly_limit > 0
-            else _t("monthly_no_limit", spent=f"{monthly_spent:.2f}")
-        )
+    def _update_ui_error(self, err: Exception | str):
+        self._apply_view(build_error_view(self._cfg, err))
 
-        # 周期与续费提醒（优先使用订阅 current_period_start/end；其次 plan_expires_at；否则按自然月）
-        today = datetime.date.today()
-        exp_str = (info.get("plan_expires_at") or "").strip() if isinstance(info, dict) else ""
-        cycle_start: datetime.date
-        cycle_end: datetime.date
-        if sub_period and isinstance(sub_period, tuple):
-            cycle_start, cycle_end = sub_period
-        elif exp_str:
-            try:
-                iso = exp_str.replace("Z", "+00:00")
-                dt_exp = datetime.datetime.fromisoformat(iso)
-                cycle_end = dt_exp.date()
-                cycle_start = cycle_end.replace(day=1)
-            except Exception:
-                total_days_fallback = calendar.monthrange(today.year, today.month)[1]
-                cycle_start = today.replace(day=1)
-                cycle_end = today.replace(day=total_days_fallback)
-        else:
-            total_days_fallback = calendar.monthrange(today.year, today.month)[1]
-            cycle_start = today.replace(day=1)
-            cycle_end = today.replace(day=total_days_fallback)
-
-        # 基于周期起止计算天数
-        cycle_total_days = (cycle_end - cycle_start).days + 1
-        # 将 today 钳制到周期范围内用于“已用天数”
-        today_clamped = min(max(today, cycle_start), cycle_end)
-        elapsed_days = (today_clamped - cycle_start).days + 1
-        days_left = (cycle_end - today).days + 1  # 含今天，可能为<=0
-
-        start_str = f"{cycle_start.month:02d}.{cycle_start.day:02d}"
-        end_str = f"{cycle_end.month:02d}.{cycle_end.day:02d}"
-        if days_left <= 0:
-            self.info_cycle.title = _t("cycle_expired", start=start_str, end=end_str)
-        else:
-            self.info_cycle.title = _t("cycle_remaining", start=start_str, end=end_str, days=days_left)
-
-        # 续费提醒：到期前 3 天显示；其他时间不显示
-        show_renew = days_left <= 3
-        if days_left <= 0:
-            renew_text = _t("renew_expired")
-        elif days_left <= 3:
-            renew_text = _t("renew_soon", days=days_left)
-        else:
-            renew_text = "-"
-        self.info_renew.title = _t("renew_prefix", text=renew_text)
-        if balance is not None:
-            self.info_balance.title = _t("balance_prefix", val=fmt_money(balance))
-        else:
-            self.info_balance.title = _t("balance_placeholder")
+    def _apply_view(self, view: MenuView) -> None:
+        """将核心层生成的 MenuView 写入菜单与状态栏；值为 None 的行保持不变。
 
-        self.info_last.title = _t("last_update_prefix", time=now_str())
+        经由 MenuRenderer 写入，文本未变化的行不会跨桥赋值。
+        """
+        r = self._render
+        r.set_title(self.info_title, view.status)
+        if view.daily is not None:
+            r.set_title(self.info_daily, view.daily)
+        r.set_title(self.info_requests, view.requests)
+        r.set_title(self.info_usage_span, view.usage_span)
+        if view.monthly is not None:
+            r.set_title(self.info_monthly, view.monthly)
+        r.set_title(self.info_cycle, view.cycle)
+        r.set_title(self.info_renew, view.renew)
+        if view.balance is not None:
+            r.set_title(self.info_balance, view.balance)
+        r.set_title(self.info_last, _t("last_update_prefix", time=now_str()))
         # 更新 Token 到期信息与提醒
         self._update_token_status()
+        self._primary_title = view.title
+        self._update_status_title()
+        # 更新图标圆环（无数据/错误时复位）
+        self._apply_ring_icon(view.d_pct, view.m_pct)
+        # 切换“续费提醒”的可见性（隐藏/显示，不重建菜单）
+        r.set_hidden(self.info_renew, not view.show_renew)
+
+    # ------------- 多账号 -------------
+    def _sync_accounts(self) -> None:
+        """按配置同步附加账号；账号集合变化时重建菜单。"""
+        self._accounts.sync()
+        if self._sync_account_sections():
+            self._rebuild_menu()
+            self._render_cached_state()
+
+    def _sync_account_sections(self) -> bool:
+        """为每个附加账号保留一个菜单分组，返回分组集合是否变化。"""
+        names = list(self._accounts.extras)
+        if names == list(self._account_sections):
+            return False
+        old = self._account_sections
+        self._account_sections = OrderedDict(
+            (name, old.get(name) or AccountSection(name, self._open_account_dashboard)) for name in names
+        )
+        for name, sec in old.items():
+            if name not in self._account_sections:
+                for item in sec.items():
+                    self._render.forget(item)
+                self._extra_snaps.pop(name, None)
+                self._extra_usage.pop(name, None)
+        return True
 
-        # 状态栏标题（根据设置）
-        if self._cfg.get("hidden"):
-            self.title = ""
-            # 仍然更新圆环图标
-            d_pct_val = min(100.0, (daily_spent / daily_limit) * 100.0) if daily_limit > 0 else 0.0
-            m_pct_val = min(100.0, (monthly_spent / monthly_limit) * 100.0) if monthly_limit > 0 else 0.0
-            self._apply_ring_icon(d_pct_val, m_pct_val)
+    def _apply_account_section(self, name: str) -> None:
+        sec = self._account_sections.get(name)
+        pipe = self._accounts.extras.get(name)
+        snap = self._extra_snaps.get(name)
+        if sec is None or pipe is None or snap is None:
             return
-
-        self.title = self._make_title(info, usage)
-        # 更新图标圆环
-        d_pct_val = min(100.0, (daily_spent / daily_limit) * 100.0) if daily_limit > 0 else 0.0
-        m_pct_val = min(100.0, (monthly_spent / monthly_limit) * 100.0) if monthly_limit > 0 else 0.0
-        self._apply_ring_icon(d_pct_val, m_pct_val)
-        # 重建菜单以切换“续费提醒”的可见性
-        if getattr(self, "_renew_shown", False) != show_renew:
-            self._rebuild_menu(show_renew)
-
-    def _update_ui_error(self, err: Exception | str):
-        err_text = _format_error(err)
-        self.info_title.title = _t("status_error_prefix", err=err_text)
-        self.info_last.title = _t("last_update_prefix", time=now_str())
-        self.info_requests.title = _t("requests_prefix", val="-")
-        self.info_usage_span.title = _t("usage_span_placeholder")
-        self.info_cycle.title = _t("cycle_placeholder")
-        self.info_renew.title = _t("renew_placeholder")
-        self._update_token_status()
-        if not self._cfg.get("hidden"):
-            self.title = _t("title_error")
-        # 错误时复位图标
-        self._apply_ring_icon(None, None)
-        # 隐藏续费提醒
-        if getattr(self, "_renew_shown", False):
-            self._rebuild_menu(False)
-
-    # ------------- 标题格式化 -------------
-    def _make_title(self, info: Dict[str, Any], usage: Optional[Dict[str, Any]]) -> str:
-        # 构造上下文
-        daily_limit = parse_float(info.get("daily_budget_usd"))
-        daily_spent = parse_float(info.get("daily_spent_usd"))
-        monthly_limit = parse_float(info.get("monthly_budget_usd"))
-        monthly_spent = parse_float(info.get("monthly_spent_usd"))
-        balance_str = info.get("balance_usd")
-        balance = parse_float(balance_str) if balance_str is not None else None
-        # 从 usage 获取今日调用数
-        daily_requests: Optional[int] = None
-        if usage and isinstance(usage, dict):
-            try:
-                tu = usage.get("today_usage") or {}
-                if tu and tu.get("api_calls") is not None:
-                    daily_requests = int(tu.get("api_calls"))
-            except Exception:
-                daily_requests = None
-
-        d_pct = 0.0
-        m_pct = 0.0
-        if daily_limit > 0:
-            d_pct = min(100.0, (daily_spent / daily_limit) * 100.0)
-        if monthly_limit > 0:
-            m_pct = min(100.0, (monthly_spent / monthly_limit) * 100.0)
-
-        ctx = {
-            "d_spent": f"{daily_spent:.1f}",
-            "d_limit": f"{daily_limit:.0f}",
-            "d_pct": f"{d_pct:.0f}",
-            "m_spent": f"{monthly_spent:.1f}",
-            "m_limit": f"{monthly_limit:.0f}",
-            "m_pct": f"{m_pct:.0f}",
-            "bal": f"{balance:.2f}" if balance is not None else "-",
-            "d_req": str(daily_requests) if daily_requests is not None else "-",
-        }
-
-        mode = self._cfg.get("title_mode", "percent")
-        include_requests = bool(self._cfg.get("title_include_requests"))
-        if mode == "percent":
-            # 缺省百分比样式
-            title = f"D {ctx['d_pct']}% | M {ctx['m_pct']}%"
-            if include_requests and daily_requests is not None:
-                title = f"{title} | {_t('title_req_label')} {ctx['d_req']}"
-            return title
-        elif mode == "custom":
-            tpl = self._cfg.get("title_custom") or DEFAULT_CONFIG["title_custom"]
-            title = _safe_format_template(tpl, ctx)
-            if include_requests and daily_requests is not None and "{d_req}" not in tpl:
-                title = f"{title} | {_t('title_req_label')} {ctx['d_req']}"
-            return title
-        else:
-            # 兜底：百分比
-            title = f"D {ctx['d_pct']}% | M {ctx['m_pct']}%"
-            if include_requests and daily_requests is not None:
-                title = f"{title} | {_t('title_req_label')} {ctx['d_req']}"
-            return title
+        cfg, u, err = pipe.cfg, self._extra_usage.get(name), snap.error
+        view = build_error_view(cfg, err) if err is not None else build_menu_view(cfg, u)
+        r, rows = self._render, sec.rows
+        r.set_title(sec.header, account_section_title(cfg, name, u, err))
+        r.set_title(rows["status"], view.status)
+        if view.daily is not None:
+            r.set_title(rows["daily"], view.daily)
+        r.set_title(rows["requests"], view.requests)
+        if view.monthly is not None:
+            r.set_title(rows["monthly"], view.monthly)
+        r.set_title(rows["cycle"], view.renew if view.show_renew else view.cycle)
+        if view.balance is not None:
+            r.set_title(rows["balance"], view.balance)
+        r.set_title(rows["token"], token_status(cfg.get("token") or "")[0])
+        stamp = datetime.datetime.fromtimestamp(snap.fetched_at).strftime("%H:%M:%S")
+        r.set_title(rows["last"], _t("last_update_prefix", time=stamp))
+
+    def _update_status_title(self) -> None:
+        """状态栏标题：单账号时即主账号标题，多账号时按 accounts_title 合成。"""
+        primary = self._usage if self._last_error is None else None
+        items = [(account_specs(self._cfg)[0].name, primary)]
+        for name in self._account_sections:
+            snap = self._extra_snaps.get(name)
+            ok = snap is not None and snap.error is None
+            items.append((name, self._extra_usage.get(name) if ok else None))
+        self._render.set_title(self, make_accounts_title(self._cfg, items, self._primary_title))
 
     # ------------- 圆环图标渲染 -------------
     def _compute_ring_text(self, percent: int) -> str:
         """根据当前配置与数据，计算圆环内部需显示的文本。如果未启用则返回空串。"""
-        try:
-            if not bool(self._cfg.get("ring_text_enabled", False)):
-                return ""
-            src = (self._cfg.get("ring_source") or "daily").lower()
-            mode_txt = (self._cfg.get("ring_text_mode") or "percent").lower()
-            if mode_txt == "calls":
-                calls = None
-                try:
-                    u = getattr(self, "_last_usage", None) or {}
-                    tu = u.get("today_usage") or {}
-                    calls = int(tu.get("api_calls")) if (tu and tu.get("api_calls") is not None) else None
-                except Exception:
-                    calls = None
-                text = str(calls) if calls is not None else "-"
-            elif mode_txt == "spent":
-                v = None
-                try:
-                    info = getattr(self, "_last_data", None) or {}
-                    if src == "monthly":
-                        # 周期优先
-                        if getattr(self, "_last_cycle_spent", None) is not None:
-                            v = float(self._last_cycle_spent)  # type: ignore[arg-type]
-                        else:
-                            v = float(info.get("monthly_spent_usd")) if info.get("monthly_spent_usd") is not None else None
-                    else:
-                        v = float(info.get("daily_spent_usd")) if info.get("daily_spent_usd") is not None else None
-                except Exception:
-                    v = None
-                if v is None:
-                    text = "-"
-                else:
-                    if v >= 1000:
-                        text = "999+"
-                    elif v >= 10:
-                        text = f"{int(v):d}"
-                    else:
-                        text = f"{v:.1f}"
-            else:
-                val = int(percent)
-                show_pct = bool(self._cfg.get("ring_text_percent_sign", True))
-                text = f"{val}%" if show_pct else f"{val}"
-            if bool(self._cfg.get("ring_text_show_label", False)):
-                prefix = "D" if src != "monthly" else "M"
-                text = f"{prefix} {text}"
-            return text
-        except Exception:
-            return ""
+        return compute_ring_text(self._cfg, percent, self._usage)
 
     def _apply_ring_icon(self, d_pct: Optional[float], m_pct: Optional[float]) -> None:
         try:
             enabled = bool(self._cfg.get("ring_enabled", False))
             if not enabled:
                 # 关闭圆环：恢复非模板图标
-                try:
-                    self.template = None
-                except Exception:
-                    pass
+                # 直接写标志：rumps 的 template setter 会按 _icon 路径重新读取图标文件
+                self._template = None
                 if self._base_icon_path:
                     if self.icon != self._base_icon_path:
                         self.icon = self._base_icon_path
@@ -2714,6 +1715,7 @@ open "$TARGET_APP"
             if val is None:
                 # 无数据时恢复基础图标
                 if self._base_icon_path and self.icon != self._base_icon_path:
+                    self._template = None
                     self.icon = self._base_icon_path
                 self._last_ring_val = None
                 return
@@ -2727,24 +1729,15 @@ open "$TARGET_APP"
             if self._last_ring_key is not None and self._last_ring_key == cur_key:
                 return
 
-            # 绘制 PNG，并将应用图标切换为模板模式
-            out_path = self._draw_ring_png(iv)
-            if out_path and os.path.exists(out_path):
-                # 根据配置选择彩色或系统模板着色
-                colored = bool(self._cfg.get("ring_colored", False))
-                try:
-                    self.template = False if colored else True
-                except Exception:
-                    pass
-                self.icon = out_path
+            # 取缓存（或绘制）的 NSImage 直接设置到状态栏，不经过 PNG 文件
+            image = self._ring_image(cur_key, iv, text)
+            if image is not None and self._set_icon_image(image, template=not colored):
                 self._last_ring_val = iv
                 self._last_ring_key = cur_key
             else:
                 # 失败退回基础图标
-                try:
-                    self.template = None
-                except Exception:
-                    pass
+                # 直接写标志：rumps 的 template setter 会按 _icon 路径重新读取图标文件
+                self._template = None
                 if self._base_icon_path:
                     self.icon = self._base_icon_path
                     self._last_ring_val = None
@@ -2758,247 +1751,286 @@ open "$TARGET_APP"
             except Exception:
                 pass
 
-    def _draw_ring_png(self, percent: int) -> Optional[str]:
-        # 使用 AppKit 绘制进度圆环，导出 PNG 文件，供 rumps 加载为模板图标
+    def _ring_image(self, key: str, percent: int, text: str) -> Any:
+        """返回圆环签名 key 对应的 NSImage（含 1x/2x/3x 位图，系统按屏幕倍率选用）。
+
+        每个状态只渲染一次：内存缓存 → 磁盘图集 → 现场绘制。
+        """
+        image = self._ring_images.get(key)
+        if image is not None:
+            self._ring_images.move_to_end(key)
+            return image
         try:
-            from AppKit import (
-                NSBitmapImageRep,
-                NSGraphicsContext,
-                NSBezierPath,
-                NSColor,
-                NSFont,
-                NSFontAttributeName,
-                NSForegroundColorAttributeName,
-                NSParagraphStyleAttributeName,
-                NSMutableParagraphStyle,
-                NSStrokeWidthAttributeName,
-                NSStrokeColorAttributeName,
-                NSCalibratedRGBColorSpace,
-                NSBitmapImageFileTypePNG,
-                NSMakeRect,
-            )
-            from Foundation import NSString
+            from AppKit import NSImage
         except Exception:
             return None
-
-        try:
-            # 画布尺寸用 20x20 像素以适配 rumps 的默认大小
-            size = 20
-            stroke = 2.0
-            width = height = int(size)
-
-            rep = NSBitmapImageRep.alloc().initWithBitmapDataPlanes_pixelsWide_pixelsHigh_bitsPerSample_samplesPerPixel_hasAlpha_isPlanar_colorSpaceName_bytesPerRow_bitsPerPixel_(
-                None, width, height, 8, 4, True, False, NSCalibratedRGBColorSpace, 0, 0
-            )
+        colored = bool(self._cfg.get("ring_colored", False))
+        mode = (self._cfg.get("ring_color_mode") or "colorful").lower()
+        reverse = bool(self._cfg.get("ring_reverse", False))
+        reps = []
+        for scale in RING_SCALES:
+            rep = self._ring_rep(key, scale, percent, text, colored, mode, reverse)
             if rep is None:
                 return None
-            NSGraphicsContext.saveGraphicsState()
-            ctx = NSGraphicsContext.graphicsContextWithBitmapImageRep_(rep)
-            NSGraphicsContext.setCurrentContext_(ctx)
+            # 点尺寸固定为 20x20，像素尺寸为 20*scale
+            rep.setSize_((RING_ICON_SIZE, RING_ICON_SIZE))
+            reps.append(rep)
+        image = NSImage.alloc().initWithSize_((RING_ICON_SIZE, RING_ICON_SIZE))
+        for rep in reps:
+            image.addRepresentation_(rep)
+        self._ring_images[key] = image
+        if len(self._ring_images) > RING_IMAGE_CACHE_MAX:
+            self._ring_images.popitem(last=False)
+        return image
+
+    def _ring_rep(
+        self, key: str, scale: int, percent: int, text: str, colored: bool, mode: str, reverse: bool,
+    ) -> Any:
+        """单一倍率的圆环位图：磁盘图集优先，其次 AppKit 绘制，最后纯 Python 光栅化。"""
+        try:
+            from AppKit import NSBitmapImageRep
+        except Exception:
+            return None
+        atlas_path = self._ring_atlas_path(key, scale)
+        if atlas_path and os.path.exists(atlas_path):
+            rep = NSBitmapImageRep.imageRepWithContentsOfFile_(atlas_path)
+            if rep is not None:
+                return rep
+        px = RING_ICON_SIZE * scale
+        rep = draw_ring_rep(percent, text, colored, mode, reverse, size=px)
+        if rep is not None:
+            if atlas_path:
+                self._write_ring_png(rep, atlas_path)
+            return rep
+        # AppKit 绘制失败时退回纯 Python 光栅化（不含圆环内文字）
+        try:
+            from Foundation import NSData
 
-            rect = NSMakeRect(stroke / 2.0, stroke / 2.0, width - stroke, height - stroke)
+            from ring_raster import render_ring_png
 
-            # 轨道（淡色）
-            track = NSBezierPath.bezierPathWithOvalInRect_(rect)
-            track.setLineWidth_(stroke)
-            NSColor.blackColor().colorWithAlphaComponent_(0.25).set()
-            track.stroke()
+            png = render_ring_png(percent, colored, mode, reverse, size=px, stroke=2.0 * scale)
+            return NSBitmapImageRep.imageRepWithData_(NSData.dataWithBytes_length_(png, len(png)))
+        except Exception:
+            return None
 
-            # 进度弧（从 12 点方向开始，顺时针）
-            draw_pct = float(percent)
-            try:
-                if bool(self._cfg.get("ring_reverse", False)):
-                    draw_pct = max(0.0, min(100.0, 100.0 - draw_pct))
-            except Exception:
-                pass
-            angle = 360.0 * (draw_pct / 100.0)
-            path = NSBezierPath.bezierPath()
-            path.setLineWidth_(stroke)
-            path.setLineCapStyle_(1)  # round caps for better look
-            try:
-                path.appendBezierPathWithArcWithCenter_radius_startAngle_endAngle_clockwise_((width / 2.0, height / 2.0), (width - stroke) / 2.0, 90.0, 90.0 - angle, True)
-            except Exception:
-                path.appendBezierPathWithArcWithCenter_radius_startAngle_endAngle_clockwise_((width / 2.0, height / 2.0), (width - stroke) / 2.0, 90.0, 90.0 - angle, True)
-            # 颜色：若启用彩色圆环，则按模式着色；否则使用黑色交由模板着色
-            try:
-                colored = bool(self._cfg.get("ring_colored", False))
-            except Exception:
-                colored = False
-            if colored:
-                mode = (self._cfg.get("ring_color_mode") or "colorful").lower()
-                if mode == "green":
-                    NSColor.colorWithCalibratedRed_green_blue_alpha_(0.12, 0.75, 0.39, 1.0).set()
-                    path.stroke()
-                elif mode == "blue":
-                    NSColor.colorWithCalibratedRed_green_blue_alpha_(0.26, 0.52, 0.96, 1.0).set()
-                    path.stroke()
-                elif mode == "gradient":
-                    # 以多段弧模拟渐变
-                    segs = max(1, int(max(6.0, angle) / 8.0))
-                    for i in range(segs):
-                        t0 = float(i) / float(segs)
-                        t1 = float(i + 1) / float(segs)
-                        a0 = 90.0 - (t0 * angle)
-                        a1 = 90.0 - (t1 * angle)
-                        seg = NSBezierPath.bezierPath()
-                        seg.setLineWidth_(stroke)
-                        seg.setLineCapStyle_(1)
-                        try:
-                            seg.appendBezierPathWithArcWithCenter_radius_startAngle_endAngle_clockwise_((width / 2.0, height / 2.0), (width - stroke) / 2.0, a0, a1, True)
-                        except Exception:
-                            seg.appendBezierPathWithArcWithCenter_radius_startAngle_endAngle_clockwise_((width / 2.0, height / 2.0), (width - stroke) / 2.0, a0, a1, True)
-                        # 颜色从绿->黄->红渐变
-                        tm = (t0 + t1) / 2.0
-                        if tm <= 0.5:
-                            # 绿(0.12,0.75,0.39) 到 黄(1.0,0.84,0.26)
-                            k = tm / 0.5
-                            r = 0.12 + (1.0 - 0.12) * k
-                            g = 0.75 + (0.84 - 0.75) * k
-                            b = 0.39 + (0.26 - 0.39) * k
-                        else:
-                            # 黄(1.0,0.84,0.26) 到 红(0.94,0.33,0.31)
-                            k = (tm - 0.5) / 0.5
-                            r = 1.0 + (0.94 - 1.0) * k
-                            g = 0.84 + (0.33 - 0.84) * k
-                            b = 0.26 + (0.31 - 0.26) * k
-                        NSColor.colorWithCalibratedRed_green_blue_alpha_(r, g, b, 1.0).set()
-                        seg.stroke()
-                else:
-                    # colorful：阈值配色（绿/橙/红按已用百分比）
-                    used_pct = float(percent)
-                    if used_pct <= 60:
-                        col = NSColor.colorWithCalibratedRed_green_blue_alpha_(0.12, 0.75, 0.39, 1.0)
-                    elif used_pct <= 85:
-                        col = NSColor.colorWithCalibratedRed_green_blue_alpha_(1.00, 0.67, 0.26, 1.0)
-                    else:
-                        col = NSColor.colorWithCalibratedRed_green_blue_alpha_(0.94, 0.33, 0.31, 1.0)
-                    col.set()
-                    path.stroke()
-            else:
-                NSColor.blackColor().set()
-                path.stroke()
+    def _ring_atlas_path(self, key: str, scale: int = 1) -> Optional[str]:
+        """磁盘图集文件路径（按倍率区分 @2x/@3x）；未启用 ring_atlas 时返回 None。"""
+        if not bool(self._cfg.get("ring_atlas", False)):
+            return None
+        import hashlib
 
-            # 文字：在圆环内显示内容（百分比/调用次数/使用金额）
-            try:
-                text = self._compute_ring_text(percent)
-                if text:
-                    # 字号根据位数微调
-                    fs = 8.0 if percent < 100 else 7.0
-                    para = NSMutableParagraphStyle.alloc().init()
-                    try:
-                        para.setAlignment_(1)  # center
-                    except Exception:
-                        pass
-                    # 颜色：模板模式下用黑色（交给系统反色）；彩色模式下用白+黑描边增强对比
-                    if bool(self._cfg.get("ring_colored", False)):
-                        attrs = {
-                            NSFontAttributeName: NSFont.boldSystemFontOfSize_(fs),
-                            NSForegroundColorAttributeName: NSColor.whiteColor(),
-                            NSStrokeWidthAttributeName: -3.0,
-                            NSStrokeColorAttributeName: NSColor.blackColor(),
-                            NSParagraphStyleAttributeName: para,
-                        }
-                    else:
-                        attrs = {
-                            NSFontAttributeName: NSFont.boldSystemFontOfSize_(fs),
-                            NSForegroundColorAttributeName: NSColor.blackColor(),
-                            NSParagraphStyleAttributeName: para,
-                        }
-                    ns_str = NSString.stringWithString_(text)
-                    # 文本矩形（略微上移与缩放）
-                    trh = 9.0
-                    rect_text = NSMakeRect(0.0, (height - trh) / 2.0 - 0.5, width, trh)
-                    ns_str.drawInRect_withAttributes_(rect_text, attrs)
-            except Exception:
-                pass
+        digest = hashlib.sha1(f"{RING_ATLAS_VERSION}|{key}".encode("utf-8")).hexdigest()
+        suffix = f"@{scale}x" if scale != 1 else ""
+        return os.path.join(RING_ATLAS_DIR, f"{digest}{suffix}.png")
 
-            NSGraphicsContext.restoreGraphicsState()
+    def _write_ring_png(self, rep: Any, path: str) -> bool:
+        try:
+            from AppKit import NSBitmapImageFileTypePNG
 
             data = rep.representationUsingType_properties_(NSBitmapImageFileTypePNG, None)
             if not data:
-                return None
-            out_path = self._ring_icon_path or os.path.join(CONFIG_DIR, "ring_icon.png")
-            try:
-                ensure_config_dir()
-            except Exception:
-                pass
-            ok = data.writeToFile_atomically_(out_path, True)
-            if not ok:
-                return None
-            return out_path
+                return False
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            return bool(data.writeToFile_atomically_(path, True))
         except Exception:
-            return None
+            return False
 
+    def _set_icon_image(self, image: Any, template: bool) -> bool:
+        """将 NSImage 直接设置为状态栏图标。
 
-def _safe_format_template(tpl: str, ctx: Dict[str, str]) -> str:
-    # 仅替换允许的键，避免 KeyError
-    out = tpl
-    for k, v in ctx.items():
-        out = out.replace("{" + k + "}", v)
-    # 简单清理多余空格
-    return " ".join(out.split())
+        rumps 只提供按文件路径设置图标的接口；这里写入其内部的 _icon_nsimage 后
+        通知状态栏刷新。若 rumps 内部结构不符，则退回写 PNG 文件并按路径设置。
+        """
+        # 不经 template setter（它会按 _icon 路径从磁盘重新加载图标）；模板属性直接设在 NSImage 上
+        self._template = template
+        try:
+            image.setTemplate_(template)
+        except Exception:
+            pass
+        if hasattr(self, "_icon_nsimage"):
+            # _icon 仅作非空标记（rumps 据此判断是否有图标），图像取自 _icon_nsimage；不是文件路径
+            self._icon = RING_ICON_MARKER
+            self._icon_nsimage = image
+            nsapp = getattr(self, "_nsapp", None)
+            if nsapp is not None:
+                # 应用尚未 run 时状态栏未创建，run 时会读取 _icon_nsimage
+                nsapp.setStatusBarIcon()
+            return True
+        reps = image.representations()
+        out_path = self._ring_icon_path or os.path.join(CONFIG_DIR, "ring_icon.png")
+        if not reps or not self._write_ring_png(reps[0], out_path):
+            return False
+        self.icon = out_path
+        return True
 
 
-def _is_probable_jwt(token: str) -> bool:
-    parts = token.split(".")
-    if len(parts) != 3:
-        return False
-    try:
-        for i in (0, 1):
-            p = parts[i]
-            pad = '=' * ((4 - len(p) % 4) % 4)
-            base64.urlsafe_b64decode((p + pad).encode("utf-8"))
-        return True
-    except Exception:
-        return False
+
+# ---------------------------
+# 圆环绘制（AppKit）
+# ---------------------------
 
 
-def _extract_user_id_from_jwt(token: str) -> Optional[str]:
+def draw_ring_rep(
+    percent: int,
+    text: str = "",
+    colored: bool = False,
+    mode: str = "colorful",
+    reverse: bool = False,
+    size: int = RING_ICON_SIZE,
+) -> Any:
+    """使用 AppKit 绘制进度圆环，返回 size x size 像素的 NSBitmapImageRep；失败返回 None。
+
+    size 为像素尺寸，线宽与文字按 size / RING_ICON_SIZE 等比缩放（用于 2x/3x 位图）。
+
+    几何与配色同 ring_raster（其为不依赖 AppKit 的等价实现，另外不绘制文字）。
+    """
     try:
-        parts = token.split(".")
-        if len(parts) != 3:
-            return None
-        payload_b64 = parts[1]
-        pad = '=' * ((4 - len(payload_b64) % 4) % 4)
-        payload_json = base64.urlsafe_b64decode((payload_b64 + pad).encode("utf-8")).decode("utf-8")
-        payload = json.loads(payload_json)
-        uid = payload.get("user_id") or payload.get("sub")
-        return uid if isinstance(uid, str) and uid else None
+        from AppKit import (
+            NSBitmapImageRep,
+            NSGraphicsContext,
+            NSBezierPath,
+            NSColor,
+            NSFont,
+            NSFontAttributeName,
+            NSForegroundColorAttributeName,
+            NSParagraphStyleAttributeName,
+            NSMutableParagraphStyle,
+            NSStrokeWidthAttributeName,
+            NSStrokeColorAttributeName,
+            NSCalibratedRGBColorSpace,
+            NSMakeRect,
+        )
+        from Foundation import NSString
     except Exception:
         return None
 
-
-def _extract_exp_from_jwt(token: str) -> Optional[int]:
     try:
-        parts = token.split(".")
-        if len(parts) != 3:
+        # 画布默认 20x20 像素以适配 rumps 的默认大小；线宽与文字随画布等比缩放
+        scale = size / RING_ICON_SIZE
+        stroke = 2.0 * scale
+        width = height = int(size)
+
+        rep = NSBitmapImageRep.alloc().initWithBitmapDataPlanes_pixelsWide_pixelsHigh_bitsPerSample_samplesPerPixel_hasAlpha_isPlanar_colorSpaceName_bytesPerRow_bitsPerPixel_(
+            None, width, height, 8, 4, True, False, NSCalibratedRGBColorSpace, 0, 0
+        )
+        if rep is None:
             return None
-        payload_b64 = parts[1]
-        pad = '=' * ((4 - len(payload_b64) % 4) % 4)
-        payload_json = base64.urlsafe_b64decode((payload_b64 + pad).encode("utf-8")).decode("utf-8")
-        payload = json.loads(payload_json)
-        exp = payload.get("exp")
-        return int(exp) if exp is not None else None
-    except Exception:
-        return None
+        NSGraphicsContext.saveGraphicsState()
+        ctx = NSGraphicsContext.graphicsContextWithBitmapImageRep_(rep)
+        NSGraphicsContext.setCurrentContext_(ctx)
+
+        rect = NSMakeRect(stroke / 2.0, stroke / 2.0, width - stroke, height - stroke)
+
+        # 轨道（淡色）
+        track = NSBezierPath.bezierPathWithOvalInRect_(rect)
+        track.setLineWidth_(stroke)
+        NSColor.blackColor().colorWithAlphaComponent_(0.25).set()
+        track.stroke()
+
+        # 进度弧（从 12 点方向开始，顺时针）
+        draw_pct = float(percent)
+        if reverse:
+            draw_pct = max(0.0, min(100.0, 100.0 - draw_pct))
+        angle = 360.0 * (draw_pct / 100.0)
+        path = NSBezierPath.bezierPath()
+        path.setLineWidth_(stroke)
+        path.setLineCapStyle_(1)  # round caps for better look
+        try:
+            path.appendBezierPathWithArcWithCenter_radius_startAngle_endAngle_clockwise_((width / 2.0, height / 2.0), (width - stroke) / 2.0, 90.0, 90.0 - angle, True)
+        except Exception:
+            path.appendBezierPathWithArcWithCenter_radius_startAngle_endAngle_clockwise_((width / 2.0, height / 2.0), (width - stroke) / 2.0, 90.0, 90.0 - angle, True)
+        # 颜色：若启用彩色圆环，则按模式着色；否则使用黑色交由模板着色
+        if colored:
+            mode = (mode or "colorful").lower()
+            if mode == "green":
+                NSColor.colorWithCalibratedRed_green_blue_alpha_(0.12, 0.75, 0.39, 1.0).set()
+                path.stroke()
+            elif mode == "blue":
+                NSColor.colorWithCalibratedRed_green_blue_alpha_(0.26, 0.52, 0.96, 1.0).set()
+                path.stroke()
+            elif mode == "gradient":
+                # 以多段弧模拟渐变
+                segs = max(1, int(max(6.0, angle) / 8.0))
+                for i in range(segs):
+                    t0 = float(i) / float(segs)
+                    t1 = float(i + 1) / float(segs)
+                    a0 = 90.0 - (t0 * angle)
+                    a1 = 90.0 - (t1 * angle)
+                    seg = NSBezierPath.bezierPath()
+                    seg.setLineWidth_(stroke)
+                    seg.setLineCapStyle_(1)
+                    try:
+                        seg.appendBezierPathWithArcWithCenter_radius_startAngle_endAngle_clockwise_((width / 2.0, height / 2.0), (width - stroke) / 2.0, a0, a1, True)
+                    except Exception:
+                        seg.appendBezierPathWithArcWithCenter_radius_startAngle_endAngle_clockwise_((width / 2.0, height / 2.0), (width - stroke) / 2.0, a0, a1, True)
+                    # 颜色从绿->黄->红渐变
+                    tm = (t0 + t1) / 2.0
+                    if tm <= 0.5:
+                        # 绿(0.12,0.75,0.39) 到 黄(1.0,0.84,0.26)
+                        k = tm / 0.5
+                        r = 0.12 + (1.0 - 0.12) * k
+                        g = 0.75 + (0.84 - 0.75) * k
+                        b = 0.39 + (0.26 - 0.39) * k
+                    else:
+                        # 黄(1.0,0.84,0.26) 到 红(0.94,0.33,0.31)
+                        k = (tm - 0.5) / 0.5
+                        r = 1.0 + (0.94 - 1.0) * k
+                        g = 0.84 + (0.33 - 0.84) * k
+                        b = 0.26 + (0.31 - 0.26) * k
+                    NSColor.colorWithCalibratedRed_green_blue_alpha_(r, g, b, 1.0).set()
+                    seg.stroke()
+            else:
+                # colorful：阈值配色（绿/橙/红按已用百分比）
+                used_pct = float(percent)
+                if used_pct <= 60:
+                    col = NSColor.colorWithCalibratedRed_green_blue_alpha_(0.12, 0.75, 0.39, 1.0)
+                elif used_pct <= 85:
+                    col = NSColor.colorWithCalibratedRed_green_blue_alpha_(1.00, 0.67, 0.26, 1.0)
+                else:
+                    col = NSColor.colorWithCalibratedRed_green_blue_alpha_(0.94, 0.33, 0.31, 1.0)
+                col.set()
+                path.stroke()
+        else:
+            NSColor.blackColor().set()
+            path.stroke()
 
+        # 文字：在圆环内显示内容（百分比/调用次数/使用金额）
+        try:
+            if text:
+                # 字号根据位数微调
+                fs = (8.0 if percent < 100 else 7.0) * scale
+                para = NSMutableParagraphStyle.alloc().init()
+                try:
+                    para.setAlignment_(1)  # center
+                except Exception:
+                    pass
+                # 颜色：模板模式下用黑色（交给系统反色）；彩色模式下用白+黑描边增强对比
+                if colored:
+                    attrs = {
+                        NSFontAttributeName: NSFont.boldSystemFontOfSize_(fs),
+                        NSForegroundColorAttributeName: NSColor.whiteColor(),
+                        NSStrokeWidthAttributeName: -3.0,
+                        NSStrokeColorAttributeName: NSColor.blackColor(),
+                        NSParagraphStyleAttributeName: para,
+                    }
+                else:
+                    attrs = {
+                        NSFontAttributeName: NSFont.boldSystemFontOfSize_(fs),
+                        NSForegroundColorAttributeName: NSColor.blackColor(),
+                        NSParagraphStyleAttributeName: para,
+                    }
+                ns_str = NSString.stringWithString_(text)
+                # 文本矩形（略微上移与缩放）
+                trh = 9.0 * scale
+                rect_text = NSMakeRect(0.0, (height - trh) / 2.0 - 0.5 * scale, width, trh)
+                ns_str.drawInRect_withAttributes_(rect_text, attrs)
+        except Exception:
+            pass
 
-def _fmt_remaining(sec: int) -> str:
-    try:
-        if sec <= 0:
-            return _t("rem_expired")
-        days = sec // 86400
-        sec %= 86400
-        hours = sec // 3600
-        sec %= 3600
-        minutes = sec // 60
-        if days > 0:
-            return _t("rem_days_hours", days=days, hours=hours)
-        if hours > 0:
-            return _t("rem_hours_minutes", hours=hours, minutes=minutes)
-        return _t("rem_minutes", minutes=minutes)
+        NSGraphicsContext.restoreGraphicsState()
+        return rep
     except Exception:
-        return "-"
+        return None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,2166 @@
+"""PackyCode 状态栏的界面无关核心：配置、本地化、拉取流水线与文本格式化。
+
+不依赖 rumps/AppKit，可在任意平台运行与测量；main.py 中的状态栏应用只是其视图。
+命令行直接运行本模块可拉取一次并输出与状态栏一致的标题与菜单文本：
+
+    python3 packycode_core.py [--json] [--base-url http://127.0.0.1:8787]
+"""
+
+import datetime
+import functools
+import email.utils
+import calendar
+import base64
+import math
+import random
+import re
+import string
+import json
+import os
+import sys
+import threading
+import sqlite3
+from collections import ChainMap, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import time
+
+
+# ---------------------------
+# 语言与本地化
+# ---------------------------
+
+# 支持的语言代码
+LANG_ZH_CN = "zh_CN"
+LANG_EN = "en"
+LANG_ZH_TW = "zh_TW"
+LANG_JA = "ja"
+LANG_KO = "ko"
+LANG_RU = "ru"
+
+_current_language = LANG_ZH_CN
+
+
+class LocalizedError(Exception):
+    def __init__(self, key: str, **kwargs):
+        self.key = key
+        self.kwargs = kwargs
+        super().__init__(key)
+
+    def message(self) -> str:
+        try:
+            return _t(self.key, **self.kwargs)
+        except Exception:
+            return self.key
+
+    def __str__(self) -> str:
+        return self.message()
+
+
+def set_current_language(lang: str) -> None:
+    global _current_language
+    if lang in {LANG_ZH_CN, LANG_EN, LANG_ZH_TW, LANG_JA, LANG_KO, LANG_RU}:
+        _current_language = lang
+    else:
+        _current_language = LANG_ZH_CN
+
+
+# 文本目录：locales/<lang>.json，按需仅加载当前语言（及中文兜底）
+LOCALES_DIRNAME = "locales"
+
+# lang -> key -> (模板, 是否包含占位符)
+_catalogs: Dict[str, Dict[str, Tuple[str, bool]]] = {}
+_catalogs_lock = threading.Lock()
+_formatter = string.Formatter()
+
+
+def _locale_file(lang: str) -> Optional[str]:
+    candidates = [
+        _resource_path_candidate(os.path.join(LOCALES_DIRNAME, f"{lang}.json")),  # .app Resources
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), LOCALES_DIRNAME, f"{lang}.json"),
+    ]
+    for p in candidates:
+        if p and os.path.exists(p):
+            return p
+    return None
+
+
+def _compile_template(text: str) -> Tuple[str, bool]:
+    """预解析模板：记录是否含占位符，无占位符的文本无需 format。"""
+    try:
+        has_fields = any(field is not None for _lit, field, _spec, _conv in _formatter.parse(text))
+    except ValueError:
+        has_fields = False
+    return text, has_fields
+
+
+def _load_catalog(lang: str) -> Dict[str, Tuple[str, bool]]:
+    cat = _catalogs.get(lang)
+    if cat is not None:
+        return cat
+    with _catalogs_lock:
+        cat = _catalogs.get(lang)
+        if cat is None:
+            cat = {}
+            path = _locale_file(lang)
+            if path:
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        raw = json.load(f)
+                    cat = {k: _compile_template(v) for k, v in raw.items() if isinstance(v, str)}
+                except Exception:
+                    cat = {}
+            _catalogs[lang] = cat
+    return cat
+
+
+def _lookup_template(lang: str, key: str) -> Tuple[str, bool]:
+    entry = _load_catalog(lang).get(key)
+    if entry is None and lang != LANG_ZH_CN:
+        entry = _load_catalog(LANG_ZH_CN).get(key)
+    if entry is None:
+        # 防御：若打包时缺失 locales 目录，避免界面显示 key 名
+        entry = _compile_template(_fallback_text(key) or key)
+    return entry
+
+
+@functools.lru_cache(maxsize=1024)
+def _t_cached(lang: str, key: str, items: Tuple[Tuple[str, Any], ...]) -> str:
+    text, has_fields = _lookup_template(lang, key)
+    if not has_fields or not items:
+        return text
+    try:
+        return text.format(**dict(items))
+    except Exception:
+        return text
+
+
+def _t(key: str, **kwargs) -> str:
+    items = tuple(sorted(kwargs.items())) if kwargs else ()
+    try:
+        return _t_cached(_current_language, key, items)
+    except TypeError:
+        # 参数不可哈希时不走缓存
+        return _t_cached.__wrapped__(_current_language, key, items)
+
+
+def _fallback_text(key: str) -> Optional[str]:
+    """在缺少 locales 文本目录时提供最小中文兜底，避免界面显示 key 名。"""
+    zh = {
+        # 顶部信息
+        "status_uninitialized": "状态：未初始化",
+        "daily_placeholder": "每日：-/- (剩余 -)",
+        "requests_placeholder": "调用次数：-",
+        "usage_span_placeholder": "7日日均：-",
+        "monthly_placeholder": "本周期：-/- (剩余 -)",
+        "cycle_placeholder": "周期：-",
+        "renew_placeholder": "续费提醒：-",
+        "balance_placeholder": "余额：-",
+        "last_update_placeholder": "上次更新：-",
+        "token_placeholder": "Token：-",
+        "version_prefix": "版本：",
+        "status_ok": "状态：正常",
+        "status_stale": "状态：缓存数据（{time}），正在刷新…",
+        "status_no_data": "状态：无数据",
+        "title_no_data": "无数据",
+        "title_error": "错误",
+
+        # 菜单
+        "menu_refresh": "刷新",
+        "menu_account": "账号类型",
+        "menu_title_format": "标题格式",
+        "menu_language": "语言",
+        "menu_set_token": "设置 Token...",
+        "menu_toggle_hidden": "隐藏/展示",
+        "menu_open_dashboard": "打开控制台",
+        "menu_latency_monitor": "延迟监控",
+        "menu_check_update": "检查更新",
+        "menu_ring": "进度圆环",
+        "menu_affiliates": "推广",
+        "menu_quit": "退出",
+
+        # 子菜单项
+        "account_shared": "共享（公交车）",
+        "account_private": "滴滴车（私有）",
+        "account_codex": "Codex 公交车",
+        "titlefmt_percent": "百分比",
+        "titlefmt_custom": "自定义...",
+        "titlefmt_show_requests": "显示调用次数",
+        "ring_enable": "在图标显示进度圆环",
+        "ring_source": "圆环来源",
+        "ring_source_daily": "每日进度",
+        "ring_source_monthly": "周期进度",
+        "ring_colored": "使用彩色圆环",
+        "ring_reverse": "反转模式（高亮未使用）",
+        "ring_text_enable": "在圆环内显示百分比",
+        "ring_text_show_percent": "文本显示百分号",
+        "ring_text_show_label": "文本显示来源标签 (D/M)",
+        "ring_color_mode": "圆环颜色",
+        "ring_color_colorful": "彩色",
+        "ring_color_green": "绿色",
+        "ring_color_blue": "蓝色",
+        "ring_color_gradient": "渐变彩色",
+
+        # 顶部动态模板与前缀
+        "last_update_prefix": "上次更新：{time}",
+        "poll_interval_prefix": "刷新间隔：{sec} 秒",
+        "requests_prefix": "调用次数：{val}",
+        "usage_span_prefix": "7日日均：{val}",
+        "balance_prefix": "余额：{val}",
+        "daily_full": "每日：{spent}/{limit} (剩余 {remain})",
+        "daily_no_limit": "每日：{spent}/- (剩余 -)",
+        "monthly_full": "本周期：{spent}/{limit} (剩余 {remain})",
+        "monthly_no_limit": "本周期：{spent}/- (剩余 -)",
+        "cycle_expired": "周期：{start}-{end}（已到期）",
+        "cycle_remaining": "周期：{start}-{end}（剩余{days}天）",
+        "renew_expired": "⚠️ 已到期，请尽快续费",
+        "renew_soon": "⚠️ 即将到期（剩余{days}天），建议提前续费",
+        "renew_prefix": "续费提醒：{text}",
+        "title_req_label": "调用",
+
+        # 错误与 Token 提示
+        "status_error_prefix": "状态：错误 - {err}",
+        "token_expired_label": "Token：已过期（{date}）",
+        "token_valid_until": "Token：{date}（{remain}）",
+        "notify_token_expired_subtitle": "Token 已过期",
+        "notify_token_expired_message": "请在“设置 Token...”中更换 JWT",
+        "error_no_token": "未设置 Token，请通过“设置 Token...”配置",
+        "error_http": "调用失败: HTTP {code}",
+        "error_circuit_open": "服务暂不可用，{time} 后重试",
+        # 颜色预设无需手动输入
+
+        # 剩余时间
+        "rem_expired": "已过期",
+        "rem_days_hours": "剩余{days}天{hours}小时",
+        "rem_hours_minutes": "剩余{hours}小时{minutes}分钟",
+        "rem_minutes": "剩余{minutes}分钟",
+    }
+    return zh.get(key)
+
+
+def _format_error(err: Exception | str) -> str:
+    if isinstance(err, LocalizedError):
+        return err.message()
+    if isinstance(err, Exception):
+        return str(err)
+    return str(err)
+
+
+# ---------------------------
+# 配置与常量
+# ---------------------------
+
+CONFIG_DIR = os.path.join(os.path.expanduser("~"), ".packycode")
+CONFIG_FILE = os.path.join(CONFIG_DIR, "config.json")
+HISTORY_DB_FILE = os.path.join(CONFIG_DIR, "history.sqlite3")
+LAST_SNAPSHOT_FILE = os.path.join(CONFIG_DIR, "last_snapshot.json")
+RING_ATLAS_DIR = os.path.join(CONFIG_DIR, "ring_atlas")
+DEFAULT_UPDATE_REPO = "jacksonon/packycode-macos-statusbar"
+
+DEFAULT_CONFIG = {
+    "account_version": "shared",  # shared | private | codex_shared
+    "token": "",
+    "hidden": False,
+    "poll_interval": 180,  # seconds
+    # 标题显示模式：percent | custom
+    "title_mode": "percent",
+    "title_include_requests": False,
+    # 自定义模板占位符：{d_pct} {m_pct} {d_spent} {d_limit} {m_spent} {m_limit} {bal} {d_req}
+    "title_custom": "D {d_pct}% | M {m_pct}%",
+    # 状态栏进度圆环
+    "ring_enabled": False,
+    # daily | monthly
+    "ring_source": "daily",
+    # 是否使用彩色圆环（默认系统单色模板）
+    "ring_colored": False,
+    # 反转模式：高亮未使用（默认高亮已使用）
+    "ring_reverse": False,
+    # 颜色模式：colorful | green | blue | gradient
+    "ring_color_mode": "colorful",
+    # 在圆环内显示百分比文字
+    "ring_text_enabled": False,
+    # 文本是否显示百分号
+    "ring_text_percent_sign": True,
+    # 文本是否显示来源标签（D/M）
+    "ring_text_show_label": False,
+    # 圆环文字内容：percent | calls | spent
+    "ring_text_mode": "percent",
+    # 圆环图标磁盘图集：已渲染的图标写入 ~/.packycode/ring_atlas/，重启后直接加载
+    "ring_atlas": False,
+    # 期望的 Apple TeamIdentifier（可选，用于强校验签名）
+    "update_expected_team_id": "",
+    # 在线更新下载的并行分段数（服务端不支持 Range 时为 1）
+    "update_download_segments": 4,
+    # 增量更新：发布附带清单时只下载变化的文件，失败时回退到完整更新包
+    "update_delta": True,
+    # 后台检查新版本的间隔（秒，0 为关闭；菜单“检查更新”直接读取缓存）
+    "update_check_interval": 21600,
+    # 界面语言
+    "language": LANG_ZH_CN,
+    # HTTP 连接池：每个 host 保持的长连接数量
+    "http_pool_maxsize": 4,
+    # HTTP 重试：连接错误/5xx 的最大重试次数与退避系数（秒）
+    "http_retries": 2,
+    "http_backoff_factor": 0.5,
+    # 各数据源缓存时长（秒）：定时器每次触发时仅拉取已过期的数据源
+    "ttl_user_info": 60,
+    "ttl_usage_stats": 600,
+    "ttl_subscriptions": 21600,
+    # TTL 随机抖动比例（0.1 表示最多提前 10% 过期），避免多个数据源在同一时刻集中请求
+    "ttl_jitter": 0.1,
+    # 熔断：同一域名连续失败（5xx/429/超时）达到阈值后暂停请求，按指数退避（带抖动）重试
+    "breaker_failure_threshold": 2,
+    "breaker_base_delay": 30,
+    "breaker_max_delay": 1800,
+    # 本地用量历史：每次数据变化时追加一条快照（SQLite，定期压缩）
+    "history_enabled": True,
+    # 自适应轮询：消费加速/接近日预算时缩短间隔，数值无变化时指数退避
+    "adaptive_polling": True,
+    "poll_interval_min": 60,
+    "poll_interval_max": 1800,
+    # 配置文件外部修改检测间隔（秒，0 关闭）：修改后无需重启即按键增量生效
+    "config_watch_interval": 2,
+    # 附加监控账号：[{"name": "...", "account_version": "...", "token": "..."}]
+    # 主账号仍为上面的 account_version/token，附加账号各自显示为一个菜单分组
+    "accounts": [],
+    # 多账号时的状态栏标题：each（逐账号）| max（各账号中最高的百分比）| primary（仅主账号）
+    "accounts_title": "each",
+    # 每个账号的请求速率上限（令牌桶：每分钟请求数与突发容量）；各账号轮转排队共享并发
+    "account_rate_per_min": 30,
+    "account_rate_burst": 8,
+}
+
+# 参考 packycode-cost/api/config.ts
+ACCOUNT_ENV = {
+    "shared": {
+        "base": "https://www.packycode.com",
+        "dashboard": "https://www.packycode.com/dashboard",
+        "pricing": "https://www.packycode.com/pricing",
+    },
+    "private": {
+        "base": "https://share.packycode.com",
+        "dashboard": "https://share.packycode.com/dashboard",
+        "pricing": "https://share.packycode.com/pricing",
+    },
+    "codex_shared": {
+        "base": "https://codex.packycode.com",
+        "dashboard": "https://codex.packycode.com/dashboard",
+        "pricing": "https://codex.packycode.com/pricing",
+    },
+}
+
+USER_INFO_PATH = "/api/backend/users/info"
+USAGE_STATS_PATH_TMPL = "/api/backend/users/{user_id}/usage-stats?days=7"
+SUBSCRIPTIONS_PATH = "/api/backend/subscriptions?page=1&per_page=5"
+
+
+def api_base(account: str) -> str:
+    """返回账号环境的 API 地址；设置 PACKYCODE_API_BASE 时统一指向该地址（如本地桩服务）。"""
+    override = os.environ.get("PACKYCODE_API_BASE", "").strip()
+    if override:
+        return override.rstrip("/")
+    return ACCOUNT_ENV.get(account, ACCOUNT_ENV["shared"])["base"]
+
+
+def get_base_and_dashboard(cfg: Mapping[str, Any]) -> Tuple[str, str]:
+    account = cfg.get("account_version", "shared")
+    env = ACCOUNT_ENV.get(account, ACCOUNT_ENV["shared"])  # type: ignore
+    return api_base(account), env["dashboard"]
+
+
+class AccountSpec(NamedTuple):
+    """一个被监控的账号：显示名、账号环境与 Token。"""
+    name: str
+    account_version: str
+    token: str
+
+
+def account_specs(cfg: Mapping[str, Any]) -> List[AccountSpec]:
+    """主账号（account_version/token）在前，其后为 accounts 中的附加账号。
+
+    附加账号缺省名称为其账号环境；无效条目与空 Token 被忽略，重名时追加序号。
+    """
+    primary = cfg.get("account_version", "shared")
+    specs = [AccountSpec(primary, primary, (cfg.get("token") or "").strip())]
+    seen = {primary}
+    extras = cfg.get("accounts") or []
+    for entry in extras if isinstance(extras, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        token = str(entry.get("token") or "").strip()
+        account = entry.get("account_version", "shared")
+        if not token or account not in ACCOUNT_ENV:
+            continue
+        base = str(entry.get("name") or account).strip() or account
+        name, n = base, 2
+        while name in seen:
+            name, n = f"{base} #{n}", n + 1
+        seen.add(name)
+        specs.append(AccountSpec(name, account, token))
+    return specs
+
+def _resource_path_candidate(filename: str) -> Optional[str]:
+    rp = os.environ.get("RESOURCEPATH")
+    if rp:
+        p = os.path.join(rp, filename)
+        if os.path.exists(p):
+            return p
+    return None
+
+
+# ---------------------------
+# 工具函数
+# ---------------------------
+
+
+def ensure_config_dir() -> None:
+    if not os.path.exists(CONFIG_DIR):
+        os.makedirs(CONFIG_DIR, exist_ok=True)
+
+
+def load_config() -> Dict[str, Any]:
+    ensure_config_dir()
+    if not os.path.exists(CONFIG_FILE):
+        return DEFAULT_CONFIG.copy()
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        # 合并默认值
+        merged = DEFAULT_CONFIG.copy()
+        merged.update({k: v for k, v in data.items() if k in DEFAULT_CONFIG})
+        return merged
+    except Exception:
+        return DEFAULT_CONFIG.copy()
+
+
+def _serialize_config(cfg: Dict[str, Any]) -> str:
+    safe_cfg = DEFAULT_CONFIG.copy()
+    safe_cfg.update({k: v for k, v in cfg.items() if k in DEFAULT_CONFIG})
+    return json.dumps(safe_cfg, ensure_ascii=False, indent=2)
+
+
+def _atomic_write_text(path: str, text: str) -> None:
+    """先写同目录临时文件并落盘，再 rename 覆盖，避免中途退出留下半截文件。"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def save_config(cfg: Dict[str, Any]) -> None:
+    ensure_config_dir()
+    _atomic_write_text(CONFIG_FILE, _serialize_config(cfg))
+
+
+class ConfigStore:
+    """配置写回队列：合并防抖窗口内的多次保存，原子写入，内容未变化时不落盘。
+
+    save 在调用线程序列化当前配置（廉价），实际写盘由定时线程在最后一次
+    save 之后 debounce 秒执行；退出前需调用 flush 写入尚未落盘的修改。
+    poll_external 检测应用外部对配置文件的修改（每次仅一次 stat）。
+    """
+
+    def __init__(self, path: str = CONFIG_FILE, debounce: float = 0.5):
+        self.path = path
+        self.debounce = max(0.0, float(debounce))
+        self._lock = threading.Lock()
+        self._pending: Optional[str] = None
+        self._timer: Optional[threading.Timer] = None
+        self._written: Optional[str] = None
+        # 上次读取/写入时配置文件的 (mtime_ns, inode, size)，用于廉价判断外部修改
+        self._sig: Optional[Tuple[int, int, int]] = None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self._written = f.read()
+            self._sig = self._stat_sig()
+        except OSError:
+            pass
+        self.writes = 0
+        self.coalesced = 0
+        self.unchanged = 0
+
+    def save(self, cfg: Dict[str, Any]) -> None:
+        text = _serialize_config(cfg)
+        with self._lock:
+            if self._pending is not None:
+                self.coalesced += 1
+            self._pending = text
+            if self._timer is not None:
+                self._timer.cancel()
+            if self.debounce <= 0:
+                self._timer = None
+            else:
+                self._timer = threading.Timer(self.debounce, self._write_pending)
+                self._timer.daemon = True
+                self._timer.start()
+        if self.debounce <= 0:
+            self._write_pending()
+
+    def flush(self) -> None:
+        """立即写入尚未落盘的修改（退出前调用）。"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._write_pending()
+
+    def _write_pending(self) -> None:
+        with self._lock:
+            text, self._pending = self._pending, None
+            self._timer = None
+            if text is None:
+                return
+            if text == self._written:
+                self.unchanged += 1
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                _atomic_write_text(self.path, text)
+            except OSError:
+                return
+            self._written = text
+            self._sig = self._stat_sig()
+            self.writes += 1
+
+    def _stat_sig(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+    def poll_external(self) -> Dict[str, Any]:
+        """检查配置文件是否被外部修改，返回相对上次已知内容发生变化的键值。
+
+        与本进程最后一次写入/读取的内容比较（而非内存配置），因此不会把尚未
+        落盘的界面修改误判为外部修改；文件不完整或无法解析时等待下次检查。
+        """
+        sig = self._stat_sig()
+        with self._lock:
+            if sig is None or sig == self._sig:
+                return {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    text = f.read()
+                data = json.loads(text)
+            except (OSError, ValueError):
+                return {}
+            self._sig = sig
+            if text == self._written or not isinstance(data, dict):
+                return {}
+            try:
+                known = json.loads(self._written) if self._written else {}
+            except ValueError:
+                known = {}
+            self._written = text
+        changed = {}
+        for key, value in data.items():
+            if key in DEFAULT_CONFIG and value != known.get(key, DEFAULT_CONFIG[key]):
+                changed[key] = value
+        return changed
+
+    def stats(self) -> Dict[str, int]:
+        return {"writes": self.writes, "coalesced": self.coalesced, "unchanged": self.unchanged}
+
+
+def parse_float(value: Any) -> float:
+    try:
+        return float(value)
+    except Exception:
+        return 0.0
+
+
+def round_half_up(value: float) -> int:
+    if value >= 0:
+        return int(math.floor(value + 0.5))
+    return int(math.ceil(value - 0.5))
+
+
+def fmt_money(value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    try:
+        return f"${value:.2f}"
+    except Exception:
+        return str(value)
+
+
+def now_str() -> str:
+    return datetime.datetime.now().strftime("%H:%M:%S")
+
+
+def get_app_version() -> str:
+    # 1) 打包环境：从 Info.plist 读取 CFBundleShortVersionString/CFBundleVersion
+    try:
+        rp = os.environ.get("RESOURCEPATH")
+        if rp:
+            plist_path = os.path.join(os.path.dirname(rp), "Info.plist")
+            if os.path.exists(plist_path):
+                import plistlib
+
+                with open(plist_path, "rb") as f:
+                    pl = plistlib.load(f)
+                v = pl.get("CFBundleShortVersionString") or pl.get("CFBundleVersion")
+                if isinstance(v, (str, int, float)):
+                    return str(v)
+    except Exception:
+        pass
+    # 2) 源码环境：从 VERSION 文件读取
+    try:
+        vf = os.path.join(os.path.dirname(__file__), "VERSION")
+        if os.path.exists(vf):
+            with open(vf, "r", encoding="utf-8") as f:
+                return f.read().strip()
+    except Exception:
+        pass
+    # 3) 兜底：尝试从 setup.py 正则提取
+    try:
+        sp = os.path.join(os.path.dirname(__file__), "setup.py")
+        if os.path.exists(sp):
+            with open(sp, "r", encoding="utf-8") as f:
+                s = f.read()
+            m = re.search(r"version\s*=\s*['\"]([^'\"]+)['\"]", s)
+            if m:
+                return m.group(1)
+    except Exception:
+        pass
+    return "0.0.0"
+
+
+class CircuitOpenError(LocalizedError):
+    """熔断打开期间拒绝请求；retry_at 为下一次允许探测的时间戳。"""
+
+    def __init__(self, host: str, retry_at: float):
+        self.host = host
+        self.retry_at = retry_at
+        when = datetime.datetime.fromtimestamp(retry_at).strftime("%H:%M:%S")
+        super().__init__("error_circuit_open", time=when)
+
+
+class CircuitBreaker:
+    """单个域名的熔断器：closed -> open（退避等待）-> half_open（放行一次探测）。
+
+    连续失败达到阈值后打开，等待时间按 base_delay * 2^(n-1) 指数增长并加入 ±20%
+    抖动，上限 max_delay；服务端给出 Retry-After 时取两者较大值。
+    探测成功则关闭，失败则以更长的等待时间再次打开。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+    JITTER = 0.2
+
+    def __init__(self, failure_threshold: int = 2, base_delay: float = 30, max_delay: float = 1800):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.base_delay = max(1.0, float(base_delay))
+        self.max_delay = max(self.base_delay, float(max_delay))
+        self.state = self.CLOSED
+        self.failures = 0
+        self.next_retry_at = 0.0
+        self._open_count = 0
+        self._lock = threading.Lock()
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """是否允许发出请求；open 到期后转为 half_open 并仅放行一次探测。"""
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and now >= self.next_retry_at:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._open_count = 0
+            self.next_retry_at = 0.0
+
+    def record_failure(self, retry_after: Optional[float] = None, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        with self._lock:
+            self.failures += 1
+            if self.state != self.HALF_OPEN and self.failures < self.failure_threshold:
+                return
+            self._open_count += 1
+            delay = min(self.max_delay, self.base_delay * (2 ** (self._open_count - 1)))
+            delay *= 1.0 + random.uniform(-self.JITTER, self.JITTER)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            self.state = self.OPEN
+            self.next_retry_at = now + delay
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After（秒数或 HTTP 日期），返回距现在的秒数。"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        dt = email.utils.parsedate_to_datetime(value)
+        return max(0.0, dt.timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class CachedResponse(NamedTuple):
+    """条件请求缓存项：校验头与已解析的响应体。"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    data: Any
+
+
+class HttpClient:
+    """按 host 复用 keep-alive 连接的 HTTP 客户端。
+
+    每个 scheme://host 对应一个 requests.Session，挂载带连接池与重试/退避的
+    HTTPAdapter，避免每次刷新都重新 DNS 解析与 TLS 握手。
+    get_json 额外按 URL（与鉴权头）缓存 ETag/Last-Modified 及解析结果，
+    发送条件请求，304 时直接复用上次的解析结果。
+    每个 host 另有一个 CircuitBreaker，熔断期间直接抛出 CircuitOpenError。
+    """
+
+    MAX_CACHE_ENTRIES = 64
+
+    def __init__(
+        self,
+        pool_maxsize: int = 4,
+        retries: int = 2,
+        backoff_factor: float = 0.5,
+        breaker_threshold: int = 2,
+        breaker_base_delay: float = 30,
+        breaker_max_delay: float = 1800,
+    ):
+        self._pool_maxsize = max(1, int(pool_maxsize))
+        self._retries = max(0, int(retries))
+        self._backoff_factor = max(0.0, float(backoff_factor))
+        self._breaker_args = (breaker_threshold, breaker_base_delay, breaker_max_delay)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._sessions: Dict[str, requests.Session] = {}
+        self._request_counts: Dict[str, int] = {}
+        self._cache: Dict[Tuple[str, str], CachedResponse] = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._lock = threading.Lock()
+
+    def _make_session(self) -> requests.Session:
+        retry = Retry(
+            total=self._retries,
+            connect=self._retries,
+            read=self._retries,
+            status=self._retries,
+            backoff_factor=self._backoff_factor,
+            # 503/429 不在传输层重试：其 Retry-After 交给 CircuitBreaker 处理，避免在拉取线程中长时间休眠
+            status_forcelist=(502, 504),
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self._pool_maxsize, max_retries=retry)
+        sess = requests.Session()
+        sess.mount("https://", adapter)
+        sess.mount("http://", adapter)
+        return sess
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        parts = urlsplit(url)
+        host_key = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            breaker = self._breakers.get(host_key)
+            if breaker is None:
+                breaker = CircuitBreaker(*self._breaker_args)
+                self._breakers[host_key] = breaker
+        return breaker
+
+    def _session_for(self, url: str) -> Tuple[str, requests.Session]:
+        parts = urlsplit(url)
+        host_key = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            sess = self._sessions.get(host_key)
+            if sess is None:
+                sess = self._make_session()
+                self._sessions[host_key] = sess
+            self._request_counts[host_key] = self._request_counts.get(host_key, 0) + 1
+        return host_key, sess
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        breaker = self.breaker_for(url)
+        if not breaker.allow():
+            raise CircuitOpenError(urlsplit(url).netloc, max(breaker.next_retry_at, time.time()))
+        _host, sess = self._session_for(url)
+        try:
+            resp = sess.get(url, **kwargs)
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        if resp.status_code >= 500 or resp.status_code == 429:
+            breaker.record_failure(_parse_retry_after(resp.headers.get("Retry-After")))
+        else:
+            breaker.record_success()
+        return resp
+
+    def breaker_states(self) -> Dict[str, Dict[str, Any]]:
+        """返回每个 host 的熔断状态与下一次允许重试的时间戳。"""
+        with self._lock:
+            breakers = list(self._breakers.items())
+        return {
+            host: {"state": b.state, "failures": b.failures, "next_retry_at": b.next_retry_at}
+            for host, b in breakers
+        }
+
+    def get_json(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 10) -> Tuple[int, Any]:
+        """GET 并解析 JSON，返回 (status_code, data)。
+
+        - 命中 304 时返回 (200, 缓存的解析结果)。
+        - status >= 400 时返回 (status, None)，不更新缓存。
+        - 响应体不是合法 JSON 时抛出 ValueError。
+        """
+        headers = dict(headers or {})
+        key = (url, headers.get("Authorization", ""))
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        resp = self.get(url, headers=headers, timeout=timeout)
+        if resp.status_code == 304 and cached is not None:
+            with self._lock:
+                self._cache_hits += 1
+            return 200, cached.data
+        with self._lock:
+            self._cache_misses += 1
+        if resp.status_code >= 400:
+            return resp.status_code, None
+        data = resp.json()
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        with self._lock:
+            if etag or last_modified:
+                if key not in self._cache and len(self._cache) >= self.MAX_CACHE_ENTRIES:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[key] = CachedResponse(etag, last_modified, data)
+            else:
+                self._cache.pop(key, None)
+        return resp.status_code, data
+
+    def cache_stats(self) -> Dict[str, int]:
+        """返回条件请求缓存的命中（304）/未命中次数与缓存条目数。"""
+        with self._lock:
+            return {
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "entries": len(self._cache),
+            }
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """返回每个 host 的请求数、新建连接数与复用次数。"""
+        out: Dict[str, Dict[str, int]] = {}
+        with self._lock:
+            sessions = list(self._sessions.items())
+            counts = dict(self._request_counts)
+        for host_key, sess in sessions:
+            conns = 0
+            try:
+                adapter = sess.get_adapter(host_key)
+                pools = adapter.poolmanager.pools
+                for k in list(pools.keys()):
+                    pool = pools.get(k)
+                    if pool is not None:
+                        conns += int(getattr(pool, "num_connections", 0))
+            except Exception:
+                pass
+            reqs = counts.get(host_key, 0)
+            out[host_key] = {
+                "requests": reqs,
+                "connections": conns,
+                "reused": max(0, reqs - conns),
+            }
+        return out
+
+    def close(self) -> None:
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for sess in sessions:
+            try:
+                sess.close()
+            except Exception:
+                pass
+
+
+class FetchSnapshot(NamedTuple):
+    """一次后台刷新的不可变结果，由主线程统一提交到界面。"""
+    info: Optional[Dict[str, Any]]
+    usage: Optional[Dict[str, Any]]
+    sub_period: Optional[Tuple[datetime.date, datetime.date]]
+    cycle_spent: Optional[float]
+    cycle_limit: Optional[float]
+    error: Optional[Exception]
+    fetched_at: float
+    # 本次是否实际拉取了 user_info（TTL 未到期时沿用上次结果，日消费不会变化）
+    info_fetched: bool = False
+
+    def same_data(self, other: Optional["FetchSnapshot"]) -> bool:
+        """除时间戳外数据是否一致（用于跳过无变化的界面更新）。"""
+        if other is None or self.error is not None or other.error is not None:
+            return False
+        # 跨天时周期剩余天数等派生字段会变化，不视为一致
+        if datetime.date.fromtimestamp(self.fetched_at) != datetime.date.fromtimestamp(other.fetched_at):
+            return False
+        return self[:5] == other[:5]
+
+
+class RefreshScheduler:
+    """按数据源维护独立 TTL（带抖动），决定每次定时刷新需要拉取哪些接口。"""
+
+    SOURCES = ("user_info", "usage_stats", "subscriptions")
+
+    def __init__(self, ttls: Dict[str, float], jitter: float = 0.0):
+        self._ttls = {k: max(0.0, float(v)) for k, v in ttls.items()}
+        self._jitter = max(0.0, min(1.0, float(jitter)))
+        self._next_due: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def due(self, source: str, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            return now >= self._next_due.get(source, 0.0)
+
+    def any_due(self, now: Optional[float] = None) -> bool:
+        return any(self.due(src, now) for src in self.SOURCES)
+
+    def mark_fetched(self, source: str, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        ttl = self._ttls.get(source, 0.0)
+        if self._jitter > 0:
+            # 仅向前抖动：避免过期时刻略晚于定时器触发而被整整推迟一轮
+            ttl *= 1.0 - random.uniform(0.0, self._jitter)
+        with self._lock:
+            self._next_due[source] = now + ttl
+
+    def set_ttls(self, ttls: Dict[str, float]) -> None:
+        """更新 TTL；已安排的过期时刻不变，下次拉取后按新值计算。"""
+        with self._lock:
+            self._ttls.update({k: max(0.0, float(v)) for k, v in ttls.items()})
+
+    def invalidate(self, source: Optional[str] = None) -> None:
+        with self._lock:
+            if source is None:
+                self._next_due.clear()
+            else:
+                self._next_due.pop(source, None)
+
+
+class FairRateLimiter:
+    """按账号限速并公平排队的请求许可（多账号共享同一组连接）。
+
+    每个账号一个令牌桶（每分钟补充 rate_per_min 个，容量 burst；rate 为 0 时
+    不限速），全局最多 max_concurrent 个请求同时在途。多个账号同时等待时
+    按轮转顺序逐个发放许可，请求多的账号不会挤占其他账号。
+    """
+
+    def __init__(self, rate_per_min: float = 30, burst: float = 8, max_concurrent: int = 4):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._cond = threading.Condition()
+        self.set_rate(rate_per_min, burst)
+        self._tokens: Dict[Any, float] = {}
+        self._stamp: Dict[Any, float] = {}
+        # 账号 -> 等待中的请求（先到先得）；键的顺序即轮转顺序，发放后移到队尾
+        self._queues: "OrderedDict[Any, List[object]]" = OrderedDict()
+        self._granted: set = set()
+        self._inflight = 0
+        self.waits = 0
+        self.wait_time = 0.0
+
+    def set_rate(self, rate_per_min: float, burst: float) -> None:
+        with self._cond:
+            self.rate = max(0.0, float(rate_per_min)) / 60.0
+            self.burst = max(1.0, float(burst))
+            self._cond.notify_all()
+
+    def _refill(self, key: Any, now: float) -> float:
+        if self.rate <= 0:
+            tokens = self.burst
+        else:
+            tokens = self._tokens.get(key, self.burst)
+            tokens = min(self.burst, tokens + (now - self._stamp.get(key, now)) * self.rate)
+        self._tokens[key] = tokens
+        self._stamp[key] = now
+        return tokens
+
+    def _dispatch(self, now: float) -> Optional[float]:
+        """按轮转顺序发放许可；返回最近一个令牌补足前的秒数（无需定时唤醒时为 None）。"""
+        wake: Optional[float] = None
+        progressed = True
+        while progressed and self._queues and self._inflight < self.max_concurrent:
+            progressed, wake = False, None
+            for key in list(self._queues):
+                if self._inflight >= self.max_concurrent:
+                    break
+                tokens = self._refill(key, now)
+                if tokens < 1.0:
+                    need = (1.0 - tokens) / self.rate
+                    wake = need if wake is None else min(wake, need)
+                    continue
+                self._tokens[key] = tokens - 1.0
+                queue = self._queues[key]
+                self._granted.add(queue.pop(0))
+                self._inflight += 1
+                progressed = True
+                if queue:
+                    self._queues.move_to_end(key)
+                else:
+                    del self._queues[key]
+        return wake
+
+    def acquire(self, key: Any) -> None:
+        ticket = object()
+        t0 = time.monotonic()
+        with self._cond:
+            self._queues.setdefault(key, []).append(ticket)
+            while True:
+                wake = self._dispatch(time.monotonic())
+                if ticket in self._granted:
+                    self._granted.discard(ticket)
+                    break
+                # 本轮可能已为其他等待者发放许可
+                self._cond.notify_all()
+                self._cond.wait(timeout=wake)
+            waited = time.monotonic() - t0
+            if waited > 0.001:
+                self.waits += 1
+                self.wait_time += waited
+            self._cond.notify_all()
+
+    def release(self, key: Any) -> None:
+        with self._cond:
+            self._inflight = max(0, self._inflight - 1)
+            self._dispatch(time.monotonic())
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, key: Any) -> Iterator[None]:
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {"inflight": self._inflight, "waits": self.waits, "wait_time": round(self.wait_time, 3)}
+
+
+class AdaptivePollController:
+    """根据每日消费速度与空闲状态调整轮询间隔。
+
+    - 日消费上涨较快（按基础间隔推算将消耗日预算的 2% 以上）或已用超过 80% 时，
+      间隔降到下限；
+    - 有消费但较平缓时回到基础间隔；
+    - 数值无变化（空闲）时按 2 倍指数退避，直到上限。
+    """
+
+    FAST_BURN_FRACTION = 0.02
+    NEAR_BUDGET_RATIO = 0.8
+    BACKOFF_FACTOR = 2.0
+
+    def __init__(self, base: float, min_interval: float, max_interval: float):
+        self.min_interval = max(1.0, float(min_interval))
+        self.max_interval = max(self.min_interval, float(max_interval))
+        self.base = min(self.max_interval, max(self.min_interval, float(base)))
+        self.interval = self.base
+        self._last_spent: Optional[float] = None
+        self._last_ts: Optional[float] = None
+
+    def observe(self, daily_spent: float, daily_limit: float, now: Optional[float] = None) -> float:
+        """记录一次日消费观测值，返回新的轮询间隔（秒）。"""
+        now = time.time() if now is None else now
+        prev_spent, prev_ts = self._last_spent, self._last_ts
+        self._last_spent, self._last_ts = daily_spent, now
+        if daily_limit > 0 and daily_spent / daily_limit >= self.NEAR_BUDGET_RATIO:
+            self.interval = self.min_interval
+            return self.interval
+        if prev_spent is None or prev_ts is None or now <= prev_ts:
+            return self.interval
+        delta = daily_spent - prev_spent
+        if delta == 0:
+            self.interval = min(self.max_interval, self.interval * self.BACKOFF_FACTOR)
+        elif delta < 0:
+            # 跨天清零：回到基础间隔
+            self.interval = self.base
+        else:
+            velocity = delta / (now - prev_ts)
+            if daily_limit > 0 and velocity * self.base / daily_limit >= self.FAST_BURN_FRACTION:
+                self.interval = self.min_interval
+            else:
+                self.interval = self.base
+        return self.interval
+
+    def reset(self) -> None:
+        self.interval = self.base
+        self._last_spent = None
+        self._last_ts = None
+
+
+class UsageSample(NamedTuple):
+    """用量历史中的一条记录。"""
+    ts: float
+    account_version: str
+    daily_spent: float
+    daily_limit: float
+    monthly_spent: float
+    monthly_limit: float
+    balance: Optional[float]
+    api_calls: Optional[int]
+
+
+class UsageHistoryStore:
+    """追加写入的本地用量时间序列（SQLite）。
+
+    - 仅在数值变化时追加，平稳期不产生新记录；
+    - 每追加 COMPACT_EVERY 条执行一次压缩：RAW_RETENTION 之前的数据按小时仅保留
+      最后一条，超过 MAX_AGE 的数据删除，总行数超过 MAX_ROWS 时删除最旧记录；
+    - (account_version, ts) 上建有索引，query 为范围扫描。
+    """
+
+    RAW_RETENTION = 7 * 86400
+    MAX_AGE = 365 * 86400
+    MAX_ROWS = 200000
+    COMPACT_EVERY = 500
+
+    _FIELDS = "ts, account_version, daily_spent, daily_limit, monthly_spent, monthly_limit, balance, api_calls"
+
+    def __init__(self, path: str = HISTORY_DB_FILE):
+        self._path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._last_values: Dict[str, Tuple[Any, ...]] = {}
+        self._appends_since_compact = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            ensure_config_dir()
+            conn = sqlite3.connect(self._path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS samples ("
+                "ts REAL NOT NULL, account_version TEXT NOT NULL, "
+                "daily_spent REAL, daily_limit REAL, monthly_spent REAL, monthly_limit REAL, "
+                "balance REAL, api_calls INTEGER)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_samples_account_ts ON samples(account_version, ts)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def append(self, sample: UsageSample) -> bool:
+        """追加一条记录；与该账号上一条数值完全相同时跳过并返回 False。"""
+        values = tuple(sample[2:])
+        with self._lock:
+            if self._last_values.get(sample.account_version) == values:
+                return False
+            db = self._db()
+            db.execute(f"INSERT INTO samples ({self._FIELDS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", tuple(sample))
+            db.commit()
+            self._last_values[sample.account_version] = values
+            self._appends_since_compact += 1
+            need_compact = self._appends_since_compact >= self.COMPACT_EVERY
+        if need_compact:
+            self.compact()
+        return True
+
+    def query(self, start_ts: float, end_ts: float, account_version: Optional[str] = None) -> list[UsageSample]:
+        """返回 [start_ts, end_ts] 内的记录，按时间升序。"""
+        sql = f"SELECT {self._FIELDS} FROM samples WHERE ts >= ? AND ts <= ?"
+        args: list[Any] = [start_ts, end_ts]
+        if account_version:
+            sql += " AND account_version = ?"
+            args.append(account_version)
+        sql += " ORDER BY ts"
+        with self._lock:
+            rows = self._db().execute(sql, args).fetchall()
+        return [UsageSample(*r) for r in rows]
+
+    def latest(self, account_version: str) -> Optional[UsageSample]:
+        with self._lock:
+            row = self._db().execute(
+                f"SELECT {self._FIELDS} FROM samples WHERE account_version = ? ORDER BY ts DESC LIMIT 1",
+                (account_version,),
+            ).fetchone()
+        return UsageSample(*row) if row else None
+
+    def compact(self, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        raw_cutoff = now - self.RAW_RETENTION
+        with self._lock:
+            db = self._db()
+            db.execute("DELETE FROM samples WHERE ts < ?", (now - self.MAX_AGE,))
+            db.execute(
+                "DELETE FROM samples WHERE ts < ? AND rowid NOT IN ("
+                "SELECT MAX(rowid) FROM samples WHERE ts < ? "
+                "GROUP BY account_version, CAST(ts / 3600 AS INTEGER))",
+                (raw_cutoff, raw_cutoff),
+            )
+            (count,) = db.execute("SELECT COUNT(*) FROM samples").fetchone()
+            if count > self.MAX_ROWS:
+                db.execute(
+                    "DELETE FROM samples WHERE rowid IN (SELECT rowid FROM samples ORDER BY ts LIMIT ?)",
+                    (count - self.MAX_ROWS,),
+                )
+            db.commit()
+            self._appends_since_compact = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except Exception:
+                    pass
+                self._conn = None
+
+
+def _snapshot_to_sample(u: "UsageSnapshot", account_version: str) -> UsageSample:
+    return UsageSample(
+        u.fetched_at,
+        account_version,
+        u.daily_spent,
+        u.daily_limit,
+        u.monthly_spent,
+        u.monthly_limit,
+        u.balance,
+        u.today_calls,
+    )
+
+
+def _token_fingerprint(token: str) -> str:
+    import hashlib
+
+    return hashlib.sha256(token.strip().encode("utf-8")).hexdigest()[:16]
+
+
+def save_last_snapshot(snap: "FetchSnapshot", account_version: str, token: str) -> None:
+    """持久化最近一次成功的快照，供下次启动时先行渲染（原子写入）。"""
+    ensure_config_dir()
+    payload = {
+        "account_version": account_version,
+        "token_fp": _token_fingerprint(token),
+        "fetched_at": snap.fetched_at,
+        "info": snap.info,
+        "usage": snap.usage,
+        "sub_period": [d.isoformat() for d in snap.sub_period] if snap.sub_period else None,
+        "cycle_spent": snap.cycle_spent,
+        "cycle_limit": snap.cycle_limit,
+    }
+    _atomic_write_text(LAST_SNAPSHOT_FILE, json.dumps(payload, ensure_ascii=False))
+
+
+def load_last_snapshot(account_version: str, token: str) -> Optional["FetchSnapshot"]:
+    """读取上次保存的快照；账号类型或 Token 不一致、文件缺失或损坏时返回 None。"""
+    try:
+        with open(LAST_SNAPSHOT_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("account_version") != account_version:
+            return None
+        if data.get("token_fp") != _token_fingerprint(token):
+            return None
+        info = data.get("info")
+        if not isinstance(info, dict):
+            return None
+        sub_period = None
+        sp = data.get("sub_period")
+        if isinstance(sp, list) and len(sp) == 2:
+            sub_period = (datetime.date.fromisoformat(sp[0]), datetime.date.fromisoformat(sp[1]))
+        usage = data.get("usage")
+        return FetchSnapshot(
+            info,
+            usage if isinstance(usage, dict) else None,
+            sub_period,
+            data.get("cycle_spent"),
+            data.get("cycle_limit"),
+            None,
+            float(data.get("fetched_at") or 0.0),
+        )
+    except Exception:
+        return None
+
+
+# ---------------------------
+# 拉取流水线
+# ---------------------------
+
+
+def _http_client_from_config(cfg: Mapping[str, Any]) -> HttpClient:
+    return HttpClient(
+        pool_maxsize=cfg.get("http_pool_maxsize", DEFAULT_CONFIG["http_pool_maxsize"]),
+        retries=cfg.get("http_retries", DEFAULT_CONFIG["http_retries"]),
+        backoff_factor=cfg.get("http_backoff_factor", DEFAULT_CONFIG["http_backoff_factor"]),
+        breaker_threshold=cfg.get("breaker_failure_threshold", DEFAULT_CONFIG["breaker_failure_threshold"]),
+        breaker_base_delay=cfg.get("breaker_base_delay", DEFAULT_CONFIG["breaker_base_delay"]),
+        breaker_max_delay=cfg.get("breaker_max_delay", DEFAULT_CONFIG["breaker_max_delay"]),
+    )
+
+
+class FetchPipeline:
+    """与界面无关的数据拉取流水线。
+
+    持有共享 HTTP 客户端、并发池与 TTL 调度器；collect 在调用线程中并行请求
+    各接口并返回不可变的 FetchSnapshot，不触碰任何界面对象。
+    cfg 为配置字典的引用，调用方修改后下次拉取即生效。
+    多账号时 http/pool/limiter 由 AccountGroup 传入并共享，close 不关闭它们。
+    """
+
+    def __init__(
+        self,
+        cfg: Mapping[str, Any],
+        http: Optional[HttpClient] = None,
+        pool: Optional[ThreadPoolExecutor] = None,
+        limiter: Optional[FairRateLimiter] = None,
+    ):
+        self.cfg = cfg
+        self._owns_http = http is None
+        # 共享 HTTP 客户端：所有接口拉取复用同一组按 host 的长连接
+        self.http = http or _http_client_from_config(cfg)
+        # 刷新并发池：各接口相互独立，并行请求使总耗时约等于最慢的一个
+        self.pool = pool or ThreadPoolExecutor(max_workers=4, thread_name_prefix="packycode-fetch")
+        self.limiter = limiter
+        # 数据源 TTL 调度：定时刷新仅拉取已过期的接口，强制刷新全部拉取
+        self.scheduler = RefreshScheduler(
+            {
+                "user_info": cfg.get("ttl_user_info", DEFAULT_CONFIG["ttl_user_info"]),
+                "usage_stats": cfg.get("ttl_usage_stats", DEFAULT_CONFIG["ttl_usage_stats"]),
+                "subscriptions": cfg.get("ttl_subscriptions", DEFAULT_CONFIG["ttl_subscriptions"]),
+            },
+            jitter=cfg.get("ttl_jitter", DEFAULT_CONFIG["ttl_jitter"]),
+        )
+        self._lock = threading.Lock()
+        # 订阅接口请求合并：URL -> 在途 Future
+        self._subscription_inflight: Dict[str, Future] = {}
+
+    def close(self) -> None:
+        if self._owns_http:
+            self.pool.shutdown(wait=False)
+            self.http.close()
+
+    def _get_json(self, url: str, headers: Dict[str, str]) -> Tuple[int, Any]:
+        """经由限速器（如有）发出请求；限速按本账号（本流水线）计。"""
+        if self.limiter is None:
+            return self.http.get_json(url, headers=headers, timeout=10)
+        with self.limiter.slot(self):
+            return self.http.get_json(url, headers=headers, timeout=10)
+
+    def collect(self, prev: Optional[FetchSnapshot], force: bool = False) -> FetchSnapshot:
+        """并行拉取各接口并合并为快照。
+
+        非强制刷新时只拉取 TTL 已过期的数据源，其余沿用 prev。
+        """
+        now = time.time()
+        full = force or prev is None or prev.error is not None
+        want = {src: full or self.scheduler.due(src, now) for src in RefreshScheduler.SOURCES}
+        # 各接口互不依赖：并行发起，再合并为一次快照
+        f_info = self.pool.submit(self.fetch_user_info) if want["user_info"] else None
+        f_usage = self.pool.submit(self.fetch_usage_stats) if want["usage_stats"] else None
+        # 订阅接口：周期与周期用量共用同一次响应（域名相同时仅请求一次）
+        f_subs: Dict[str, Future] = {}
+        period_base, cycle_base = self.subscription_bases()
+        if want["subscriptions"]:
+            f_subs = {
+                b: self.pool.submit(self.fetch_active_subscription, b)
+                for b in {period_base, cycle_base}
+                if b
+            }
+        try:
+            info = f_info.result() if f_info is not None else prev.info  # type: ignore[union-attr]
+        except Exception as e:
+            return FetchSnapshot(None, None, None, None, None, e, time.time())
+        if f_info is not None:
+            self.scheduler.mark_fetched("user_info", now)
+
+        # 若为 JWT，尝试拉取使用次数统计
+        if f_usage is not None:
+            usage = _future_result_or_none(f_usage)
+            if f_usage.exception() is None:
+                self.scheduler.mark_fetched("usage_stats", now)
+        else:
+            usage = prev.usage  # type: ignore[union-attr]
+
+        if want["subscriptions"]:
+            # 订阅周期
+            period_item = _future_result_or_none(f_subs[period_base]) if period_base else None
+            sub_period = _parse_subscription_period(period_item) if period_item else None
+            # 周期用量（若接口提供，覆盖“每月”统计的已用/上限）
+            cycle_item = _future_result_or_none(f_subs[cycle_base]) if cycle_base else None
+            cycle_amt = _parse_cycle_amount(cycle_item) if cycle_item else None
+            spent, limit = cycle_amt if cycle_amt is not None else (None, None)
+            if all(f.exception() is None for f in f_subs.values()):
+                self.scheduler.mark_fetched("subscriptions", now)
+        else:
+            sub_period = prev.sub_period  # type: ignore[union-attr]
+            spent, limit = prev.cycle_spent, prev.cycle_limit  # type: ignore[union-attr]
+        return FetchSnapshot(info, usage, sub_period, spent, limit, None, time.time(), f_info is not None)
+
+    def fetch_user_info(self) -> Optional[Dict[str, Any]]:
+        token = (self.cfg.get("token") or "").strip()
+        if not token:
+            raise LocalizedError("error_no_token")
+
+        base = api_base(self.cfg.get("account_version", "shared"))
+        url = f"{base}{USER_INFO_PATH}"
+
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/json",
+            "User-Agent": "PackyCode-StatusBar/1.0",
+        }
+
+        status, data = self._get_json(url, headers)
+        if status >= 400:
+            raise LocalizedError("error_http", code=status)
+
+        # 兼容 { success, data } 或直接数据
+        if isinstance(data, dict) and "data" in data and isinstance(data["data"], dict):
+            return data["data"]
+        return data
+
+    def fetch_usage_stats(self) -> Optional[Dict[str, Any]]:
+        """Token 为 JWT 时，调用 codex 接口获取使用次数统计。
+
+        返回示例：
+        {
+          "today_usage": {"date": "YYYY-MM-DD", "api_calls": N},
+          "daily_trend": [{"date": "YYYY-MM-DD", "api_calls": M}, ...]
+        }
+        失败或不可用时返回 None。
+        """
+        token = (self.cfg.get("token") or "").strip()
+        if not _is_probable_jwt(token):
+            return None
+
+        user_id = _extract_user_id_from_jwt(token)
+        if not user_id:
+            return None
+
+        # 统一使用 codex 域（接口示例提供于该域）
+        url = f"{api_base('codex_shared')}{USAGE_STATS_PATH_TMPL.format(user_id=user_id)}"
+
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/json",
+            "User-Agent": "PackyCode-StatusBar/1.0",
+        }
+        try:
+            status, data = self._get_json(url, headers)
+        except ValueError:
+            return None
+        if status >= 400:
+            return None
+        return data
+
+    def subscription_bases(self) -> Tuple[Optional[str], Optional[str]]:
+        """返回 (周期来源域名, 周期用量来源域名)；不可用的一侧为 None。
+
+        周期起止沿用当前账号域名；周期用量仅 JWT 可用，沿用 codex 环境。
+        codex_shared 模式下两者相同，只需请求一次。
+        """
+        token = (self.cfg.get("token") or "").strip()
+        if not token:
+            return None, None
+        period_base = api_base(self.cfg.get("account_version", "shared"))
+        cycle_base = None
+        if _is_probable_jwt(token):
+            cycle_base = api_base("codex_shared")
+        return period_base, cycle_base
+
+    def fetch_active_subscription(self, base: str) -> Optional[Dict[str, Any]]:
+        """调用订阅接口并选出当前订阅（同一 URL 的并发请求合并为一次）。
+
+        - 优先选取 status == 'active' 的订阅；若无则取第一条。
+        - HTTP 失败或无数据返回 None。
+        """
+        url = f"{base}{SUBSCRIPTIONS_PATH}"
+        with self._lock:
+            fut = self._subscription_inflight.get(url)
+            owner = fut is None
+            if owner:
+                fut = Future()
+                self._subscription_inflight[url] = fut
+        if not owner:
+            return fut.result()
+        try:
+            item = self._request_active_subscription(url)
+        except Exception as e:
+            fut.set_exception(e)
+            raise
+        else:
+            fut.set_result(item)
+            return item
+        finally:
+            with self._lock:
+                self._subscription_inflight.pop(url, None)
+
+    def _request_active_subscription(self, url: str) -> Optional[Dict[str, Any]]:
+        token = (self.cfg.get("token") or "").strip()
+        headers = {
+            "Authorization": f"Bearer {token}",
+            "Accept": "application/json",
+            "User-Agent": "PackyCode-StatusBar/1.0",
+        }
+        try:
+            status, payload = self._get_json(url, headers)
+        except ValueError:
+            return None
+        if status >= 400:
+            return None
+        return _select_active_subscription(payload)
+
+
+class AccountGroup:
+    """多账号共用的拉取调度器。
+
+    所有账号共享一个 HttpClient（按 host 的连接池、ETag 缓存与熔断）、一个接口
+    并发池与一个 FairRateLimiter；每个账号保留独立的 FetchPipeline（TTL 调度与
+    订阅请求合并互不影响）。collect 将本轮到期的账号批量并行拉取。
+    主账号直接读取 cfg 中的 account_version/token，附加账号来自 cfg["accounts"]。
+    """
+
+    def __init__(self, cfg: Dict[str, Any]):
+        self.cfg = cfg
+        self.http = _http_client_from_config(cfg)
+        self.pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="packycode-fetch")
+        self.limiter = FairRateLimiter(
+            cfg.get("account_rate_per_min", DEFAULT_CONFIG["account_rate_per_min"]),
+            cfg.get("account_rate_burst", DEFAULT_CONFIG["account_rate_burst"]),
+            max_concurrent=4,
+        )
+        # 账号级批量：各账号的 collect 在此并行，其接口请求再进入共享并发池
+        self._batch = ThreadPoolExecutor(max_workers=4, thread_name_prefix="packycode-account")
+        self._lock = threading.Lock()
+        self.primary = FetchPipeline(cfg, self.http, self.pool, self.limiter)
+        self.extras: "OrderedDict[str, FetchPipeline]" = OrderedDict()
+        self._specs: Dict[str, AccountSpec] = {}
+        self.sync()
+
+    def sync(self) -> List[str]:
+        """按配置重建附加账号，返回其名称；环境与 Token 未变化的账号保留 TTL 调度状态。"""
+        specs = account_specs(self.cfg)[1:]
+        with self._lock:
+            old, self.extras = self.extras, OrderedDict()
+            for spec in specs:
+                pipe = old.get(spec.name)
+                if pipe is None or self._specs.get(spec.name) != spec:
+                    view = ChainMap({"account_version": spec.account_version, "token": spec.token}, self.cfg)
+                    pipe = FetchPipeline(view, self.http, self.pool, self.limiter)
+                self.extras[spec.name] = pipe
+            self._specs = {spec.name: spec for spec in specs}
+            return list(self.extras)
+
+    def pipelines(self) -> List[FetchPipeline]:
+        with self._lock:
+            return [self.primary, *self.extras.values()]
+
+    def any_due(self, now: Optional[float] = None) -> bool:
+        return any(p.scheduler.any_due(now) for p in self.pipelines())
+
+    def set_ttls(self, ttls: Dict[str, float]) -> None:
+        for p in self.pipelines():
+            p.scheduler.set_ttls(ttls)
+
+    def collect(
+        self,
+        prev: Optional[FetchSnapshot],
+        prev_extras: Mapping[str, FetchSnapshot],
+        force: bool = False,
+    ) -> Tuple[FetchSnapshot, Dict[str, FetchSnapshot]]:
+        """批量拉取主账号与到期的附加账号；未到期的附加账号不出现在返回结果中。"""
+        now = time.time()
+        with self._lock:
+            extras = list(self.extras.items())
+        futs = {
+            name: self._batch.submit(p.collect, prev_extras.get(name), force)
+            for name, p in extras
+            if force or p.scheduler.any_due(now)
+        }
+        snap = self.primary.collect(prev, force)
+        out: Dict[str, FetchSnapshot] = {}
+        for name, fut in futs.items():
+            try:
+                out[name] = fut.result()
+            except Exception as e:
+                out[name] = FetchSnapshot(None, None, None, None, None, e, time.time())
+        return snap, out
+
+    def close(self) -> None:
+        self._batch.shutdown(wait=False)
+        self.pool.shutdown(wait=False)
+        self.http.close()
+
+
+# ---------------------------
+# 用量模型与文本格式化
+# ---------------------------
+
+
+class UsageSnapshot:
+    """一次刷新解析后的用量数据，含百分比、剩余额度与周期天数等派生字段。
+
+    每次刷新在后台线程构建一次，状态栏标题、菜单与圆环均只读取本对象，
+    不再各自解析原始接口字典。周期用量覆盖（订阅接口返回的周期已用/上限）
+    在此处统一应用到 monthly_*。
+    """
+
+    __slots__ = (
+        "fetched_at",
+        "daily_limit",
+        "daily_spent",
+        "daily_remaining",
+        "d_pct",
+        "monthly_limit",
+        "monthly_spent",
+        "monthly_remaining",
+        "m_pct",
+        "balance",
+        "today_calls",
+        "span_total",
+        "span_avg",
+        "cycle_start",
+        "cycle_end",
+        "cycle_total_days",
+        "elapsed_days",
+        "days_left",
+    )
+
+    def __init__(
+        self,
+        info: Dict[str, Any],
+        usage: Optional[Dict[str, Any]] = None,
+        sub_period: Optional[Tuple[datetime.date, datetime.date]] = None,
+        cycle_spent: Optional[float] = None,
+        cycle_limit: Optional[float] = None,
+        fetched_at: Optional[float] = None,
+        today: Optional[datetime.date] = None,
+    ):
+        self.fetched_at = time.time() if fetched_at is None else fetched_at
+        # 解析字段（参考 packycode-cost UserApiResponse 与转换逻辑）
+        self.daily_limit = parse_float(info.get("daily_budget_usd"))
+        self.daily_spent = parse_float(info.get("daily_spent_usd"))
+        self.monthly_limit = parse_float(info.get("monthly_budget_usd"))
+        self.monthly_spent = parse_float(info.get("monthly_spent_usd"))
+        # 周期覆盖：若订阅接口返回周期用量/限额，则应用到“月度/周期”展示
+        if cycle_spent is not None:
+            self.monthly_spent = float(cycle_spent)
+        if cycle_limit is not None:
+            self.monthly_limit = float(cycle_limit)
+        balance_str = info.get("balance_usd")
+        self.balance = parse_float(balance_str) if balance_str is not None else None
+
+        self.daily_remaining = max(0.0, self.daily_limit - self.daily_spent) if self.daily_limit else 0.0
+        self.monthly_remaining = max(0.0, self.monthly_limit - self.monthly_spent) if self.monthly_limit else 0.0
+        self.d_pct = min(100.0, (self.daily_spent / self.daily_limit) * 100.0) if self.daily_limit > 0 else 0.0
+        self.m_pct = min(100.0, (self.monthly_spent / self.monthly_limit) * 100.0) if self.monthly_limit > 0 else 0.0
+
+        # 使用次数接口（若为 JWT）
+        self.today_calls: Optional[int] = None
+        self.span_total: Optional[int] = None
+        self.span_avg: Optional[int] = None
+        if usage and isinstance(usage, dict):
+            self._parse_usage(usage)
+
+        # 周期起止：优先订阅 current_period_start/end；其次 plan_expires_at；否则按自然月
+        today = today or datetime.date.today()
+        self.cycle_start, self.cycle_end = _cycle_bounds(info, sub_period, today)
+        self.cycle_total_days = (self.cycle_end - self.cycle_start).days + 1
+        # 将 today 钳制到周期范围内用于“已用天数”
+        today_clamped = min(max(today, self.cycle_start), self.cycle_end)
+        self.elapsed_days = (today_clamped - self.cycle_start).days + 1
+        self.days_left = (self.cycle_end - today).days + 1  # 含今天，可能为<=0
+
+    @classmethod
+    def from_fetch(cls, snap: "FetchSnapshot", today: Optional[datetime.date] = None) -> Optional["UsageSnapshot"]:
+        """由拉取快照构建；错误或无数据时返回 None。"""
+        if snap.error is not None or not snap.info:
+            return None
+        return cls(snap.info, snap.usage, snap.sub_period, snap.cycle_spent, snap.cycle_limit, snap.fetched_at, today)
+
+    def _parse_usage(self, usage: Dict[str, Any]) -> None:
+        try:
+            tu = usage.get("today_usage") or {}
+            if tu and tu.get("api_calls") is not None:
+                self.today_calls = int(tu.get("api_calls"))
+        except Exception:
+            self.today_calls = None
+        try:
+            trend = usage.get("daily_trend") or []
+            if not isinstance(trend, list) or not trend:
+                return
+            # 使用最近 7 天的数据计算调用总数与日均
+            normalized = []
+            for it in trend:
+                if not isinstance(it, dict):
+                    continue
+                try:
+                    calls = int(it.get("api_calls", 0))
+                except Exception:
+                    continue
+                normalized.append((str(it.get("date") or ""), calls))
+            # 按日期倒序取最近 7 条（接口可能返回超过 7 天的历史）
+            normalized.sort(key=lambda x: x[0], reverse=True)
+            recent = normalized[:7]
+            if recent:
+                self.span_total = sum(calls for _date, calls in recent)
+                self.span_avg = round_half_up(self.span_total / len(recent))
+        except Exception:
+            self.span_total = None
+            self.span_avg = None
+
+    def ring_percent(self, source: str) -> float:
+        return self.m_pct if source == "monthly" else self.d_pct
+
+
+def _cycle_bounds(
+    info: Dict[str, Any],
+    sub_period: Optional[Tuple[datetime.date, datetime.date]],
+    today: datetime.date,
+) -> Tuple[datetime.date, datetime.date]:
+    if sub_period and isinstance(sub_period, tuple):
+        return sub_period
+    exp_str = (info.get("plan_expires_at") or "").strip() if isinstance(info, dict) else ""
+    if exp_str:
+        try:
+            iso = exp_str.replace("Z", "+00:00")
+            cycle_end = datetime.datetime.fromisoformat(iso).date()
+            return cycle_end.replace(day=1), cycle_end
+        except Exception:
+            pass
+    total_days_fallback = calendar.monthrange(today.year, today.month)[1]
+    return today.replace(day=1), today.replace(day=total_days_fallback)
+
+
+class MenuView(NamedTuple):
+    """一次渲染所需的状态栏与菜单文本；值为 None 的字段保持界面现状。"""
+    status: str
+    title: str
+    daily: Optional[str]
+    requests: str
+    usage_span: str
+    monthly: Optional[str]
+    cycle: str
+    renew: str
+    show_renew: bool
+    balance: Optional[str]
+    d_pct: Optional[float]
+    m_pct: Optional[float]
+
+
+def build_menu_view(cfg: Mapping[str, Any], u: Optional[UsageSnapshot]) -> MenuView:
+    hidden = bool(cfg.get("hidden"))
+    if u is None:
+        return MenuView(
+            status=_t("status_no_data"),
+            title="" if hidden else _t("title_no_data"),
+            daily=None,
+            requests=_t("requests_prefix", val="-"),
+            usage_span=_t("usage_span_prefix", val="-"),
+            monthly=None,
+            cycle=_t("cycle_placeholder"),
+            renew=_t("renew_placeholder"),
+            show_renew=False,
+            balance=None,
+            d_pct=None,
+            m_pct=None,
+        )
+
+    daily = (
+        _t("daily_full", spent=f"{u.daily_spent:.2f}", limit=f"{u.daily_limit:.2f}", remain=f"{u.daily_remaining:.2f}")
+        if u.daily_limit > 0
+        else _t("daily_no_limit", spent=f"{u.daily_spent:.2f}")
+    )
+    monthly = (
+        _t("monthly_full", spent=f"{u.monthly_spent:.2f}", limit=f"{u.monthly_limit:.2f}", remain=f"{u.monthly_remaining:.2f}")
+        if u.monthly_limit > 0
+        else _t("monthly_no_limit", spent=f"{u.monthly_spent:.2f}")
+    )
+    if u.span_total is not None:
+        usage_span = _t("usage_span_prefix", val=_t("usage_span_desc", total=u.span_total, avg=u.span_avg))
+    else:
+        usage_span = _t("usage_span_placeholder")
+
+    start_str = f"{u.cycle_start.month:02d}.{u.cycle_start.day:02d}"
+    end_str = f"{u.cycle_end.month:02d}.{u.cycle_end.day:02d}"
+    if u.days_left <= 0:
+        cycle = _t("cycle_expired", start=start_str, end=end_str)
+    else:
+        cycle = _t("cycle_remaining", start=start_str, end=end_str, days=u.days_left)
+
+    # 续费提醒：到期前 3 天显示；其他时间不显示
+    if u.days_left <= 0:
+        renew_text = _t("renew_expired")
+    elif u.days_left <= 3:
+        renew_text = _t("renew_soon", days=u.days_left)
+    else:
+        renew_text = "-"
+
+    return MenuView(
+        status=_t("status_ok"),
+        title="" if hidden else make_title(cfg, u),
+        daily=daily,
+        requests=_t("requests_prefix", val=u.today_calls if u.today_calls is not None else "-"),
+        usage_span=usage_span,
+        monthly=monthly,
+        cycle=cycle,
+        renew=_t("renew_prefix", text=renew_text),
+        show_renew=u.days_left <= 3,
+        balance=_t("balance_prefix", val=fmt_money(u.balance)) if u.balance is not None else _t("balance_placeholder"),
+        d_pct=u.d_pct,
+        m_pct=u.m_pct,
+    )
+
+
+def build_error_view(cfg: Mapping[str, Any], err: Exception | str) -> MenuView:
+    return MenuView(
+        status=_t("status_error_prefix", err=_format_error(err)),
+        title="" if cfg.get("hidden") else _t("title_error"),
+        daily=None,
+        requests=_t("requests_prefix", val="-"),
+        usage_span=_t("usage_span_placeholder"),
+        monthly=None,
+        cycle=_t("cycle_placeholder"),
+        renew=_t("renew_placeholder"),
+        show_renew=False,
+        balance=None,
+        d_pct=None,
+        m_pct=None,
+    )
+
+
+def make_title(cfg: Mapping[str, Any], u: UsageSnapshot) -> str:
+    ctx = {
+        "d_spent": f"{u.daily_spent:.1f}",
+        "d_limit": f"{u.daily_limit:.0f}",
+        "d_pct": f"{u.d_pct:.0f}",
+        "m_spent": f"{u.monthly_spent:.1f}",
+        "m_limit": f"{u.monthly_limit:.0f}",
+        "m_pct": f"{u.m_pct:.0f}",
+        "bal": f"{u.balance:.2f}" if u.balance is not None else "-",
+        "d_req": str(u.today_calls) if u.today_calls is not None else "-",
+    }
+
+    mode = cfg.get("title_mode", "percent")
+    include_requests = bool(cfg.get("title_include_requests")) and u.today_calls is not None
+    if mode == "custom":
+        tpl = cfg.get("title_custom") or DEFAULT_CONFIG["title_custom"]
+        title = _safe_format_template(tpl, ctx)
+        if include_requests and "{d_req}" not in tpl:
+            title = f"{title} | {_t('title_req_label')} {ctx['d_req']}"
+        return title
+    # 缺省/兜底：百分比样式
+    title = f"D {ctx['d_pct']}% | M {ctx['m_pct']}%"
+    if include_requests:
+        title = f"{title} | {_t('title_req_label')} {ctx['d_req']}"
+    return title
+
+
+def make_accounts_title(
+    cfg: Mapping[str, Any],
+    items: List[Tuple[str, Optional[UsageSnapshot]]],
+    primary_title: str,
+) -> str:
+    """多账号时的状态栏标题；items 首项为主账号，无数据或出错的账号为 None。
+
+    accounts_title 为 primary 或只有一个账号时沿用主账号标题；max 取各账号
+    最高的日/周期百分比；each 逐账号显示日用量百分比，如 "shared 42% · work 7%"。
+    """
+    if cfg.get("hidden"):
+        return ""
+    mode = cfg.get("accounts_title", DEFAULT_CONFIG["accounts_title"])
+    if len(items) <= 1 or mode == "primary":
+        return primary_title
+    if mode == "max":
+        usages = [u for _name, u in items if u is not None]
+        if not usages:
+            return primary_title
+        return f"D {max(u.d_pct for u in usages):.0f}% | M {max(u.m_pct for u in usages):.0f}%"
+    return " · ".join(f"{name} {u.d_pct:.0f}%" if u is not None else f"{name} -" for name, u in items)
+
+
+def account_section_title(
+    cfg: Mapping[str, Any], name: str, u: Optional[UsageSnapshot], err: Optional[Exception]
+) -> str:
+    """附加账号菜单分组的标题行：账号名 + 该账号的标题文本。"""
+    if err is not None:
+        return f"{name} · {_t('title_error')}"
+    if u is None:
+        return f"{name} · {_t('title_no_data')}"
+    return f"{name} · {make_title(cfg, u)}"
+
+
+def compute_ring_text(cfg: Dict[str, Any], percent: int, u: Optional[UsageSnapshot]) -> str:
+    """根据当前配置与数据，计算圆环内部需显示的文本。如果未启用则返回空串。"""
+    try:
+        if not bool(cfg.get("ring_text_enabled", False)):
+            return ""
+        src = (cfg.get("ring_source") or "daily").lower()
+        mode_txt = (cfg.get("ring_text_mode") or "percent").lower()
+        if mode_txt == "calls":
+            calls = u.today_calls if u is not None else None
+            text = str(calls) if calls is not None else "-"
+        elif mode_txt == "spent":
+            # 周期用量已在 UsageSnapshot 中覆盖到 monthly_spent
+            v = None if u is None else (u.monthly_spent if src == "monthly" else u.daily_spent)
+            if v is None:
+                text = "-"
+            elif v >= 1000:
+                text = "999+"
+            elif v >= 10:
+                text = f"{int(v):d}"
+            else:
+                text = f"{v:.1f}"
+        else:
+            val = int(percent)
+            show_pct = bool(cfg.get("ring_text_percent_sign", True))
+            text = f"{val}%" if show_pct else f"{val}"
+        if bool(cfg.get("ring_text_show_label", False)):
+            prefix = "D" if src != "monthly" else "M"
+            text = f"{prefix} {text}"
+        return text
+    except Exception:
+        return ""
+
+
+def token_status(token: str, now: Optional[float] = None) -> Tuple[str, bool]:
+    """返回 (Token 到期信息文本, 是否已过期)；非 JWT 或无 exp 时返回占位文本。"""
+    try:
+        token = (token or "").strip()
+        if not token or not _is_probable_jwt(token):
+            return _t("token_placeholder"), False
+        exp = _extract_exp_from_jwt(token)
+        if not exp:
+            return _t("token_placeholder"), False
+        # 本地时间展示
+        dt_local = datetime.datetime.fromtimestamp(exp)
+        remaining = int(exp - (time.time() if now is None else now))
+        if remaining <= 0:
+            return _t("token_expired_label", date=dt_local.strftime('%Y-%m-%d %H:%M')), True
+        return _t(
+            "token_valid_until",
+            date=dt_local.strftime('%Y-%m-%d %H:%M'),
+            remain=_fmt_remaining(remaining),
+        ), False
+    except Exception:
+        return _t("token_placeholder"), False
+
+
+def _future_result_or_none(fut: Future) -> Any:
+    """取并行任务结果；任务失败时返回 None（可选数据源不影响主流程）。"""
+    try:
+        return fut.result()
+    except Exception:
+        return None
+
+
+def _select_active_subscription(payload: Any) -> Optional[Dict[str, Any]]:
+    """从订阅列表响应中选出当前订阅：优先 status == 'active'，否则取第一条。"""
+    items = payload.get("data") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        return None
+    for it in items:
+        if isinstance(it, dict) and it.get("status") == "active":
+            return it
+    return items[0] if isinstance(items[0], dict) else None
+
+
+def _parse_subscription_period(sub: Dict[str, Any]) -> Optional[Tuple[datetime.date, datetime.date]]:
+    """返回 (current_period_start_date, current_period_end_date)；字段缺失返回 None。"""
+    try:
+        start_s = (sub.get("current_period_start") or "").replace("Z", "+00:00")
+        end_s = (sub.get("current_period_end") or "").replace("Z", "+00:00")
+        if not start_s or not end_s:
+            return None
+        ds = datetime.datetime.fromisoformat(start_s).date()
+        de = datetime.datetime.fromisoformat(end_s).date()
+        return (ds, de)
+    except Exception:
+        return None
+
+
+def _parse_cycle_amount(sub: Dict[str, Any]) -> Optional[Tuple[Optional[float], Optional[float]]]:
+    """返回当前周期的 (spent_usd, limit_usd)；若订阅无相关字段则返回 None。"""
+    def _get_float(d: Dict[str, Any], keys: list[str]) -> Optional[float]:
+        for k in keys:
+            if k in d and d[k] is not None:
+                try:
+                    return float(d[k])
+                except Exception:
+                    pass
+        return None
+
+    # 常见字段名猜测：尽量只取“当前周期”的字段
+    spent = _get_float(sub, [
+        "current_period_spent_usd",
+        "current_period_spent",
+        "period_spent_usd",
+        "period_spent",
+    ])
+    limit = _get_float(sub, [
+        "current_period_budget_usd",
+        "current_period_limit_usd",
+        "period_budget_usd",
+        "period_limit_usd",
+    ])
+    if spent is None and limit is None:
+        return None
+    return (spent, limit)
+
+
+def _safe_format_template(tpl: str, ctx: Dict[str, str]) -> str:
+    # 仅替换允许的键，避免 KeyError
+    out = tpl
+    for k, v in ctx.items():
+        out = out.replace("{" + k + "}", v)
+    # 简单清理多余空格
+    return " ".join(out.split())
+
+
+def _is_probable_jwt(token: str) -> bool:
+    parts = token.split(".")
+    if len(parts) != 3:
+        return False
+    try:
+        for i in (0, 1):
+            p = parts[i]
+            pad = '=' * ((4 - len(p) % 4) % 4)
+            base64.urlsafe_b64decode((p + pad).encode("utf-8"))
+        return True
+    except Exception:
+        return False
+
+
+def _extract_user_id_from_jwt(token: str) -> Optional[str]:
+    try:
+        parts = token.split(".")
+        if len(parts) != 3:
+            return None
+        payload_b64 = parts[1]
+        pad = '=' * ((4 - len(payload_b64) % 4) % 4)
+        payload_json = base64.urlsafe_b64decode((payload_b64 + pad).encode("utf-8")).decode("utf-8")
+        payload = json.loads(payload_json)
+        uid = payload.get("user_id") or payload.get("sub")
+        return uid if isinstance(uid, str) and uid else None
+    except Exception:
+        return None
+
+
+def _extract_exp_from_jwt(token: str) -> Optional[int]:
+    try:
+        parts = token.split(".")
+        if len(parts) != 3:
+            return None
+        payload_b64 = parts[1]
+        pad = '=' * ((4 - len(payload_b64) % 4) % 4)
+        payload_json = base64.urlsafe_b64decode((payload_b64 + pad).encode("utf-8")).decode("utf-8")
+        payload = json.loads(payload_json)
+        exp = payload.get("exp")
+        return int(exp) if exp is not None else None
+    except Exception:
+        return None
+
+
+def _fmt_remaining(sec: int) -> str:
+    try:
+        if sec <= 0:
+            return _t("rem_expired")
+        days = sec // 86400
+        sec %= 86400
+        hours = sec // 3600
+        sec %= 3600
+        minutes = sec // 60
+        if days > 0:
+            return _t("rem_days_hours", days=days, hours=hours)
+        if hours > 0:
+            return _t("rem_hours_minutes", hours=hours, minutes=minutes)
+        return _t("rem_minutes", minutes=minutes)
+    except Exception:
+        return "-"
+
+
+# ---------------------------
+# 命令行（无界面）入口
+# ---------------------------
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="packycode_core",
+        description="无界面拉取一次 PackyCode 用量，输出与状态栏一致的标题与菜单文本。",
+    )
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出")
+    parser.add_argument("--base-url", help="将所有账号环境的 API 指向该地址（如本地桩服务）")
+    parser.add_argument("--token", help="覆盖配置中的 Token")
+    parser.add_argument("--account", choices=sorted(ACCOUNT_ENV), help="覆盖配置中的账号类型")
+    args = parser.parse_args(argv)
+
+    if args.base_url:
+        os.environ["PACKYCODE_API_BASE"] = args.base_url
+    cfg = load_config()
+    if args.token is not None:
+        cfg["token"] = args.token
+    if args.account:
+        cfg["account_version"] = args.account
+    set_current_language(cfg.get("language", LANG_ZH_CN))
+
+    pipeline = FetchPipeline(cfg)
+    try:
+        snap = pipeline.collect(None, force=True)
+    finally:
+        pipeline.close()
+    if snap.error is not None:
+        view = build_error_view(cfg, snap.error)
+    else:
+        view = build_menu_view(cfg, UsageSnapshot.from_fetch(snap))
+    token_text, _expired = token_status(cfg.get("token") or "")
+
+    if args.json:
+        out = view._asdict()
+        out["token"] = token_text
+        out["last_update"] = _t("last_update_prefix", time=now_str())
+        print(json.dumps(out, ensure_ascii=False, indent=2))
+    else:
+        lines = [view.title or "-", view.status]
+        for text in (view.daily, view.requests, view.usage_span, view.monthly, view.cycle):
+            if text is not None:
+                lines.append(text)
+        if view.show_renew:
+            lines.append(view.renew)
+        if view.balance is not None:
+            lines.append(view.balance)
+        lines.append(token_text)
+        lines.append(_t("last_update_prefix", time=now_str()))
+        print("\n".join(lines))
+    return 1 if snap.error is not None else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1010 @@
+"""在线更新的界面无关部分：可续传、可分段并行的下载引擎、增量更新与发布检查。
+
+不依赖 rumps/AppKit；main.py 在后台线程调用，并把进度投递回主线程。
+- 大块缓冲读写（默认 1 MiB），按偏移直接写入预分配的 .part 文件；
+- 中断后保留 .part 与进度文件（.part.json），下次以 HTTP Range + If-Range 续传；
+  服务端文件已变化时自动从头下载；
+- 服务端支持 Range 且文件足够大时，可拆分为多个分段并行下载；
+- 下载过程中按偏移顺序增量计算 SHA-256，完成后无需再读一遍文件；
+- 增量更新：发布时为更新包生成逐文件清单（哈希、权限及其在 zip 中的数据偏移），
+  客户端与已安装的 .app 比对后只按 Range 取回变化文件的压缩数据，其余文件从已安装版本
+  硬链接（或复制），组装完成后按清单整体校验；任何一步失败由调用方回退到完整下载；
+- 发布检查：以 ETag 条件请求查询 GitHub 最新发布，结果与附件列表缓存在本地，
+  菜单操作直接读缓存。
+
+命令行：
+
+    python3 packycode_update.py download URL -o update.zip [--segments 4] [--sha256 HEX]
+    python3 packycode_update.py manifest PackyCode-macOS.zip -o PackyCode-macOS.manifest.json
+    python3 packycode_update.py delta MANIFEST_URL ZIP_URL --app PackyCode.app -o staged/PackyCode.app
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import struct
+import sys
+import threading
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from packycode_core import CONFIG_DIR, _atomic_write_text, _t
+
+USER_AGENT = "PackyCode-StatusBar/1.0"
+# 更新包下载目录：固定位置，便于中断后续传
+UPDATE_CACHE_DIR = os.path.join(CONFIG_DIR, "updates")
+# 最新发布信息缓存（含 ETag 与附件列表）
+RELEASE_CACHE_PATH = os.path.join(CONFIG_DIR, "release_cache.json")
+DOWNLOAD_BUFFER = 1 << 20  # 每次读取/写入 1 MiB
+MIN_SEGMENT_SIZE = 4 << 20  # 每个并行分段至少 4 MiB，更小的文件不分段
+PROGRESS_INTERVAL = 0.1  # 进度回调的最小间隔（秒）
+STATE_INTERVAL = 1.0  # 进度文件的最小写入间隔（秒）
+MANIFEST_FORMAT = 1
+DELTA_MERGE_GAP = 256 << 10  # 相距不超过 256 KiB 的变化文件合并为一个 Range 请求
+DELTA_MAX_SPAN = 16 << 20  # 合并后的单个请求不超过 16 MiB
+
+# progress(已下载字节数, 总字节数|None)；在下载线程中调用，需自行投递到界面线程
+ProgressCallback = Callable[[int, Optional[int]], None]
+
+
+class DownloadError(RuntimeError):
+    """下载失败；已下载的部分保留在 .part 文件中，下次调用时续传。"""
+
+
+class ChecksumMismatch(DownloadError):
+    def __init__(self, expected: str, actual: str):
+        self.expected = expected
+        self.actual = actual
+        super().__init__(f"SHA256 mismatch: expected {expected}, got {actual}")
+
+
+class DownloadCancelled(DownloadError):
+    pass
+
+
+class DeltaError(DownloadError):
+    """增量更新不可用（无清单、不支持 Range 等）或组装结果与清单不符；调用方应回退到完整下载。"""
+
+
+class _Restart(Exception):
+    """服务端文件已变化（If-Range 不匹配），需丢弃已下载部分从头开始。"""
+
+
+class DownloadResult(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+    resumed_bytes: int  # 本次沿用 .part 中已有数据（未重新下载）的字节数
+    segments: int
+
+
+class DeltaResult(NamedTuple):
+    path: str
+    fetched_files: int  # 从更新包取回的文件数
+    reused_files: int  # 沿用已安装版本的文件数（含符号链接）
+    fetched_bytes: int  # 实际请求的字节数（压缩数据及合并请求中的间隙）
+    zip_size: int  # 完整更新包大小，便于对比
+
+
+class _OrderedHasher:
+    """按文件偏移顺序增量计算 SHA-256。
+
+    并行分段乱序到达的数据先暂存在内存（超过上限时只记录区间），哈希前沿到达
+    时再送入；续传时已在磁盘上的部分登记为区间，届时从文件读回一次。
+    """
+
+    def __init__(self, fd: int, max_pending: int = 64 << 20):
+        self._fd = fd
+        self._h = hashlib.sha256()
+        self.pos = 0
+        # 偏移 -> (长度, 数据|None)；None 表示需从文件读回
+        self._pending: Dict[int, Tuple[int, Optional[bytes]]] = {}
+        self._pending_bytes = 0
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+
+    def on_disk(self, offset: int, length: int) -> None:
+        if length > 0:
+            self._add(offset, length, None)
+
+    def feed(self, offset: int, data: bytes) -> None:
+        self._add(offset, len(data), data)
+
+    def _add(self, offset: int, length: int, data: Optional[bytes]) -> None:
+        with self._lock:
+            if offset == self.pos and data is not None:
+                self._h.update(data)
+                self.pos += length
+            else:
+                if data is not None and self._pending_bytes + length > self._max_pending:
+                    data = None
+                if data is not None:
+                    self._pending_bytes += length
+                self._pending[offset] = (length, data)
+            self._drain()
+
+    def _drain(self) -> None:
+        while self.pos in self._pending:
+            length, data = self._pending.pop(self.pos)
+            if data is not None:
+                self._pending_bytes -= length
+                self._h.update(data)
+            else:
+                end = self.pos + length
+                off = self.pos
+                while off < end:
+                    chunk = os.pread(self._fd, min(DOWNLOAD_BUFFER, end - off), off)
+                    if not chunk:
+                        raise DownloadError("partial file is shorter than recorded progress")
+                    self._h.update(chunk)
+                    off += len(chunk)
+            self.pos += length
+
+    def hexdigest(self) -> str:
+        with self._lock:
+            return self._h.hexdigest()
+
+
+class _Progress:
+    def __init__(self, total: Optional[int], done: int, callback: Optional[ProgressCallback]):
+        self.total = total
+        self.done = done
+        self._callback = callback
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, n: int) -> None:
+        with self._lock:
+            self.done += n
+            now = time.monotonic()
+            if self._callback is None or now - self._last < PROGRESS_INTERVAL:
+                return
+            self._last = now
+            done, total = self.done, self.total
+        self._callback(done, total)
+
+    def report(self) -> None:
+        if self._callback is not None:
+            self._callback(self.done, self.total)
+
+
+def _make_session(pool_size: int) -> requests.Session:
+    sess = requests.Session()
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=max(1, pool_size))
+    sess.mount("https://", adapter)
+    sess.mount("http://", adapter)
+    return sess
+
+
+def _headers(extra: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    # 禁止传输压缩：Range 偏移针对原始字节
+    headers = {"User-Agent": USER_AGENT, "Accept-Encoding": "identity"}
+    headers.update(extra or {})
+    return headers
+
+
+def _probe(sess: requests.Session, url: str, timeout: float) -> Tuple[Optional[int], Optional[str], bool]:
+    """请求首字节，返回 (总大小|None, 校验器 ETag/Last-Modified, 是否支持 Range)。"""
+    with sess.get(url, headers=_headers({"Range": "bytes=0-0"}), stream=True, timeout=timeout) as r:
+        if r.status_code >= 400:
+            raise DownloadError(_t("error_http", code=r.status_code))
+        validator = r.headers.get("ETag") or r.headers.get("Last-Modified")
+        if r.status_code == 206:
+            m = re.match(r"bytes\s+\d+-\d+/(\d+)", r.headers.get("Content-Range") or "")
+            if m:
+                return int(m.group(1)), validator, True
+            return None, validator, False
+        length = r.headers.get("Content-Length")
+        return (int(length) if length and length.isdigit() else None), validator, False
+
+
+def _split(size: int, n: int) -> List[List[Any]]:
+    step = -(-size // n)
+    return [[start, min(size, start + step), 0] for start in range(0, size, step)]
+
+
+def _load_state(meta_path: str, part_path: str, url: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("url") != url or not state.get("ranged") or not os.path.exists(part_path):
+            return None
+        if os.path.getsize(part_path) != state["size"]:
+            return None
+        segs = state["segments"]
+        if not all(0 <= seg[2] <= seg[1] - seg[0] for seg in segs):
+            return None
+        return state
+    except Exception:
+        return None
+
+
+def _remove(*paths: str) -> None:
+    for p in paths:
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+
+def download(
+    url: str,
+    dest: str,
+    expected_sha256: Optional[str] = None,
+    segments: int = 1,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[threading.Event] = None,
+    session: Optional[requests.Session] = None,
+    buffer_size: int = DOWNLOAD_BUFFER,
+    timeout: float = 30,
+    retries: int = 3,
+) -> DownloadResult:
+    """下载 url 到 dest，边下载边计算 SHA-256，返回 DownloadResult。
+
+    segments > 1 且服务端支持 Range 时按大小拆分并行下载（每段至少 MIN_SEGMENT_SIZE）。
+    失败或取消时保留 dest.part 与 dest.part.json，再次调用同一 url 即续传；
+    expected_sha256 不匹配时删除已下载内容并抛出 ChecksumMismatch。
+    """
+    sess = session or _make_session(segments)
+    try:
+        try:
+            return _download(sess, url, dest, expected_sha256, segments, progress, cancel, buffer_size, timeout, retries)
+        except _Restart:
+            _remove(dest + ".part", dest + ".part.json")
+            return _download(sess, url, dest, expected_sha256, segments, progress, cancel, buffer_size, timeout, retries)
+    finally:
+        if session is None:
+            sess.close()
+
+
+def _download(
+    sess: requests.Session,
+    url: str,
+    dest: str,
+    expected_sha256: Optional[str],
+    segments: int,
+    progress: Optional[ProgressCallback],
+    cancel: Optional[threading.Event],
+    buffer_size: int,
+    timeout: float,
+    retries: int,
+) -> DownloadResult:
+    part, meta_path = dest + ".part", dest + ".part.json"
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    state = _load_state(meta_path, part, url)
+    if state is None:
+        size, validator, ranged = _probe(sess, url, timeout)
+        ranged = ranged and size is not None
+        if ranged:
+            n = max(1, min(int(segments), size // MIN_SEGMENT_SIZE))  # type: ignore[operator]
+            segs = _split(size, n) if size else [[0, 0, 0]]  # type: ignore[arg-type]
+        else:
+            # 不支持 Range：单段顺序下载，无法续传
+            segs = [[0, None, 0]]
+        state = {"url": url, "size": size if ranged else None, "validator": validator, "ranged": ranged, "segments": segs}
+        with open(part, "wb") as f:
+            if ranged:
+                f.truncate(size)
+    segs = state["segments"]
+    resumed = sum(seg[2] for seg in segs)
+
+    state_lock = threading.Lock()
+    last_save = [0.0]
+
+    def save_state(force: bool = False) -> None:
+        if not state["ranged"]:
+            return
+        with state_lock:
+            now = time.monotonic()
+            if not force and now - last_save[0] < STATE_INTERVAL:
+                return
+            last_save[0] = now
+            _atomic_write_text(meta_path, json.dumps(state))
+
+    fd = os.open(part, os.O_RDWR)
+    try:
+        hasher = _OrderedHasher(fd)
+        for seg in segs:
+            hasher.on_disk(seg[0], seg[2])
+        tracker = _Progress(state["size"], resumed, progress)
+        tracker.report()
+        abort = threading.Event()
+        todo = [seg for seg in segs if seg[1] is None or seg[2] < seg[1] - seg[0]]
+
+        def run(seg: List[Any]) -> None:
+            _fetch_segment(
+                sess, url, fd, seg, state, hasher, tracker, save_state,
+                buffer_size, timeout, retries, cancel, abort,
+            )
+
+        try:
+            if len(todo) <= 1:
+                for seg in todo:
+                    run(seg)
+            else:
+                with ThreadPoolExecutor(max_workers=len(todo), thread_name_prefix="packycode-download") as pool:
+                    futs = [pool.submit(run, seg) for seg in todo]
+                    first: Optional[BaseException] = None
+                    for fut in futs:
+                        try:
+                            fut.result()
+                        except BaseException as e:
+                            abort.set()
+                            if first is None or isinstance(first, DownloadCancelled):
+                                first = e
+                    if first is not None:
+                        raise first
+        except _Restart:
+            raise
+        except BaseException:
+            if state["ranged"]:
+                save_state(force=True)
+            else:
+                _remove(part, meta_path)
+            raise
+        size = state["size"] if state["size"] is not None else segs[0][2]
+        if hasher.pos != size:
+            raise DownloadError("download incomplete")
+        digest = hasher.hexdigest()
+    finally:
+        os.close(fd)
+    tracker.report()
+    if expected_sha256 and digest != expected_sha256.lower():
+        _remove(part, meta_path)
+        raise ChecksumMismatch(expected_sha256.lower(), digest)
+    os.replace(part, dest)
+    _remove(meta_path)
+    return DownloadResult(dest, digest, size, resumed, len(segs))
+
+
+def _fetch_segment(
+    sess: requests.Session,
+    url: str,
+    fd: int,
+    seg: List[Any],
+    state: Dict[str, Any],
+    hasher: _OrderedHasher,
+    tracker: _Progress,
+    save_state: Callable[..., None],
+    buffer_size: int,
+    timeout: float,
+    retries: int,
+    cancel: Optional[threading.Event],
+    abort: threading.Event,
+) -> None:
+    """下载一个分段 [start, end)；seg[2] 为已完成字节数，随写入推进。网络错误时从断点重试。"""
+    attempt = 0
+    while seg[1] is None or seg[2] < seg[1] - seg[0]:
+        offset = seg[0] + seg[2]
+        extra: Dict[str, str] = {}
+        if state["ranged"]:
+            extra["Range"] = f"bytes={offset}-{seg[1] - 1}"
+            if state.get("validator"):
+                extra["If-Range"] = state["validator"]
+        progressed = False
+        try:
+            with sess.get(url, headers=_headers(extra), stream=True, timeout=timeout) as r:
+                if r.status_code == 200 and "Range" in extra:
+                    raise _Restart()
+                if r.status_code >= 400:
+                    raise DownloadError(_t("error_http", code=r.status_code))
+                for chunk in r.iter_content(chunk_size=buffer_size):
+                    if (cancel is not None and cancel.is_set()) or abort.is_set():
+                        raise DownloadCancelled("download cancelled")
+                    if not chunk:
+                        continue
+                    if seg[1] is not None:
+                        chunk = chunk[: seg[1] - offset]
+                    view = memoryview(chunk)
+                    while view:
+                        view = view[os.pwrite(fd, view, offset + len(chunk) - len(view)):]
+                    hasher.feed(offset, chunk)
+                    offset += len(chunk)
+                    seg[2] += len(chunk)
+                    progressed = True
+                    tracker.add(len(chunk))
+                    save_state()
+                    if seg[1] is not None and offset >= seg[1]:
+                        break
+            if seg[1] is None:
+                # 未知长度：读到流结束即完成
+                seg[1] = seg[0] + seg[2]
+            elif seg[2] < seg[1] - seg[0]:
+                raise requests.ConnectionError("connection closed before segment end")
+        except requests.RequestException as e:
+            if not state["ranged"]:
+                raise DownloadError(str(e)) from e
+            attempt = 0 if progressed else attempt + 1
+            if attempt > retries:
+                raise DownloadError(str(e)) from e
+            time.sleep(min(8.0, 0.5 * (2 ** attempt)))
+    save_state(force=True)
+
+
+def fetch_expected_sha256(url: str, session: Optional[requests.Session] = None, timeout: float = 10) -> str:
+    """读取发布附带的 .sha256 文件，返回其中的 64 位十六进制摘要。"""
+    getter = session.get if session is not None else requests.get
+    resp = getter(url, headers={"User-Agent": USER_AGENT}, timeout=timeout)
+    if resp.status_code >= 400:
+        raise DownloadError(_t("error_http", code=resp.status_code))
+    m = re.search(r"([a-fA-F0-9]{64})", resp.text.strip())
+    if not m:
+        raise DownloadError("no SHA256 digest in checksum file")
+    return m.group(1).lower()
+
+
+def prune_downloads(keep: str, directory: str = UPDATE_CACHE_DIR) -> None:
+    """删除更新缓存目录中与 keep 无关的旧下载（包括其续传文件）。"""
+    keep_name = os.path.basename(keep)
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return
+    for name in names:
+        if not name.startswith(keep_name):
+            path = os.path.join(directory, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                _remove(path)
+
+
+# ---------------------------
+# 增量更新：逐文件清单
+# ---------------------------
+
+
+def _sha256_path(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_BUFFER), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _zip_data_offset(raw: Any, info: zipfile.ZipInfo) -> int:
+    """压缩数据在 zip 文件中的起始偏移（本地文件头的扩展字段长度可能与中央目录不同，需读本地头）。"""
+    raw.seek(info.header_offset)
+    header = raw.read(30)
+    if len(header) != 30 or header[:4] != b"PK\x03\x04":
+        raise DeltaError(f"bad local header: {info.filename}")
+    name_len, extra_len = struct.unpack("<HH", header[26:30])
+    return info.header_offset + 30 + name_len + extra_len
+
+
+def _zip_app_prefix(names: List[str]) -> str:
+    """zip 内 .app 的路径（如 PackyCode.app），忽略 ditto 生成的 __MACOSX/ 资源分支。"""
+    best: Optional[str] = None
+    for name in names:
+        if name.startswith("__MACOSX/"):
+            continue
+        m = re.match(r"^((?:[^/]+/)*?[^/]+\.app)/", name)
+        if m and (best is None or len(m.group(1)) < len(best)):
+            best = m.group(1)
+    if best is None:
+        raise DeltaError(_t("online_update_zip_missing"))
+    return best
+
+
+def build_manifest(zip_path: str) -> Dict[str, Any]:
+    """为发布的更新包生成逐文件清单。
+
+    每个文件记录相对 .app 的路径、SHA-256、大小、权限，以及压缩数据在 zip 中的偏移、
+    长度与压缩方式（仅支持 stored/deflate），客户端据此只按 Range 取回变化的文件。
+    """
+    files: List[Dict[str, Any]] = []
+    with zipfile.ZipFile(zip_path, "r") as zf, open(zip_path, "rb") as raw:
+        infos = zf.infolist()
+        prefix = _zip_app_prefix([i.filename for i in infos]) + "/"
+        for info in infos:
+            if not info.filename.startswith(prefix) or info.is_dir():
+                continue
+            rel = info.filename[len(prefix):]
+            mode = info.external_attr >> 16
+            if stat.S_ISLNK(mode):
+                files.append({"path": rel, "link": zf.read(info).decode("utf-8")})
+                continue
+            if info.compress_type not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+                raise DeltaError(f"unsupported compression {info.compress_type}: {info.filename}")
+            h = hashlib.sha256()
+            with zf.open(info) as f:
+                for chunk in iter(lambda: f.read(DOWNLOAD_BUFFER), b""):
+                    h.update(chunk)
+            files.append({
+                "path": rel,
+                "sha256": h.hexdigest(),
+                "size": info.file_size,
+                "mode": stat.S_IMODE(mode) or 0o644,
+                "offset": _zip_data_offset(raw, info),
+                "csize": info.compress_size,
+                "method": info.compress_type,
+            })
+    return {
+        "format": MANIFEST_FORMAT,
+        "app": os.path.basename(prefix[:-1]),
+        "zip_size": os.path.getsize(zip_path),
+        "zip_sha256": _sha256_path(zip_path),
+        "files": files,
+    }
+
+
+def fetch_manifest(url: str, session: Optional[requests.Session] = None, timeout: float = 10) -> Dict[str, Any]:
+    getter = session.get if session is not None else requests.get
+    resp = getter(url, headers={"User-Agent": USER_AGENT}, timeout=timeout)
+    if resp.status_code >= 400:
+        raise DeltaError(_t("error_http", code=resp.status_code))
+    try:
+        manifest = resp.json()
+    except ValueError as e:
+        raise DeltaError(f"invalid manifest: {e}") from e
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT or not isinstance(manifest.get("files"), list):
+        raise DeltaError("unsupported manifest format")
+    return manifest
+
+
+def _entry_path(root: str, rel: str) -> str:
+    # 清单来自网络：拒绝绝对路径与 .. 逃逸
+    parts = rel.split("/")
+    if not rel or rel.startswith("/") or any(p in ("", ".", "..") for p in parts):
+        raise DeltaError(f"invalid path in manifest: {rel!r}")
+    return os.path.join(root, *parts)
+
+
+def _matches(path: str, entry: Dict[str, Any]) -> bool:
+    """本地路径的内容、类型与权限是否与清单条目一致。"""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    if "link" in entry:
+        return stat.S_ISLNK(st.st_mode) and os.readlink(path) == entry["link"]
+    if not stat.S_ISREG(st.st_mode) or st.st_size != entry["size"] or stat.S_IMODE(st.st_mode) != entry["mode"]:
+        return False
+    return _sha256_path(path) == entry["sha256"]
+
+
+def _link_or_copy(src: str, dst: str) -> None:
+    # 同一卷上硬链接，不复制数据；新文件总是写入新 inode，不会改动已安装版本
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _plan_ranges(entries: List[Dict[str, Any]]) -> List[Tuple[int, int, List[Dict[str, Any]]]]:
+    """按偏移把变化文件合并为尽量少的 Range 请求：[(起, 止), 条目...]。"""
+    groups: List[Tuple[int, int, List[Dict[str, Any]]]] = []
+    for e in sorted(entries, key=lambda e: e["offset"]):
+        start, end = e["offset"], e["offset"] + e["csize"]
+        if groups and start - groups[-1][1] <= DELTA_MERGE_GAP and end - groups[-1][0] <= DELTA_MAX_SPAN:
+            g_start, _g_end, items = groups[-1]
+            groups[-1] = (g_start, end, items + [e])
+        else:
+            groups.append((start, end, [e]))
+    return groups
+
+
+class _StreamReader:
+    """按需从响应流中取出定长数据（网络错误仍以 requests 异常抛出）。"""
+
+    def __init__(self, resp: requests.Response, buffer_size: int):
+        self._it = resp.iter_content(chunk_size=buffer_size)
+        self._buf = b""
+
+    def read(self, n: int) -> Iterator[bytes]:
+        while n > 0:
+            if not self._buf:
+                self._buf = next(self._it, b"")
+                if not self._buf:
+                    raise requests.ConnectionError("connection closed before range end")
+            piece, self._buf = self._buf[:n], self._buf[n:]
+            n -= len(piece)
+            yield piece
+
+
+def _fetch_group(
+    sess: requests.Session,
+    url: str,
+    group: Tuple[int, int, List[Dict[str, Any]]],
+    dest_app: str,
+    tracker: _Progress,
+    buffer_size: int,
+    timeout: float,
+    retries: int,
+    cancel: Optional[threading.Event],
+    abort: threading.Event,
+) -> None:
+    """取回一组相邻文件的压缩数据，边解压边写入并校验每个文件的大小与 SHA-256。"""
+    start, end, items = group
+    attempt = 0
+    while True:
+        consumed = 0
+        try:
+            with sess.get(url, headers=_headers({"Range": f"bytes={start}-{end - 1}"}), stream=True, timeout=timeout) as r:
+                if r.status_code != 206:
+                    raise DeltaError(_t("error_http", code=r.status_code) if r.status_code >= 400 else "server ignored Range")
+                reader = _StreamReader(r, buffer_size)
+                pos = start
+                for e in items:
+                    for piece in reader.read(e["offset"] - pos):
+                        consumed += len(piece)
+                        tracker.add(len(piece))
+                    dec = zlib.decompressobj(-15) if e["method"] == zipfile.ZIP_DEFLATED else None
+                    h = hashlib.sha256()
+                    size = 0
+                    path = _entry_path(dest_app, e["path"])
+                    with open(path, "wb") as f:
+                        for piece in reader.read(e["csize"]):
+                            if (cancel is not None and cancel.is_set()) or abort.is_set():
+                                raise DownloadCancelled("download cancelled")
+                            consumed += len(piece)
+                            tracker.add(len(piece))
+                            out = dec.decompress(piece) if dec is not None else piece
+                            h.update(out)
+                            f.write(out)
+                            size += len(out)
+                        if dec is not None:
+                            out = dec.flush()
+                            h.update(out)
+                            f.write(out)
+                            size += len(out)
+                    if size != e["size"] or h.hexdigest() != e["sha256"]:
+                        raise DeltaError(f"checksum mismatch: {e['path']}")
+                    os.chmod(path, e["mode"])
+                    pos = e["offset"] + e["csize"]
+            return
+        except requests.RequestException as ex:
+            tracker.add(-consumed)
+            attempt = attempt + 1
+            if attempt > retries:
+                raise DeltaError(str(ex)) from ex
+            time.sleep(min(8.0, 0.5 * (2 ** attempt)))
+
+
+def verify_tree(app: str, manifest: Dict[str, Any]) -> None:
+    """按清单校验整个 .app：文件集合一致，每个文件内容、大小与权限、每个符号链接目标均匹配。"""
+    expected = {e["path"]: e for e in manifest["files"]}
+    seen = set()
+    for root, dirs, files in os.walk(app):
+        for name in dirs + files:
+            path = os.path.join(root, name)
+            if name in dirs and not os.path.islink(path):
+                continue
+            rel = os.path.relpath(path, app).replace(os.sep, "/")
+            entry = expected.get(rel)
+            if entry is None:
+                raise DeltaError(f"unexpected file: {rel}")
+            if not _matches(path, entry):
+                raise DeltaError(f"verification failed: {rel}")
+            seen.add(rel)
+    missing = set(expected) - seen
+    if missing:
+        raise DeltaError(f"missing file: {sorted(missing)[0]}")
+
+
+def apply_delta(
+    manifest: Dict[str, Any],
+    zip_url: str,
+    installed_app: str,
+    dest_app: str,
+    segments: int = 4,
+    progress: Optional[ProgressCallback] = None,
+    cancel: Optional[threading.Event] = None,
+    session: Optional[requests.Session] = None,
+    buffer_size: int = DOWNLOAD_BUFFER,
+    timeout: float = 30,
+    retries: int = 3,
+) -> DeltaResult:
+    """在 dest_app 组装清单描述的新版本：未变化的文件取自 installed_app，变化的文件从 zip_url 按 Range 取回。
+
+    组装完成后按清单整体校验；失败时删除 dest_app 并抛出 DeltaError（取消时为 DownloadCancelled）。
+    """
+    entries: List[Dict[str, Any]] = manifest["files"]
+    shutil.rmtree(dest_app, ignore_errors=True)
+    sess = session or _make_session(segments)
+    try:
+        changed: List[Dict[str, Any]] = []
+        reused = 0
+        for e in entries:
+            dst = _entry_path(dest_app, e["path"])
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            if "link" in e:
+                os.symlink(e["link"], dst)
+                reused += 1
+                continue
+            src = _entry_path(installed_app, e["path"])
+            if _matches(src, e):
+                _link_or_copy(src, dst)
+                reused += 1
+            elif e["size"] == 0:
+                open(dst, "wb").close()
+                os.chmod(dst, e["mode"])
+            else:
+                changed.append(e)
+        groups = _plan_ranges(changed)
+        tracker = _Progress(sum(end - start for start, end, _items in groups), 0, progress)
+        tracker.report()
+
+        abort = threading.Event()
+
+        def run(group: Tuple[int, int, List[Dict[str, Any]]]) -> None:
+            _fetch_group(sess, zip_url, group, dest_app, tracker, buffer_size, timeout, retries, cancel, abort)
+
+        workers = max(1, min(int(segments), len(groups)))
+        if workers <= 1:
+            for g in groups:
+                run(g)
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="packycode-delta") as pool:
+                futs = [pool.submit(run, g) for g in groups]
+                first: Optional[BaseException] = None
+                for fut in futs:
+                    try:
+                        fut.result()
+                    except BaseException as e:
+                        abort.set()
+                        if first is None or isinstance(first, DownloadCancelled):
+                            first = e
+                if first is not None:
+                    raise first
+        tracker.report()
+        verify_tree(dest_app, manifest)
+        return DeltaResult(dest_app, len(changed), reused, tracker.total or 0, int(manifest.get("zip_size") or 0))
+    except DownloadError:
+        shutil.rmtree(dest_app, ignore_errors=True)
+        raise
+    except (OSError, KeyError, TypeError, ValueError, zlib.error) as e:
+        shutil.rmtree(dest_app, ignore_errors=True)
+        raise DeltaError(str(e)) from e
+    finally:
+        if session is None:
+            sess.close()
+
+
+# ---------------------------
+# 发布检查：条件请求 + 本地缓存
+# ---------------------------
+
+
+class ReleaseCheckError(RuntimeError):
+    pass
+
+
+class ReleaseInfo(NamedTuple):
+    tag: str
+    html_url: str
+    notes: str
+    zip_url: Optional[str]
+    sha256_url: Optional[str]
+    manifest_url: Optional[str]
+
+
+def _pick_asset(assets: List[Dict[str, Any]], match: Callable[[str], bool]) -> Optional[str]:
+    for a in assets:
+        try:
+            if match((a.get("name") or "").lower()):
+                return a.get("browser_download_url")
+        except Exception:
+            pass
+    return None
+
+
+def parse_release(release: Dict[str, Any], repo: str) -> ReleaseInfo:
+    """从 releases/latest 的响应（或缓存）中取出版本号、发布页与各附件地址。"""
+    tag = (release.get("tag_name") or "").strip()
+    if not tag:
+        raise ReleaseCheckError("响应缺少 tag_name")
+    assets = release.get("assets") or []
+    if not isinstance(assets, list):
+        assets = []
+    # 优先带 mac/macos/osx 字样的 zip，否则任意 zip
+    zip_url = _pick_asset(
+        assets, lambda n: n.endswith(".zip") and ("mac" in n or "macos" in n or "osx" in n)
+    ) or _pick_asset(assets, lambda n: n.endswith(".zip"))
+    return ReleaseInfo(
+        tag=tag,
+        html_url=(release.get("html_url") or f"https://github.com/{repo}/releases").strip(),
+        notes=(release.get("body") or "").strip(),
+        zip_url=zip_url,
+        sha256_url=_pick_asset(assets, lambda n: n.endswith(".sha256") or n.endswith(".sha256sum") or n.endswith("sha256.txt")),
+        manifest_url=_pick_asset(assets, lambda n: n.endswith(".manifest.json")),
+    )
+
+
+class ReleaseChecker:
+    """查询 GitHub 最新发布，结果（含 ETag 与附件列表）缓存在本地文件中。
+
+    - check() 发送条件请求（If-None-Match/If-Modified-Since），304 时沿用缓存，
+      不计入 GitHub 未认证请求的速率限制；
+    - latest 只读内存中的缓存，不访问网络，可在界面线程直接调用；
+    - 缓存跨重启保留，启动后无需等待网络即可得到上次的结果。
+    """
+
+    def __init__(self, repo: str, path: str = RELEASE_CACHE_PATH, session: Optional[requests.Session] = None):
+        self.repo = repo
+        self._path = path
+        self._session = session
+        self._lock = threading.Lock()
+        # 同一时刻只发一个请求；并发调用者等待后直接复用其结果
+        self._check_lock = threading.Lock()
+        self._state = self._load()
+        self._latest = self._parse_cached()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self._path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            if isinstance(state, dict) and state.get("repo") == self.repo:
+                return state
+        except Exception:
+            pass
+        return {"repo": self.repo}
+
+    def _parse_cached(self) -> Optional[ReleaseInfo]:
+        release = self._state.get("release")
+        if not isinstance(release, dict):
+            return None
+        try:
+            return parse_release(release, self.repo)
+        except ReleaseCheckError:
+            return None
+
+    def _save(self) -> None:
+        try:
+            _atomic_write_text(self._path, json.dumps(self._state, ensure_ascii=False))
+        except OSError:
+            pass
+
+    @property
+    def latest(self) -> Optional[ReleaseInfo]:
+        with self._lock:
+            return self._latest
+
+    @property
+    def checked_at(self) -> float:
+        with self._lock:
+            return float(self._state.get("checked_at") or 0)
+
+    def is_due(self, max_age: float) -> bool:
+        return time.time() - self.checked_at >= max_age
+
+    @property
+    def notified_tag(self) -> str:
+        with self._lock:
+            return str(self._state.get("notified_tag") or "")
+
+    def mark_notified(self, tag: str) -> None:
+        with self._lock:
+            self._state["notified_tag"] = tag
+            self._save()
+
+    def check(self, max_age: float = 0, timeout: float = 10) -> ReleaseInfo:
+        """按需刷新缓存并返回最新发布；缓存不超过 max_age 秒时直接返回，不访问网络。"""
+        with self._check_lock:
+            latest = self.latest
+            if latest is not None and not self.is_due(max_age):
+                return latest
+            with self._lock:
+                etag = self._state.get("etag") if self._latest is not None else None
+                last_modified = self._state.get("last_modified") if self._latest is not None else None
+            headers = {"Accept": "application/vnd.github+json", "User-Agent": USER_AGENT}
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+            getter = self._session.get if self._session is not None else requests.get
+            try:
+                resp = getter(f"https://api.github.com/repos/{self.repo}/releases/latest", headers=headers, timeout=timeout)
+            except requests.RequestException as e:
+                raise ReleaseCheckError(str(e)) from e
+            if resp.status_code == 304 and latest is not None:
+                with self._lock:
+                    self._state["checked_at"] = time.time()
+                    self._save()
+                return latest
+            if resp.status_code >= 400:
+                raise ReleaseCheckError(_t("error_http", code=resp.status_code))
+            try:
+                data = resp.json()
+            except ValueError as e:
+                raise ReleaseCheckError(str(e)) from e
+            if not isinstance(data, dict):
+                raise ReleaseCheckError("unexpected response")
+            # 只保留用到的字段与附件列表
+            release = {
+                "tag_name": data.get("tag_name"),
+                "html_url": data.get("html_url"),
+                "body": data.get("body"),
+                "published_at": data.get("published_at"),
+                "assets": [
+                    {"name": a.get("name"), "size": a.get("size"), "browser_download_url": a.get("browser_download_url")}
+                    for a in (data.get("assets") or [])
+                    if isinstance(a, dict)
+                ],
+            }
+            info = parse_release(release, self.repo)
+            with self._lock:
+                self._state.update({
+                    "etag": resp.headers.get("ETag"),
+                    "last_modified": resp.headers.get("Last-Modified"),
+                    "checked_at": time.time(),
+                    "release": release,
+                })
+                self._latest = info
+                self._save()
+            return info
+
+
+# ---------------------------
+# 命令行入口
+# ---------------------------
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="packycode_update", description="在线更新所用的下载引擎与增量更新工具")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_dl = sub.add_parser("download", help="可续传、可分段并行的下载")
+    p_dl.add_argument("url")
+    p_dl.add_argument("-o", "--output", required=True, help="保存路径（中断后再次运行即续传）")
+    p_dl.add_argument("--segments", type=int, default=4, help="并行分段数（服务端不支持 Range 时退化为 1）")
+    p_dl.add_argument("--sha256", help="期望的 SHA-256（十六进制）")
+    p_mf = sub.add_parser("manifest", help="为发布的 .zip 生成增量更新清单")
+    p_mf.add_argument("zip")
+    p_mf.add_argument("-o", "--output", required=True, help="清单保存路径（随 zip 一同发布）")
+    p_dt = sub.add_parser("delta", help="按清单从已安装的 .app 增量组装新版本")
+    p_dt.add_argument("manifest_url")
+    p_dt.add_argument("zip_url")
+    p_dt.add_argument("--app", required=True, help="已安装的 .app")
+    p_dt.add_argument("-o", "--output", required=True, help="组装出的新 .app 路径")
+    p_dt.add_argument("--segments", type=int, default=4, help="并行请求数")
+    args = parser.parse_args(argv)
+
+    def show(done: int, total: Optional[int]) -> None:
+        if total:
+            sys.stderr.write(f"\r{done / total:6.1%}  {done / 1048576:.1f}/{total / 1048576:.1f} MiB")
+        else:
+            sys.stderr.write(f"\r{done / 1048576:.1f} MiB")
+        sys.stderr.flush()
+
+    t0 = time.perf_counter()
+    try:
+        if args.cmd == "manifest":
+            manifest = build_manifest(args.zip)
+            _atomic_write_text(args.output, json.dumps(manifest, ensure_ascii=False, separators=(",", ":")))
+            print(f"{args.output}  app={manifest['app']}  files={len(manifest['files'])}  zip_sha256={manifest['zip_sha256']}")
+            return 0
+        if args.cmd == "delta":
+            dres = apply_delta(fetch_manifest(args.manifest_url), args.zip_url, args.app, args.output, segments=args.segments, progress=show)
+            sys.stderr.write("\n")
+            print(
+                f"{dres.path}  fetched={dres.fetched_files} files / {dres.fetched_bytes} bytes"
+                f"  reused={dres.reused_files}  zip_size={dres.zip_size}  {time.perf_counter() - t0:.2f}s"
+            )
+            return 0
+        res = download(args.url, args.output, expected_sha256=args.sha256, segments=args.segments, progress=show)
+    except DownloadError as e:
+        sys.stderr.write(f"\n{e}\n")
+        return 1
+    elapsed = time.perf_counter() - t0
+    fetched = res.size - res.resumed_bytes
+    sys.stderr.write("\n")
+    print(
+        f"{res.path}  sha256={res.sha256}  size={res.size}  resumed={res.resumed_bytes}"
+        f"  segments={res.segments}  {fetched / 1048576 / max(elapsed, 1e-6):.1f} MiB/s"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""不依赖 AppKit 的进度圆环光栅化：绘制到 RGBA 缓冲区并编码为 PNG。
+
+几何与配色与 main.py 中 AppKit 绘制一致：
+- 轨道：整圆，黑色 25% 透明度；
+- 进度弧：从 12 点方向顺时针，圆头端点；ring_reverse 时绘制 100 - percent；
+- 配色：单色（黑，交由系统模板着色）、colorful（按已用百分比绿/橙/红）、
+  green、blue、gradient（按弧长分段，绿→黄→红）。
+圆环内文字依赖系统字体，仍只由 AppKit 路径绘制。
+
+安装了 NumPy 时逐像素计算向量化，否则退回纯 Python 实现（两者输出逐字节一致）；
+NumPy 在首次绘制时才导入，导入本模块本身不加载它。
+坐标原点在左下角（与 AppKit 相同），输出按 PNG 行序自上而下排列。
+"""
+
+import math
+import struct
+import zlib
+from typing import List, Optional, Tuple
+
+_np = None
+_np_checked = False
+
+
+def _numpy():
+    """按需导入 NumPy（仅导入一次）；未安装时返回 None，走纯 Python 实现。"""
+    global _np, _np_checked
+    if not _np_checked:
+        try:
+            import numpy
+
+            _np = numpy
+        except Exception:
+            _np = None
+        _np_checked = True
+    return _np
+
+
+def has_numpy() -> bool:
+    return _numpy() is not None
+
+Color = Tuple[float, float, float]
+
+GREEN: Color = (0.12, 0.75, 0.39)
+ORANGE: Color = (1.00, 0.67, 0.26)
+YELLOW: Color = (1.00, 0.84, 0.26)
+RED: Color = (0.94, 0.33, 0.31)
+BLUE: Color = (0.26, 0.52, 0.96)
+BLACK: Color = (0.0, 0.0, 0.0)
+TRACK_ALPHA = 0.25
+
+
+def arc_color(percent: float, colored: bool, mode: str) -> Optional[Color]:
+    """单色弧的颜色；gradient 模式按位置着色，返回 None。"""
+    if not colored:
+        return BLACK
+    if mode == "green":
+        return GREEN
+    if mode == "blue":
+        return BLUE
+    if mode == "gradient":
+        return None
+    # colorful：阈值配色（绿/橙/红按已用百分比）
+    if percent <= 60:
+        return GREEN
+    if percent <= 85:
+        return ORANGE
+    return RED
+
+
+def gradient_color(tm: float) -> Color:
+    """渐变弧在相对位置 tm（0..1）处的颜色：绿 → 黄 → 红。"""
+    if tm <= 0.5:
+        k = tm / 0.5
+        a, b = GREEN, YELLOW
+    else:
+        k = (tm - 0.5) / 0.5
+        a, b = YELLOW, RED
+    return (a[0] + (b[0] - a[0]) * k, a[1] + (b[1] - a[1]) * k, a[2] + (b[2] - a[2]) * k)
+
+
+def _segments(angle: float) -> int:
+    # 与 AppKit 路径一致：以多段弧模拟渐变
+    return max(1, int(max(6.0, angle) / 8.0))
+
+
+def _geometry(size: int, stroke: float) -> Tuple[float, float, float]:
+    center = size / 2.0
+    radius = (size - stroke) / 2.0
+    return center, radius, stroke / 2.0
+
+
+def _coverage(dist: float, half: float) -> float:
+    # 距离场抗锯齿：边缘 1 像素线性过渡
+    return min(1.0, max(0.0, half - dist + 0.5))
+
+
+def _render_python(size: int, percent: float, colored: bool, mode: str, reverse: bool, stroke: float) -> bytearray:
+    center, radius, half = _geometry(size, stroke)
+    draw_pct = max(0.0, min(100.0, 100.0 - percent)) if reverse else float(percent)
+    angle = 360.0 * (draw_pct / 100.0)
+    end_rad = math.radians(90.0 - angle)
+    ends = [(center, center + radius), (center + radius * math.cos(end_rad), center + radius * math.sin(end_rad))]
+    solid = arc_color(percent, colored, mode)
+    segs = _segments(angle)
+    out = bytearray(size * size * 4)
+    for row in range(size):
+        y = size - row - 0.5  # 自上而下输出，几何按左下原点计算
+        for col in range(size):
+            x = col + 0.5
+            dx, dy = x - center, y - center
+            band = _coverage(abs(math.hypot(dx, dy) - radius), half)
+            # 轨道
+            r = g = b = 0.0
+            a = TRACK_ALPHA * band
+            # 进度弧：顺时针自 12 点方向的角度
+            phi = (90.0 - math.degrees(math.atan2(dy, dx))) % 360.0
+            cov = band if (angle > 0.0 and phi <= angle) else 0.0
+            for ex, ey in ends:
+                cov = max(cov, _coverage(math.hypot(x - ex, y - ey), half))
+            if cov > 0.0:
+                if solid is None:
+                    t = min(phi, angle) / angle if angle > 0.0 else 0.0
+                    seg = min(segs - 1, int(t * segs))
+                    cr, cg, cb = gradient_color((seg + 0.5) / segs)
+                else:
+                    cr, cg, cb = solid
+                # source-over 合成（非预乘）
+                na = cov + a * (1.0 - cov)
+                r = (cr * cov + r * a * (1.0 - cov)) / na
+                g = (cg * cov + g * a * (1.0 - cov)) / na
+                b = (cb * cov + b * a * (1.0 - cov)) / na
+                a = na
+            i = (row * size + col) * 4
+            out[i] = int(round(r * 255.0))
+            out[i + 1] = int(round(g * 255.0))
+            out[i + 2] = int(round(b * 255.0))
+            out[i + 3] = int(round(a * 255.0))
+    return out
+
+
+def _render_numpy(size: int, percent: float, colored: bool, mode: str, reverse: bool, stroke: float) -> bytes:
+    np = _numpy()
+    center, radius, half = _geometry(size, stroke)
+    draw_pct = max(0.0, min(100.0, 100.0 - percent)) if reverse else float(percent)
+    angle = 360.0 * (draw_pct / 100.0)
+    end_rad = math.radians(90.0 - angle)
+    ends = [(center, center + radius), (center + radius * math.cos(end_rad), center + radius * math.sin(end_rad))]
+    solid = arc_color(percent, colored, mode)
+
+    x = np.arange(size, dtype=np.float64) + 0.5
+    y = size - np.arange(size, dtype=np.float64) - 0.5
+    xx, yy = np.meshgrid(x, y)
+    dx, dy = xx - center, yy - center
+    band = np.clip(half - np.abs(np.hypot(dx, dy) - radius) + 0.5, 0.0, 1.0)
+    a = TRACK_ALPHA * band
+    phi = np.mod(90.0 - np.degrees(np.arctan2(dy, dx)), 360.0)
+    cov = np.where(phi <= angle, band, 0.0) if angle > 0.0 else np.zeros_like(band)
+    for ex, ey in ends:
+        cov = np.maximum(cov, np.clip(half - np.hypot(xx - ex, yy - ey) + 0.5, 0.0, 1.0))
+
+    if solid is None:
+        segs = _segments(angle)
+        t = np.minimum(phi, angle) / angle if angle > 0.0 else np.zeros_like(phi)
+        seg = np.minimum(segs - 1, (t * segs).astype(np.int64))
+        palette = np.array([gradient_color((i + 0.5) / segs) for i in range(segs)], dtype=np.float64)
+        col = palette[seg]
+    else:
+        col = np.broadcast_to(np.array(solid, dtype=np.float64), band.shape + (3,))
+
+    na = cov + a * (1.0 - cov)
+    safe = np.where(na > 0.0, na, 1.0)
+    # 轨道为黑色，合成后颜色只来自进度弧
+    rgb = col * (cov / safe)[..., None]
+    rgba = np.empty(band.shape + (4,), dtype=np.float64)
+    rgba[..., :3] = np.where((cov > 0.0)[..., None], rgb, 0.0)
+    rgba[..., 3] = np.where(cov > 0.0, na, a)
+    # 与纯 Python 的 round() 一致：四舍六入五成双
+    return np.rint(rgba * 255.0).astype(np.uint8).tobytes()
+
+
+def render_ring_rgba(
+    percent: float,
+    colored: bool = False,
+    mode: str = "colorful",
+    reverse: bool = False,
+    size: int = 20,
+    stroke: float = 2.0,
+    use_numpy: Optional[bool] = None,
+) -> bytes:
+    """绘制 size x size 的 RGBA（非预乘，自上而下）圆环，返回原始像素字节。
+
+    size 与 stroke 为像素单位；高分辨率版本按倍率同时放大二者。
+    use_numpy 为 None 时自动选择（已安装 NumPy 则使用）。
+    """
+    percent = max(0.0, min(100.0, float(percent)))
+    mode = (mode or "colorful").lower()
+    if use_numpy is None:
+        use_numpy = has_numpy()
+    if use_numpy:
+        if not has_numpy():
+            raise RuntimeError("NumPy is not installed")
+        return _render_numpy(size, percent, colored, mode, reverse, stroke)
+    return bytes(_render_python(size, percent, colored, mode, reverse, stroke))
+
+
+def encode_png(width: int, height: int, rgba: bytes, level: int = 6) -> bytes:
+    """将 8 位 RGBA 像素编码为 PNG（逐行无滤波 + zlib）。"""
+    stride = width * 4
+    if len(rgba) != stride * height:
+        raise ValueError("pixel buffer size does not match dimensions")
+    raw = bytearray()
+    for row in range(height):
+        raw.append(0)
+        raw.extend(rgba[row * stride:(row + 1) * stride])
+
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"".join([
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", ihdr),
+        chunk(b"IDAT", zlib.compress(bytes(raw), level)),
+        chunk(b"IEND", b""),
+    ])
+
+
+def render_ring_png(
+    percent: float,
+    colored: bool = False,
+    mode: str = "colorful",
+    reverse: bool = False,
+    size: int = 20,
+    stroke: float = 2.0,
+) -> bytes:
+    """render_ring_rgba + encode_png 的便捷组合。"""
+    return encode_png(size, size, render_ring_rgba(percent, colored, mode, reverse, size, stroke))
+
+
+def pixel_diff(a: bytes, b: bytes) -> Tuple[int, float]:
+    """两块等长 RGBA 缓冲区的 (最大通道差, 平均通道差)，用于对比不同绘制路径。"""
+    if len(a) != len(b):
+        raise ValueError("buffers differ in size")
+    if not a:
+        return 0, 0.0
+    diffs: List[int] = [abs(x - y) for x, y in zip(a, b)]
+    return max(diffs), sum(diffs) / len(diffs)
@@ -30,6 +30,14 @@ if os.path.exists(ICON_SRC):
     # 将 PNG 打包到 .app 的 Resources 根目录，运行时使用 RESOURCEPATH/icon.png 加载
     DATA_FILES.append(("", [ICON_SRC]))
 
+# 界面文本目录：打包到 Resources/locales，运行时按当前语言按需加载
+LOCALES_DIR = os.path.join(BASE_DIR, "locales")
+if os.path.isdir(LOCALES_DIR):
+    DATA_FILES.append((
+        "locales",
+        sorted(os.path.join(LOCALES_DIR, f) for f in os.listdir(LOCALES_DIR) if f.endswith(".json")),
+    ))
+
 OPTIONS = {
     "argv_emulation": False,
     # Finder 图标（建议 .icns）。当前使用 PNG，如需自定义请替换为 .icns。
@@ -46,6 +54,8 @@ OPTIONS = {
         "setuptools",
         "pkg_resources",
         "distutils",
+        # ring_raster 的 NumPy 加速只在 AppKit 绘制失败时使用，打包版走纯 Python 实现
+        "numpy",
     ],
     # 明确包含 requests 的依赖子模块，避免某些环境下被遗漏
     "includes": [
@@ -60,6 +70,7 @@ setup(
     name=APP_NAME,
     author="packy",
     version=read_version(),
+    data_files=DATA_FILES,
     options={"py2app": OPTIONS},
     setup_requires=["py2app"],
     install_requires=["rumps", "requests"],